@@ -11,6 +11,7 @@ namespace OneTake.Application.Common.Interfaces
         Task<List<Follow>> GetFollowersAsync(Guid userId);
         Task<List<Follow>> GetFollowingAsync(Guid userId);
         Task<bool> IsFollowingAsync(Guid followerId, Guid followedId);
+        Task<List<Follow>> GetPageAsync(int offset, int limit);
     }
 }
 
@@ -13,6 +13,7 @@ namespace OneTake.Application.Common.Interfaces
         Task<(List<Post> Posts, bool HasMore)> GetByAuthorIdsWithCursorAsync(IEnumerable<Guid> authorIds, string? cursor, int pageSize);
         Task<(List<Post> Posts, bool HasMore)> GetByTagWithCursorAsync(string tagName, string? cursor, int pageSize);
         Task<(List<Post> Posts, bool HasMore)> SearchAsync(string query, string? cursor, int pageSize);
+        Task<List<Post>> GetPublicCreatedSinceAsync(DateTime since, int offset, int limit);
     }
 }
 
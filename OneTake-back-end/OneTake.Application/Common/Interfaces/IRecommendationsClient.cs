@@ -5,4 +5,5 @@ namespace OneTake.Application.Common.Interfaces;
 public interface IRecommendationsClient
 {
     Task<GetRecommendationsResponse> GetRecommendationsAsync(GetRecommendationsRequest request, CancellationToken cancellationToken = default);
+    Task<GetRecommendationsBatchResponse> GetRecommendationsBatchAsync(GetRecommendationsBatchRequest request, CancellationToken cancellationToken = default);
 }
@@ -0,0 +1,16 @@
+using System;
+using System.Collections.Generic;
+
+namespace OneTake.Application.DTOs.Posts
+{
+    public record PostRefDto(
+        Guid Id,
+        Guid AuthorId,
+        DateTime CreatedAt
+    );
+
+    public record PostRefPage(
+        List<PostRefDto> Posts,
+        bool HasMore
+    );
+}
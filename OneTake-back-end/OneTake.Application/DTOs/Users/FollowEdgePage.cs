@@ -0,0 +1,15 @@
+using System;
+using System.Collections.Generic;
+
+namespace OneTake.Application.DTOs.Users
+{
+    public record FollowEdgeDto(
+        Guid FollowerId,
+        Guid FollowedId
+    );
+
+    public record FollowEdgePage(
+        List<FollowEdgeDto> Follows,
+        bool HasMore
+    );
+}
@@ -7,6 +7,7 @@ using OneTake.Application.Common.Errors;
 using OneTake.Application.Common.Interfaces;
 using OneTake.Application.Common.Results;
 using OneTake.Application.DTOs.Posts;
+using OneTake.Application.DTOs.Users;
 using OneTake.Domain.Entities;
 using OneTake.Domain.Enums;
 
@@ -17,10 +18,14 @@ namespace OneTake.Application.Services
         Task<Result> FollowAsync(Guid followerId, Guid followedId, CancellationToken cancellationToken = default);
         Task<Result> UnfollowAsync(Guid followerId, Guid followedId, CancellationToken cancellationToken = default);
         Task<Result<PagedPostResponse>> GetFollowingFeedAsync(Guid userId, string? cursor, int pageSize, CancellationToken cancellationToken = default);
+        Task<Result<FollowEdgePage>> GetFollowEdgesAsync(int offset, int pageSize, CancellationToken cancellationToken = default);
+        Task<Result<PostRefPage>> GetRecentPostRefsAsync(DateTime since, int offset, int pageSize, CancellationToken cancellationToken = default);
     }
 
     public class FollowService : IFollowService
     {
+        public const int MaxExportPageSize = 10000;
+
         private readonly IUnitOfWork _unitOfWork;
         private readonly IAnalyticsIngestClient _analyticsIngest;
         private readonly INotificationService _notificationService;
@@ -163,5 +168,29 @@ namespace OneTake.Application.Services
             }
             return Result<PagedPostResponse>.Success(new PagedPostResponse(postDtos, nextCursor, hasMore));
         }
+
+        public async Task<Result<FollowEdgePage>> GetFollowEdgesAsync(int offset, int pageSize, CancellationToken cancellationToken = default)
+        {
+            pageSize = Math.Clamp(pageSize, 1, MaxExportPageSize);
+            List<Follow> follows = await _unitOfWork.Follows.GetPageAsync(Math.Max(offset, 0), pageSize + 1);
+            bool hasMore = follows.Count > pageSize;
+            List<FollowEdgeDto> edges = follows
+                .Take(pageSize)
+                .Select(f => new FollowEdgeDto(f.FollowerId, f.FollowedId))
+                .ToList();
+            return Result<FollowEdgePage>.Success(new FollowEdgePage(edges, hasMore));
+        }
+
+        public async Task<Result<PostRefPage>> GetRecentPostRefsAsync(DateTime since, int offset, int pageSize, CancellationToken cancellationToken = default)
+        {
+            pageSize = Math.Clamp(pageSize, 1, MaxExportPageSize);
+            List<Post> posts = await _unitOfWork.Posts.GetPublicCreatedSinceAsync(since, Math.Max(offset, 0), pageSize + 1);
+            bool hasMore = posts.Count > pageSize;
+            List<PostRefDto> refs = posts
+                .Take(pageSize)
+                .Select(p => new PostRefDto(p.Id, p.AuthorId, p.CreatedAt))
+                .ToList();
+            return Result<PostRefPage>.Success(new PostRefPage(refs, hasMore));
+        }
     }
 }
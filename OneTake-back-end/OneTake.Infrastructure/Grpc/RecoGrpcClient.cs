@@ -5,19 +5,82 @@ using OneTake.GrpcContracts.Reco.V1;
 
 namespace OneTake.Infrastructure.Grpc;
 
-public class RecoGrpcClient : IRecommendationsClient
+/// <summary>
+/// Reco gRPC client over GRPC_RECO_CONNECTIONS separate HTTP/2 connections.
+/// The reco service's pre-fork workers share one port (SO_REUSEPORT), and the kernel
+/// balances connections, not requests, so a single channel would pin all traffic to one
+/// worker. Each user is routed through the same connection, and so to the same worker,
+/// which holds that user's cursor sessions and seen filter.
+/// </summary>
+public class RecoGrpcClient : IRecommendationsClient, IDisposable
 {
-    private readonly RecoService.RecoServiceClient _client;
+    public const int DefaultConnections = 4;
+
+    private readonly GrpcChannel[] _channels;
+    private readonly RecoService.RecoServiceClient[] _clients;
+    private int _nextAnonymous = -1;
 
     public RecoGrpcClient(IConfiguration configuration)
     {
         string? url = configuration["GRPC_RECO_URL"] ?? "http://localhost:50052";
-        GrpcChannel channel = GrpcChannel.ForAddress(url);
-        _client = new RecoService.RecoServiceClient(channel);
+        int connections = int.TryParse(configuration["GRPC_RECO_CONNECTIONS"], out int configured) && configured > 0
+            ? configured
+            : DefaultConnections;
+        _channels = new GrpcChannel[connections];
+        _clients = new RecoService.RecoServiceClient[connections];
+        for (int i = 0; i < connections; i++)
+        {
+            // A handler per channel is a connection per channel. Idle connections are kept,
+            // since a reconnect may land on another worker.
+            SocketsHttpHandler handler = new SocketsHttpHandler
+            {
+                EnableMultipleHttp2Connections = false,
+                PooledConnectionIdleTimeout = Timeout.InfiniteTimeSpan
+            };
+            _channels[i] = GrpcChannel.ForAddress(url, new GrpcChannelOptions { HttpHandler = handler });
+            _clients[i] = new RecoService.RecoServiceClient(_channels[i]);
+        }
+    }
+
+    /// <summary>
+    /// Connection for a user: a stable hash of the user id (FNV-1a, the same in every
+    /// process), or round-robin for anonymous requests, which have no per-user state.
+    /// </summary>
+    public static int ConnectionIndex(string? userId, int connections, ref int nextAnonymous)
+    {
+        if (string.IsNullOrEmpty(userId))
+        {
+            return (int)((uint)Interlocked.Increment(ref nextAnonymous) % (uint)connections);
+        }
+        uint hash = 2166136261;
+        foreach (char c in userId)
+        {
+            hash = (hash ^ c) * 16777619;
+        }
+        return (int)(hash % (uint)connections);
+    }
+
+    private RecoService.RecoServiceClient ClientFor(string? userId)
+    {
+        return _clients[ConnectionIndex(userId, _clients.Length, ref _nextAnonymous)];
     }
 
     public async Task<GetRecommendationsResponse> GetRecommendationsAsync(GetRecommendationsRequest request, CancellationToken cancellationToken = default)
     {
-        return await _client.GetRecommendationsAsync(request, cancellationToken: cancellationToken);
+        return await ClientFor(request.UserId).GetRecommendationsAsync(request, cancellationToken: cancellationToken);
+    }
+
+    public async Task<GetRecommendationsBatchResponse> GetRecommendationsBatchAsync(GetRecommendationsBatchRequest request, CancellationToken cancellationToken = default)
+    {
+        string? userId = request.Requests.Count > 0 ? request.Requests[0].UserId : null;
+        return await ClientFor(userId).GetRecommendationsBatchAsync(request, cancellationToken: cancellationToken);
+    }
+
+    public void Dispose()
+    {
+        foreach (GrpcChannel channel in _channels)
+        {
+            channel.Dispose();
+        }
     }
 }
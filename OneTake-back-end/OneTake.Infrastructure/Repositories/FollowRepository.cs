@@ -40,6 +40,16 @@ namespace OneTake.Infrastructure.Repositories
             return await _dbSet
                 .AnyAsync(f => f.FollowerId == followerId && f.FollowedId == followedId);
         }
+
+        public async Task<List<Follow>> GetPageAsync(int offset, int limit)
+        {
+            return await _dbSet
+                .OrderBy(f => f.FollowerId)
+                .ThenBy(f => f.FollowedId)
+                .Skip(offset)
+                .Take(limit)
+                .ToListAsync();
+        }
     }
 }
 
@@ -145,6 +145,17 @@ namespace OneTake.Infrastructure.Repositories
             return ApplyCursorPage(posts, cursorData, pageSize);
         }
 
+        public async Task<List<Post>> GetPublicCreatedSinceAsync(DateTime since, int offset, int limit)
+        {
+            return await _dbSet
+                .Where(p => p.Visibility == Visibility.Public && p.CreatedAt >= since)
+                .OrderBy(p => p.CreatedAt)
+                .ThenBy(p => p.Id)
+                .Skip(offset)
+                .Take(limit)
+                .ToListAsync();
+        }
+
         public async Task<(List<Post> Posts, bool HasMore)> SearchAsync(string query, string? cursor, int pageSize)
         {
             if (string.IsNullOrWhiteSpace(query))
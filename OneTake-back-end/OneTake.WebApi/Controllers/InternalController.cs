@@ -0,0 +1,76 @@
+using System.Security.Cryptography;
+using System.Text;
+using System.Threading;
+using Microsoft.AspNetCore.Authorization;
+using Microsoft.AspNetCore.Mvc;
+using OneTake.Application.Common.Errors;
+using OneTake.Application.Common.Results;
+using OneTake.Application.DTOs.Posts;
+using OneTake.Application.DTOs.Users;
+using OneTake.Application.Services;
+using OneTake.WebApi.Extensions;
+
+namespace OneTake.WebApi.Controllers
+{
+    /// <summary>
+    /// Bulk exports for backend services (the reco service loads its follow graph from here).
+    /// Requests must carry the shared INTERNAL_API_TOKEN in the X-Internal-Token header;
+    /// the endpoints are disabled while the token is not configured.
+    /// </summary>
+    [ApiController]
+    [Route("api/internal")]
+    [AllowAnonymous]
+    public class InternalController : ControllerBase
+    {
+        public const string TokenHeader = "X-Internal-Token";
+
+        private readonly IFollowService _followService;
+        private readonly IConfiguration _configuration;
+
+        public InternalController(IFollowService followService, IConfiguration configuration)
+        {
+            _followService = followService;
+            _configuration = configuration;
+        }
+
+        [HttpGet("follows")]
+        public async Task<IActionResult> GetFollows([FromQuery] int offset = 0, [FromQuery] int pageSize = 5000, CancellationToken cancellationToken = default)
+        {
+            if (!IsAuthorized())
+            {
+                return InvalidToken();
+            }
+            Result<FollowEdgePage> result = await _followService.GetFollowEdgesAsync(offset, pageSize, cancellationToken);
+            return result.ToActionResult(HttpContext.TraceIdentifier, Request.Path, Request.Method);
+        }
+
+        [HttpGet("recent-posts")]
+        public async Task<IActionResult> GetRecentPosts([FromQuery] int days = 30, [FromQuery] int offset = 0, [FromQuery] int pageSize = 5000, CancellationToken cancellationToken = default)
+        {
+            if (!IsAuthorized())
+            {
+                return InvalidToken();
+            }
+            DateTime since = DateTime.UtcNow.AddDays(-Math.Clamp(days, 1, 365));
+            Result<PostRefPage> result = await _followService.GetRecentPostRefsAsync(since, offset, pageSize, cancellationToken);
+            return result.ToActionResult(HttpContext.TraceIdentifier, Request.Path, Request.Method);
+        }
+
+        private IActionResult InvalidToken()
+        {
+            return new UnauthorizedError("INVALID_INTERNAL_TOKEN", "Missing or invalid internal token")
+                .ToActionResult(HttpContext.TraceIdentifier, Request.Path, Request.Method);
+        }
+
+        private bool IsAuthorized()
+        {
+            string? expected = _configuration["INTERNAL_API_TOKEN"];
+            string? actual = Request.Headers[TokenHeader];
+            if (string.IsNullOrEmpty(expected) || string.IsNullOrEmpty(actual))
+            {
+                return false;
+            }
+            return CryptographicOperations.FixedTimeEquals(Encoding.UTF8.GetBytes(expected), Encoding.UTF8.GetBytes(actual));
+        }
+    }
+}
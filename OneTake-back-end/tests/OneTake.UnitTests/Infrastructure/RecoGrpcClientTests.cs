@@ -0,0 +1,45 @@
+using System.Collections.Generic;
+using System.Linq;
+using OneTake.Infrastructure.Grpc;
+using Xunit;
+
+namespace OneTake.UnitTests.Infrastructure
+{
+    public class RecoGrpcClientTests
+    {
+        [Fact]
+        public void ConnectionIndex_IsStableForAUser()
+        {
+            int next = -1;
+            int first = RecoGrpcClient.ConnectionIndex("user-42", 8, ref next);
+
+            for (int i = 0; i < 5; i++)
+            {
+                Assert.Equal(first, RecoGrpcClient.ConnectionIndex("user-42", 8, ref next));
+            }
+            Assert.Equal(-1, next);
+        }
+
+        [Fact]
+        public void ConnectionIndex_SpreadsUsersOverAllConnections()
+        {
+            int next = -1;
+            HashSet<int> used = Enumerable.Range(0, 200)
+                .Select(i => RecoGrpcClient.ConnectionIndex(Guid.NewGuid().ToString(), 4, ref next))
+                .ToHashSet();
+
+            Assert.Equal(new HashSet<int> { 0, 1, 2, 3 }, used);
+        }
+
+        [Fact]
+        public void ConnectionIndex_RoundRobinsAnonymousRequests()
+        {
+            int next = -1;
+            List<int> indexes = Enumerable.Range(0, 5)
+                .Select(_ => RecoGrpcClient.ConnectionIndex("", 3, ref next))
+                .ToList();
+
+            Assert.Equal(new List<int> { 0, 1, 2, 0, 1 }, indexes);
+        }
+    }
+}
@@ -4,6 +4,7 @@ using Moq;
 using OneTake.Application.Common.Interfaces;
 using OneTake.Application.Common.Results;
 using OneTake.Application.DTOs.Posts;
+using OneTake.Application.DTOs.Users;
 using OneTake.Application.Services;
 using OneTake.Domain.Entities;
 using OneTake.Domain.Enums;
@@ -215,5 +216,51 @@ namespace OneTake.UnitTests.Services
             Assert.Equal($"{createdAt:O}|{post.Id}", result.Value!.NextCursor);
             Assert.True(result.Value.HasMore);
         }
+
+        [Fact]
+        public async Task GetFollowEdgesAsync_ReturnsPageAndHasMore_WhenMoreEdgesExist()
+        {
+            Guid followerId = Guid.NewGuid();
+            List<Follow> follows = new List<Follow>
+            {
+                new Follow { FollowerId = followerId, FollowedId = Guid.NewGuid() },
+                new Follow { FollowerId = followerId, FollowedId = Guid.NewGuid() },
+                new Follow { FollowerId = followerId, FollowedId = Guid.NewGuid() }
+            };
+            Mock<IUnitOfWork> unitOfWorkMock = new Mock<IUnitOfWork>();
+            Mock<IFollowRepository> followsMock = new Mock<IFollowRepository>();
+            followsMock.Setup(r => r.GetPageAsync(4, 3)).ReturnsAsync(follows);
+            unitOfWorkMock.Setup(u => u.Follows).Returns(followsMock.Object);
+
+            IFollowService service = CreateService(unitOfWorkMock: unitOfWorkMock);
+            Result<FollowEdgePage> result = await service.GetFollowEdgesAsync(4, 2);
+
+            Assert.True(result.IsSuccess);
+            Assert.NotNull(result.Value);
+            Assert.True(result.Value.HasMore);
+            Assert.Equal(2, result.Value.Follows.Count);
+            Assert.Equal(follows[1].FollowedId, result.Value.Follows[1].FollowedId);
+        }
+
+        [Fact]
+        public async Task GetRecentPostRefsAsync_ClampsPageSizeAndReturnsLastPage()
+        {
+            DateTime since = new DateTime(2026, 3, 1, 0, 0, 0, DateTimeKind.Utc);
+            Post post = new Post { Id = Guid.NewGuid(), AuthorId = Guid.NewGuid(), CreatedAt = since.AddDays(1) };
+            Mock<IUnitOfWork> unitOfWorkMock = new Mock<IUnitOfWork>();
+            Mock<IPostRepository> postsMock = new Mock<IPostRepository>();
+            postsMock
+                .Setup(r => r.GetPublicCreatedSinceAsync(since, 0, FollowService.MaxExportPageSize + 1))
+                .ReturnsAsync(new List<Post> { post });
+            unitOfWorkMock.Setup(u => u.Posts).Returns(postsMock.Object);
+
+            IFollowService service = CreateService(unitOfWorkMock: unitOfWorkMock);
+            Result<PostRefPage> result = await service.GetRecentPostRefsAsync(since, -5, 1_000_000);
+
+            Assert.True(result.IsSuccess);
+            Assert.NotNull(result.Value);
+            Assert.False(result.Value.HasMore);
+            Assert.Equal(new PostRefDto(post.Id, post.AuthorId, post.CreatedAt), Assert.Single(result.Value.Posts));
+        }
     }
 }
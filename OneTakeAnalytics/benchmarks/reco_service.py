@@ -0,0 +1,470 @@
+"""
+Benchmark RecoServicer.GetRecommendations against local stand-ins for ClickHouse and Core.
+
+  python -m benchmarks.reco_service [--requests N] [--save before.json]
+  python -m benchmarks.reco_service --compare before.json [--tolerance 0.2]
+
+Core is a local HTTP server answering GET /api/posts/{id} and GET /api/posts?tag=...;
+ClickHouse is a fake Client, patched into the service modules, that answers the user
+history, trending and post features queries. Both wait a configurable latency per call and
+serve payloads of a configurable size from one synthetic catalog of posts, so the service
+runs its own code (HTTP, JSON, stages, scoring) with only the upstreams' work replaced.
+
+Each scenario replays a seeded mix of requests: a share repeats an earlier user's request
+(a cache hit), the rest come from new users (a miss). It reports p50/p99 latency overall
+and for hits and misses, upstream calls per request by query or endpoint, and the peak and
+retained Python memory of the run (tracemalloc). Service state (cache, post metadata, seen
+filter, LSH index, decayed trending) is fresh per scenario; *_indexed scenarios preload the
+LSH index and decayed trending like a service that has finished its first sync.
+
+--save writes the settings and results. --compare replays the settings stored in a saved
+file, prints the change and exits 1 if upstream calls per request grew, or p99 latency or
+peak memory grew by more than --tolerance.
+"""
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+import zlib
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from services.reco_service import (
+    personalize,
+    prefetch,
+    scoring,
+    server,
+    similar_by_tags,
+    trending,
+)
+from services.reco_service.cache import RecoCache
+from services.reco_service.config import CACHE_TTL_MINUTES, POST_META_MAX
+from services.reco_service.lsh import MinHashLSH
+from services.reco_service.metrics import metrics
+from services.reco_service.post_meta import PostMetaStore
+from services.reco_service.seen_filter import SeenFilter
+from services.reco_service.trending import DecayedTrending
+
+logger = logging.getLogger(__name__)
+
+HISTORY_EVENT_NAMES = ("post_view", "watch_complete", "post_like")
+HISTORY_EVENT_WEIGHTS = (6.0, 3.0, 1.0)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    hit_ratio: float  # share of requests repeating an earlier user's request
+    indexed: bool = False  # LSH index and decayed trending loaded
+
+
+SCENARIOS = {
+    s.name: s
+    for s in (
+        Scenario("cold", 0.0),
+        Scenario("mixed", 0.5),
+        Scenario("warm", 0.9),
+        Scenario("mixed_indexed", 0.5, indexed=True),
+    )
+}
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """Synthetic posts shared by both stand-ins: id -> tags and creation time."""
+
+    tags: dict[str, tuple[str, ...]]
+    by_tag: dict[str, list[str]]
+    created_at: dict[str, str]
+
+    @property
+    def posts(self) -> list[str]:
+        return list(self.tags)
+
+
+def build_catalog(n_posts: int, n_tags: int, tags_per_post: int, seed: int) -> Catalog:
+    rng = random.Random(seed)
+    vocabulary = [f"tag-{i}" for i in range(n_tags)]
+    now = datetime.now(UTC)
+    tags: dict[str, tuple[str, ...]] = {}
+    by_tag: dict[str, list[str]] = {t: [] for t in vocabulary}
+    created_at: dict[str, str] = {}
+    for i in range(n_posts):
+        pid = f"post-{i:06d}"
+        tags[pid] = tuple(rng.sample(vocabulary, min(tags_per_post, n_tags)))
+        for tag in tags[pid]:
+            by_tag[tag].append(pid)
+        created_at[pid] = (now - timedelta(hours=rng.uniform(0, 24 * 30))).isoformat()
+    return Catalog(tags=tags, by_tag=by_tag, created_at=created_at)
+
+
+class FakeClickHouse:
+    """Stand-in for clickhouse_driver.Client: Client(...) returns it, execute() answers.
+
+    Rows depend only on the query parameters (user id, post id), so runs are repeatable.
+    """
+
+    QUERIES = {
+        prefetch.USER_HISTORY_QUERY: "user_history",
+        trending.TRENDING_QUERY_TEMPLATE: "trending",
+        scoring.POST_FEATURES_QUERY: "post_features",
+    }
+
+    def __init__(self, catalog: Catalog, latency_ms: float, history_rows: int):
+        self.catalog = catalog
+        self.latency_sec = latency_ms / 1000
+        self.history_rows = history_rows
+        self.calls: Counter[str] = Counter()
+        self._posts = catalog.posts
+        self._lock = threading.Lock()
+
+    def __call__(self, **_: Any) -> "FakeClickHouse":
+        return self
+
+    def execute(self, query: str, params: dict[str, Any] | None = None) -> list[tuple]:
+        kind = self.QUERIES.get(query, "other")
+        with self._lock:
+            self.calls[f"clickhouse.{kind}"] += 1
+        time.sleep(self.latency_sec)
+        params = params or {}
+        if kind == "user_history":
+            return [row for uid in params["user_ids"] for row in self._history(uid)]
+        if kind == "trending":
+            return self.trending(params["max_rows"])
+        if kind == "post_features":
+            return [self._features(pid) for pid in params["post_ids"]]
+        return []
+
+    def _history(self, user_id: str) -> list[tuple]:
+        rng = random.Random(user_id)
+        return [
+            (
+                user_id,
+                rng.choice(self._posts),
+                rng.choices(HISTORY_EVENT_NAMES, HISTORY_EVENT_WEIGHTS)[0],
+                rng.random() < 0.8,
+            )
+            for _ in range(self.history_rows)
+        ]
+
+    def trending(self, n: int) -> list[tuple[str, float]]:
+        """The first n catalog posts, views decreasing."""
+        return [(pid, float(100_000 - i)) for i, pid in enumerate(self._posts[:n])]
+
+    def _features(self, post_id: str) -> tuple:
+        h = zlib.crc32(post_id.encode())
+        views = float(h % 5000)
+        return (
+            post_id,
+            views * 0.2,
+            views * 0.5,
+            views,
+            views * (h % 17) / 100,
+            views * (h % 41) / 100,
+            time.time() - (h % 720) * 3600,
+        )
+
+
+class FakeCore:
+    """Local HTTP server with the Core endpoints the reco service calls.
+
+    posts_per_tag caps a tag page; post_bytes pads every post object with a description, to
+    size responses like real ones.
+    """
+
+    def __init__(self, catalog: Catalog, latency_ms: float, posts_per_tag: int, post_bytes: int):
+        self.catalog = catalog
+        self.latency_sec = latency_ms / 1000
+        self.posts_per_tag = posts_per_tag
+        self.padding = "x" * post_bytes
+        self.calls: Counter[str] = Counter()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def post(self, post_id: str) -> dict[str, Any]:
+        return {
+            "id": post_id,
+            "tags": list(self.catalog.tags[post_id]),
+            "createdAt": self.catalog.created_at[post_id],
+            "description": self.padding,
+        }
+
+    def answer(self, path: str, args: dict[str, str]) -> tuple[str, dict[str, Any] | None]:
+        """(call kind, JSON body or None for 404) for a request path and query arguments."""
+        if path == "/api/posts":
+            size = min(int(args.get("pageSize", self.posts_per_tag)), self.posts_per_tag)
+            posts = self.catalog.by_tag.get(args.get("tag", ""), [])[:size]
+            return "core.posts_by_tag", {"posts": [self.post(pid) for pid in posts]}
+        post_id = path.removeprefix("/api/posts/")
+        if post_id != path and post_id in self.catalog.tags:
+            return "core.post", self.post(post_id)
+        return "core.not_found", None
+
+    def _handler(self) -> type[BaseHTTPRequestHandler]:
+        core = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                url = urlsplit(self.path)
+                args = {k: v[-1] for k, v in parse_qs(url.query).items()}
+                kind, body = core.answer(url.path, args)
+                with core._lock:
+                    core.calls[kind] += 1
+                time.sleep(core.latency_sec)
+                data = json.dumps(body or {"error": "not found"}).encode("utf-8")
+                self.send_response(200 if body is not None else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format: str, *args: object) -> None:
+                pass
+
+        return _Handler
+
+    def __enter__(self) -> "FakeCore":
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *_: object) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _no_live_counters(*_: Any, **__: Any) -> None:
+    return None
+
+
+@contextmanager
+def _patched(targets: list[tuple[object, str, object]]) -> Iterator[None]:
+    saved = [(module, name, getattr(module, name)) for module, name, _ in targets]
+    for module, name, value in targets:
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+
+
+def service_state(
+    scenario: Scenario, clickhouse: FakeClickHouse, core: FakeCore
+) -> list[tuple[object, str, object]]:
+    """Module attributes to point at the stand-ins and at fresh per-scenario state."""
+    meta = PostMetaStore(POST_META_MAX)
+    index = MinHashLSH()
+    decayed = DecayedTrending()
+    if scenario.indexed:
+        for pid, tags in core.catalog.tags.items():
+            index.insert(pid, tags)
+        index.ready = True
+        decayed.set_ranked(clickhouse.trending(len(core.catalog.tags)))
+    meta_readers = (personalize, similar_by_tags, scoring, server)
+    return [
+        *((module, "Client", clickhouse) for module in (prefetch, scoring, trending)),
+        (trending, "get_live_trending", _no_live_counters),
+        *((module, "CORE_API_URL", core.url) for module in (personalize, similar_by_tags)),
+        *((module, "post_meta", meta) for module in meta_readers),
+        *((module, "lsh_index", index) for module in (similar_by_tags, server)),
+        *((module, "decayed_trending", decayed) for module in (personalize, prefetch)),
+        (server, "_reco_cache", RecoCache(ttl_minutes=CACHE_TTL_MINUTES)),
+        (server, "seen_filter", SeenFilter()),
+    ]
+
+
+def workload(scenario: Scenario, n: int, seed: int) -> list[str]:
+    """User ids to request in order; repeats of an earlier user are expected cache hits."""
+    rng = random.Random(f"{seed}:{scenario.name}")
+    users: list[str] = []
+    out = []
+    for i in range(n):
+        if users and rng.random() < scenario.hit_ratio:
+            out.append(rng.choice(users))
+        else:
+            users.append(f"user-{i:06d}")
+            out.append(users[-1])
+    return out
+
+
+def _percentile(values: list[float], q: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method="inclusive")[q - 1]
+
+
+def _per_request(calls: Counter[str], n: int) -> dict[str, float]:
+    return {kind: count / n for kind, count in sorted(calls.items())} if n else {}
+
+
+def _cache_hits() -> float:
+    return metrics.get("reco_cache_lookups_total", result="hit")
+
+
+def run_scenario(
+    scenario: Scenario,
+    clickhouse: FakeClickHouse,
+    core: FakeCore,
+    n_requests: int,
+    limit: int,
+    seed: int,
+) -> dict[str, Any]:
+    servicer = server.RecoServicer()
+    latency: dict[str, list[float]] = {"hit": [], "miss": []}
+    calls: dict[str, Counter[str]] = {"hit": Counter(), "miss": Counter()}
+    with _patched(service_state(scenario, clickhouse, core)):
+        tracemalloc.start()
+        baseline_bytes = tracemalloc.get_traced_memory()[0]
+        for user_id in workload(scenario, n_requests, seed):
+            request = server.reco_pb2.GetRecommendationsRequest(user_id=user_id, limit=limit)
+            before = clickhouse.calls + core.calls
+            hits = _cache_hits()
+            started = time.perf_counter()
+            servicer.GetRecommendations(request, None)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            result = "hit" if _cache_hits() > hits else "miss"
+            latency[result].append(elapsed_ms)
+            calls[result].update((clickhouse.calls + core.calls) - before)
+        current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    every = latency["hit"] + latency["miss"]
+    return {
+        "requests": len(every),
+        "hits": len(latency["hit"]),
+        "misses": len(latency["miss"]),
+        "p50_ms": _percentile(every, 50),
+        "p99_ms": _percentile(every, 99),
+        "hit_p50_ms": _percentile(latency["hit"], 50),
+        "hit_p99_ms": _percentile(latency["hit"], 99),
+        "miss_p50_ms": _percentile(latency["miss"], 50),
+        "miss_p99_ms": _percentile(latency["miss"], 99),
+        "calls_per_request": _per_request(calls["hit"] + calls["miss"], len(every)),
+        "calls_per_hit": _per_request(calls["hit"], len(latency["hit"])),
+        "calls_per_miss": _per_request(calls["miss"], len(latency["miss"])),
+        "peak_kib": (peak_bytes - baseline_bytes) / 1024,
+        "retained_kib": (current_bytes - baseline_bytes) / 1024,
+    }
+
+
+def regressions(
+    results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]], tolerance: float
+) -> list[str]:
+    """Descriptions of what got worse than baseline; calls per request must not grow at all."""
+    found = []
+    for name, r in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for kind, n in r["calls_per_request"].items():
+            was = before["calls_per_request"].get(kind, 0.0)
+            if n > was + 1e-9:
+                found.append(f"{name}: {kind} per request {was:.2f} -> {n:.2f}")
+        for key in ("p99_ms", "peak_kib"):
+            if r[key] > before[key] * (1 + tolerance):
+                found.append(f"{name}: {key} {before[key]:.1f} -> {r[key]:.1f}")
+    return found
+
+
+def _calls_total(calls: dict[str, float], prefix: str) -> float:
+    return sum(n for kind, n in calls.items() if kind.startswith(prefix))
+
+
+def _print(results: dict[str, dict[str, Any]], baseline: dict[str, dict[str, Any]]) -> None:
+    for name, r in results.items():
+        per_request = r["calls_per_request"]
+        line = (
+            f"{name:14s} hits {r['hits']:4d}/{r['requests']:<4d}"
+            f" p50 {r['p50_ms']:7.1f}ms  p99 {r['p99_ms']:7.1f}ms"
+            f"  miss p50 {r['miss_p50_ms']:7.1f}ms  hit p50 {r['hit_p50_ms']:6.2f}ms"
+            f"  ch/req {_calls_total(per_request, 'clickhouse.'):5.2f}"
+            f"  core/req {_calls_total(per_request, 'core.'):5.2f}"
+            f"  peak {r['peak_kib']:8.0f}KiB"
+        )
+        before = baseline.get(name)
+        if before and before["p99_ms"] and before["peak_kib"]:
+            line += (
+                f"  (p99 x{r['p99_ms'] / before['p99_ms']:.2f},"
+                f" peak x{r['peak_kib'] / before['peak_kib']:.2f})"
+            )
+        print(line)
+        for kind, n in r["calls_per_miss"].items():
+            print(f"{'':14s}   {kind:28s} {n:6.2f} per miss")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the reco service with fake upstreams")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--clickhouse-latency-ms", type=float, default=5.0)
+    parser.add_argument("--core-latency-ms", type=float, default=5.0)
+    parser.add_argument("--history-rows", type=int, default=60, help="events per user history")
+    parser.add_argument("--posts", type=int, default=5000, help="posts in the catalog")
+    parser.add_argument("--tags", type=int, default=200, help="distinct tags in the catalog")
+    parser.add_argument("--tags-per-post", type=int, default=4)
+    parser.add_argument("--posts-per-tag", type=int, default=50, help="Core tag page size cap")
+    parser.add_argument("--post-bytes", type=int, default=512, help="padding per Core post")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", type=Path, help="write settings and results here")
+    parser.add_argument("--compare", type=Path, help="results written by --save")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    settings = {
+        k: v for k, v in vars(args).items() if k not in ("save", "compare", "tolerance")
+    }
+    baseline: dict[str, Any] = {"settings": {}, "results": {}}
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())
+        settings = baseline["settings"]
+    scenarios = [SCENARIOS[name] for name in settings["scenario"] or SCENARIOS]
+
+    catalog = build_catalog(
+        settings["posts"], settings["tags"], settings["tags_per_post"], settings["seed"]
+    )
+    clickhouse = FakeClickHouse(
+        catalog, settings["clickhouse_latency_ms"], settings["history_rows"]
+    )
+    results = {}
+    with FakeCore(
+        catalog, settings["core_latency_ms"], settings["posts_per_tag"], settings["post_bytes"]
+    ) as core:
+        for scenario in scenarios:
+            results[scenario.name] = run_scenario(
+                scenario,
+                clickhouse,
+                core,
+                settings["requests"],
+                settings["limit"],
+                settings["seed"],
+            )
+    _print(results, baseline["results"])
+    if args.save:
+        args.save.write_text(json.dumps({"settings": settings, "results": results}, indent=2))
+    if args.compare:
+        found = regressions(results, baseline["results"], args.tolerance)
+        for description in found:
+            logger.error("Regression: %s", description)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+"""
+Backfill and verify the materialized-view aggregates of 05_aggregate_views.sql.
+
+  python -m jobs.aggregates.backfill_aggregate_views backfill [--days N] [--table NAME ...]
+  python -m jobs.aggregates.backfill_aggregate_views verify [--days N] [--table NAME ...]
+
+backfill writes aggregation states for events ingested before the table's cutoff, the time
+recorded in aggregate_watermarks (as "<table>_mv") when its materialized view was created:
+the view counts everything after it. --cutoff overrides it, e.g. for views created before
+the cutoff was recorded. One day per INSERT, newest day first. Each finished day is recorded
+in aggregate_backfill_progress and skipped by a re-run. The states and the progress row are
+written by two statements, so a run that dies between them writes that day again. Harmless
+for daily_active_users and the funnel, whose states merge idempotently, but
+post_daily_metrics sums and counts the day twice: after an interrupted backfill run verify.
+To repair a day it reports, delete the day from post_daily_metrics_agg (mutations_sync = 2)
+and from aggregate_backfill_progress, then backfill --table post_daily_metrics --cutoff
+<time of the delete>. verify compares per-day totals of the *_live views with the tables
+refresh_aggregates fills and exits 1 on a mismatch; refresh the legacy tables first, and
+note that today is skipped (the job lags).
+"""
+import argparse
+import logging
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+
+from clickhouse_driver import Client
+
+from .refresh_aggregates import DAYS_BACK, FUNNEL_PARAMS, get_client
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class AggregateView:
+    keys: tuple[str, ...]  # verification grain (legacy and live columns)
+    totals: tuple[str, ...]  # columns summed per key by verify
+    backfill_select: str  # states for events of %(day)s ingested before %(cutoff)s
+
+
+VIEWS = {
+    "daily_active_users": AggregateView(
+        keys=("date",),
+        totals=("dau",),
+        backfill_select="""
+            SELECT toDate(ts) AS date, uniqExactState(assumeNotNull(user_id)) AS users
+            FROM default.events
+            WHERE toDate(ts) = %(day)s AND ingested_at < %(cutoff)s
+              AND user_id IS NOT NULL
+            GROUP BY date
+        """,
+    ),
+    "post_daily_metrics": AggregateView(
+        keys=("date",),
+        totals=("views", "likes", "completion"),
+        backfill_select="""
+            SELECT
+                toDate(ts) AS date,
+                assumeNotNull(entity_id) AS post_id,
+                countIf(event_name = 'post_view') AS views,
+                countIf(event_name = 'post_like') AS likes,
+                countIf(event_name = 'watch_complete') AS completion
+            FROM default.events
+            WHERE toDate(ts) = %(day)s AND ingested_at < %(cutoff)s
+              AND entity_type = 'post' AND entity_id IS NOT NULL
+            GROUP BY date, post_id
+        """,
+    ),
+    "funnel_record_to_publish": AggregateView(
+        keys=("date", "step_name"),
+        totals=("unique_sessions", "unique_users"),
+        backfill_select="""
+            SELECT
+                toDate(ts) AS date,
+                session_id,
+                windowFunnelState(%(window_sec)s)(
+                    toDateTime(ts),
+                    event_name = %(step_1)s,
+                    event_name = %(step_2)s,
+                    event_name = %(step_3)s,
+                    event_name = %(step_4)s
+                ) AS level,
+                anyState(user_id) AS user_id
+            FROM default.events
+            WHERE toDate(ts) = %(day)s AND ingested_at < %(cutoff)s
+              AND event_name IN %(steps)s AND session_id != ''
+            GROUP BY date, session_id
+        """,
+    ),
+}
+
+
+def view_cutoff(client: Client, table: str) -> datetime:
+    """Cutoff recorded when the table's materialized view was created."""
+    rows = client.execute(
+        "SELECT watermark FROM default.aggregate_watermarks FINAL WHERE table_name = %(name)s",
+        {"name": f"{table}_mv"},
+    )
+    if not rows:
+        raise RuntimeError(
+            f"no cutoff recorded for {table}_mv; create the view with its cutoff row"
+            " (05_aggregate_views.sql) or pass --cutoff"
+        )
+    return rows[0][0]
+
+
+def backfilled_days(client: Client, table: str) -> set[date]:
+    rows = client.execute(
+        "SELECT date FROM default.aggregate_backfill_progress FINAL"
+        " WHERE table_name = %(table)s",
+        {"table": table},
+    )
+    return {r[0] for r in rows}
+
+
+def backfill_table(client: Client, table: str, days: int, cutoff: datetime | None = None) -> int:
+    """Backfill the last days (and today) of one table; returns the number of days written."""
+    view = VIEWS[table]
+    cutoff = cutoff or view_cutoff(client, table)
+    today = client.execute("SELECT today()")[0][0]
+    done = backfilled_days(client, table)
+    todo = [today - timedelta(days=i) for i in range(days + 1)]
+    todo = [day for day in todo if day not in done]
+    for n, day in enumerate(todo, 1):
+        client.execute(
+            f"INSERT INTO default.{table}_agg {view.backfill_select}",
+            {"day": day, "cutoff": cutoff, **FUNNEL_PARAMS},
+        )
+        client.execute(
+            "INSERT INTO default.aggregate_backfill_progress (table_name, date, cutoff) VALUES",
+            [(table, day, cutoff)],
+        )
+        logger.info("%s: backfilled %s (%s/%s)", table, day, n, len(todo))
+    return len(todo)
+
+
+def _totals(client: Client, source: str, view: AggregateView, days: int) -> dict[tuple, tuple]:
+    keys = ", ".join(view.keys)
+    sums = ", ".join(f"sum({c})" for c in view.totals)
+    rows = client.execute(
+        f"""
+        SELECT {keys}, {sums}
+        FROM {source}
+        WHERE date >= today() - %(days)s AND date < today()
+        GROUP BY {keys}
+        """,
+        {"days": days},
+    )
+    n = len(view.keys)
+    return {tuple(r[:n]): tuple(int(v) for v in r[n:]) for r in rows}
+
+
+def verify_table(client: Client, table: str, days: int) -> list[tuple[tuple, tuple, tuple]]:
+    """(key, legacy totals, live totals) for every key where the two disagree."""
+    view = VIEWS[table]
+    legacy = _totals(client, f"default.{table} FINAL", view, days)
+    live = _totals(client, f"default.{table}_live", view, days)
+    zero = (0,) * len(view.totals)
+    return [
+        (key, legacy.get(key, zero), live.get(key, zero))
+        for key in sorted(legacy.keys() | live.keys())
+        if legacy.get(key, zero) != live.get(key, zero)
+    ]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Backfill or verify materialized-view aggregates")
+    parser.add_argument("command", choices=("backfill", "verify"))
+    parser.add_argument("--days", type=int, default=DAYS_BACK, help="days back")
+    parser.add_argument("--table", action="append", choices=sorted(VIEWS), help="only these tables")
+    parser.add_argument(
+        "--cutoff",
+        type=datetime.fromisoformat,
+        help="backfill events ingested before this time instead of the recorded cutoff",
+    )
+    args = parser.parse_args(argv)
+    tables = args.table or list(VIEWS)
+    try:
+        client = get_client()
+        if args.command == "backfill":
+            for table in tables:
+                written = backfill_table(client, table, args.days, args.cutoff)
+                logger.info("%s: %s day(s) backfilled", table, written)
+            return 0
+        failed = False
+        for table in tables:
+            mismatches = verify_table(client, table, args.days)
+            for key, legacy, live in mismatches:
+                logger.warning("%s %s: legacy %s != live %s", table, key, legacy, live)
+            logger.info("%s: %s mismatching key(s)", table, len(mismatches))
+            failed = failed or bool(mismatches)
+        return 1 if failed else 0
+    except Exception as e:
+        logger.exception("backfill_aggregate_views %s failed: %s", args.command, e)
+        if args.command == "backfill":
+            logger.error("The last day started may be counted twice; run verify")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
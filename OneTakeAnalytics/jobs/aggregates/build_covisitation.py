@@ -0,0 +1,113 @@
+"""
+Periodic job: top-K co-viewed / co-liked neighbours per post from default.events.
+Writes a memory-mapped model file that the reco service serves "viewers also watched" from.
+Run e.g. hourly: python -m jobs.aggregates.build_covisitation
+"""
+import logging
+import os
+import sys
+from pathlib import Path
+
+from clickhouse_driver import Client
+
+from services.reco_service.topk_store import write_topk_file
+
+from .refresh_aggregates import get_client
+
+logger = logging.getLogger(__name__)
+
+_root = Path(__file__).resolve().parent.parent.parent
+COVISIT_PATH = os.environ.get("RECO_COVISIT_PATH", str(_root / "data" / "covisit.bin"))
+COVISIT_DAYS = int(os.environ.get("COVISIT_DAYS_BACK", "30"))
+COVISIT_TOP_K = int(os.environ.get("COVISIT_TOP_K", "50"))
+# A pair co-liked by one user counts this many co-views in the same session.
+COVISIT_LIKE_WEIGHT = float(os.environ.get("COVISIT_LIKE_WEIGHT", "3.0"))
+# Long sessions add quadratic pairs and little signal; keep the first N distinct posts.
+COVISIT_MAX_SESSION_POSTS = int(os.environ.get("COVISIT_MAX_SESSION_POSTS", "50"))
+
+COVISIT_QUERY = """
+SELECT
+    toString(a) AS post_id,
+    toString(b) AS neighbour_id,
+    sum(w) AS weight
+FROM
+(
+    SELECT groupUniqArray(%(max_posts)s)(entity_id) AS posts, toFloat64(1) AS w
+    FROM default.events
+    WHERE event_name IN ('post_view', 'watch_complete')
+      AND entity_type = 'post'
+      AND entity_id IS NOT NULL
+      AND session_id != ''
+      AND ts >= now() - INTERVAL %(days)s DAY
+    GROUP BY session_id
+    HAVING length(posts) > 1
+
+    UNION ALL
+
+    SELECT groupUniqArray(%(max_posts)s)(entity_id) AS posts, toFloat64(%(like_weight)s) AS w
+    FROM default.events
+    WHERE event_name = 'post_like'
+      AND entity_type = 'post'
+      AND entity_id IS NOT NULL
+      AND user_id IS NOT NULL
+      AND ts >= now() - INTERVAL %(days)s DAY
+    GROUP BY user_id
+    HAVING length(posts) > 1
+)
+ARRAY JOIN posts AS a
+ARRAY JOIN posts AS b
+WHERE a != b
+GROUP BY a, b
+ORDER BY a, weight DESC
+LIMIT %(top_k)s BY a
+"""
+
+
+def build_neighbours(
+    rows: list[tuple[str, str, float]],
+) -> tuple[list[str], list[list[tuple[int, float]]]]:
+    """Turn (post, neighbour, weight) rows, best first per post, into topk_store keys/rows."""
+    index: dict[str, int] = {}
+    keys: list[str] = []
+    neighbours: list[list[tuple[int, float]]] = []
+
+    def _idx(post_id: str) -> int:
+        if post_id not in index:
+            index[post_id] = len(keys)
+            keys.append(post_id)
+            neighbours.append([])
+        return index[post_id]
+
+    for post_id, neighbour_id, weight in rows:
+        row = _idx(str(post_id))
+        neighbours[row].append((_idx(str(neighbour_id)), float(weight)))
+    return keys, neighbours
+
+
+def build_covisitation(client: Client, path: str = COVISIT_PATH) -> int:
+    rows = client.execute(
+        COVISIT_QUERY,
+        {
+            "days": COVISIT_DAYS,
+            "top_k": COVISIT_TOP_K,
+            "like_weight": COVISIT_LIKE_WEIGHT,
+            "max_posts": COVISIT_MAX_SESSION_POSTS,
+        },
+    )
+    keys, neighbours = build_neighbours(rows)
+    write_topk_file(path, keys, neighbours, COVISIT_TOP_K)
+    logger.info("Wrote co-visitation model for %s posts to %s", len(keys), path)
+    return len(keys)
+
+
+def main() -> int:
+    try:
+        build_covisitation(get_client())
+        return 0
+    except Exception as e:
+        logger.exception("build_covisitation failed: %s", e)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Periodic job: weighted, time-decayed tag-affinity profile per user from default.events.
+Each view / completion / like adds its event weight, halved every AFFINITY_HALF_LIFE_DAYS,
+to every tag of the post. Writes a memory-mapped user -> top tags file for the reco service.
+Run e.g. hourly: python -m jobs.aggregates.build_tag_affinity
+"""
+import logging
+import os
+import sys
+from collections import defaultdict
+from concurrent import futures
+from pathlib import Path
+
+import requests
+from clickhouse_driver import Client
+
+from services.reco_service.topk_store import write_topk_file
+
+from .refresh_aggregates import get_client
+
+logger = logging.getLogger(__name__)
+
+_root = Path(__file__).resolve().parent.parent.parent
+AFFINITY_PATH = os.environ.get("RECO_AFFINITY_PATH", str(_root / "data" / "tag_affinity.bin"))
+CORE_API_URL = os.environ.get("CORE_API_URL", "http://localhost:5000")
+AFFINITY_DAYS = int(os.environ.get("AFFINITY_DAYS_BACK", "60"))
+AFFINITY_HALF_LIFE_DAYS = float(os.environ.get("AFFINITY_HALF_LIFE_DAYS", "14"))
+AFFINITY_TOP_TAGS = int(os.environ.get("AFFINITY_TOP_TAGS", "20"))
+AFFINITY_FETCH_WORKERS = int(os.environ.get("AFFINITY_FETCH_WORKERS", "8"))
+POST_TAGS_TIMEOUT_SEC = 5
+
+EVENT_WEIGHTS = {"post_view": 1.0, "watch_complete": 2.0, "post_like": 3.0}
+
+USER_POST_WEIGHTS_QUERY = """
+SELECT
+    toString(user_id) AS uid,
+    toString(entity_id) AS post_id,
+    sum(
+        multiIf(
+            event_name = 'post_like', %(w_like)s,
+            event_name = 'watch_complete', %(w_complete)s,
+            %(w_view)s
+        ) * exp2(-dateDiff('second', ts, now()) / %(half_life_sec)s)
+    ) AS weight
+FROM default.events
+WHERE event_name IN ('post_view', 'watch_complete', 'post_like')
+  AND entity_type = 'post'
+  AND entity_id IS NOT NULL
+  AND user_id IS NOT NULL
+  AND ts >= now() - INTERVAL %(days)s DAY
+GROUP BY user_id, entity_id
+"""
+
+
+def fetch_post_tags(post_id: str) -> list[str]:
+    try:
+        resp = requests.get(
+            f"{CORE_API_URL.rstrip('/')}/api/posts/{post_id}", timeout=POST_TAGS_TIMEOUT_SEC
+        )
+        resp.raise_for_status()
+        tags = resp.json().get("tags")
+        return [str(t) for t in tags] if isinstance(tags, list) else []
+    except Exception as e:
+        logger.warning("fetch_post_tags post_id=%s failed: %s", post_id, e)
+        return []
+
+
+def fetch_tags_for_posts(post_ids: set[str]) -> dict[str, list[str]]:
+    """Tags of every distinct post, fetched once each (posts are shared by many users)."""
+    with futures.ThreadPoolExecutor(max_workers=AFFINITY_FETCH_WORKERS) as pool:
+        ids = sorted(post_ids)
+        return dict(zip(ids, pool.map(fetch_post_tags, ids), strict=True))
+
+
+def build_profiles(
+    rows: list[tuple[str, str, float]],
+    post_tags: dict[str, list[str]],
+    top_tags: int = AFFINITY_TOP_TAGS,
+) -> tuple[list[str], list[list[tuple[int, float]]], list[str]]:
+    """Turn (user, post, weight) rows into topk_store keys/rows over a tag vocabulary.
+
+    Weights are normalised so each user's strongest tag is 1.0.
+    """
+    vocab_index: dict[str, int] = {}
+    vocab: list[str] = []
+    per_user: dict[str, dict[int, float]] = defaultdict(lambda: defaultdict(float))
+    for uid, post_id, weight in rows:
+        for tag in post_tags.get(str(post_id), ()):
+            if tag not in vocab_index:
+                vocab_index[tag] = len(vocab)
+                vocab.append(tag)
+            per_user[str(uid)][vocab_index[tag]] += float(weight)
+
+    keys: list[str] = []
+    profiles: list[list[tuple[int, float]]] = []
+    for uid, weights in per_user.items():
+        best = sorted(weights.items(), key=lambda kv: (-kv[1], kv[0]))[:top_tags]
+        top = best[0][1]
+        if top <= 0:
+            continue
+        keys.append(uid)
+        profiles.append([(tag_id, w / top) for tag_id, w in best])
+    return keys, profiles, vocab
+
+
+def build_tag_affinity(client: Client, path: str = AFFINITY_PATH) -> int:
+    rows = client.execute(
+        USER_POST_WEIGHTS_QUERY,
+        {
+            "days": AFFINITY_DAYS,
+            "half_life_sec": AFFINITY_HALF_LIFE_DAYS * 86400,
+            "w_view": EVENT_WEIGHTS["post_view"],
+            "w_complete": EVENT_WEIGHTS["watch_complete"],
+            "w_like": EVENT_WEIGHTS["post_like"],
+        },
+    )
+    post_tags = fetch_tags_for_posts({str(r[1]) for r in rows})
+    keys, profiles, vocab = build_profiles(rows, post_tags)
+    write_topk_file(path, keys, profiles, AFFINITY_TOP_TAGS, vocab=vocab)
+    logger.info(
+        "Wrote tag-affinity profiles for %s users (%s tags) to %s", len(keys), len(vocab), path
+    )
+    return len(keys)
+
+
+def main() -> int:
+    try:
+        build_tag_affinity(get_client())
+        return 0
+    except Exception as e:
+        logger.exception("build_tag_affinity failed: %s", e)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
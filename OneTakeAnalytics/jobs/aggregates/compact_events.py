@@ -0,0 +1,180 @@
+"""
+Raw events lifecycle: roll up old months of default.events, then drop or recompress them.
+Run e.g. daily: python -m jobs.aggregates.compact_events [--dry-run]
+
+A month partition is compacted once all of it is older than EVENTS_RAW_RETENTION_DAYS:
+
+  1. its events are summarised into events_hourly (events per hour, name and entity) and
+     events_daily_users (distinct users per day), see
+     contracts/clickhouse/migrations/0003_events_rollups.sql;
+  2. the rollup is checked against the raw row count and recorded in
+     events_rollup_progress with the ingested_at it covers;
+  3. EVENTS_EXPIRY_MODE=drop (default) drops the raw partition; recompress keeps it and
+     rewrites it with ZSTD(9) through a RECOMPRESS TTL.
+
+The first rollup of a month replaces that month's rollup partitions, so a run interrupted
+before step 2 can simply be repeated. Late events that land in a compacted month later are
+rolled up on top (ingested_at after the recorded one) on the next run. refresh_aggregates
+reads the rollups for dropped months (raw_horizon); every other reader of raw events only
+looks back a bounded window, see MIN_RAW_RETENTION_DAYS.
+"""
+import argparse
+import logging
+import os
+import sys
+from datetime import date, datetime
+
+from clickhouse_driver import Client
+
+from .refresh_aggregates import DAYS_BACK, get_client
+
+logger = logging.getLogger(__name__)
+
+RAW_RETENTION_DAYS = int(os.environ.get("EVENTS_RAW_RETENTION_DAYS", "180"))
+EXPIRY_MODE = os.environ.get("EVENTS_EXPIRY_MODE", "drop").strip().lower()
+if EXPIRY_MODE not in ("drop", "recompress"):
+    raise ValueError(f"EVENTS_EXPIRY_MODE must be drop or recompress, not {EXPIRY_MODE!r}")
+# Raw events are read back up to 30 days by reco (prefetch, seen filter, FOLLOWING increments)
+# and build_covisitation, 60 days by build_tag_affinity, and AGGREGATE_DAYS_BACK days by
+# refresh_aggregates, backfill_aggregate_views and validate_distinct. Compacting within
+# those windows would starve them.
+MIN_RAW_RETENTION_DAYS = max(65, DAYS_BACK)
+
+RECOMPRESS_TTL = "toDateTime(ts) + toIntervalDay({days}) RECOMPRESS CODEC(ZSTD(9))"
+_EPOCH = datetime(1970, 1, 1)
+
+ROLLUP_STATEMENTS = (
+    """
+    INSERT INTO default.events_hourly (hour, event_name, entity_type, entity_id, events)
+    SELECT
+        toStartOfHour(ts) AS hour,
+        event_name,
+        ifNull(entity_type, '') AS etype,
+        ifNull(entity_id, toUUID('00000000-0000-0000-0000-000000000000')) AS eid,
+        count() AS events
+    FROM default.events
+    WHERE {where}
+    GROUP BY hour, event_name, etype, eid
+    """,
+    """
+    INSERT INTO default.events_daily_users (date, users)
+    SELECT toDate(ts) AS date, uniqExactState(assumeNotNull(user_id)) AS users
+    FROM default.events
+    WHERE {where} AND user_id IS NOT NULL
+    GROUP BY date
+    """,
+)
+ROLLUP_PARTITIONED_TABLES = ("events_hourly", "events_daily_users")
+
+
+def _month_end(partition: int) -> date:
+    """First day after the month of a toYYYYMM partition."""
+    year, month = divmod(partition, 100)
+    return date(year + month // 12, month % 12 + 1, 1)
+
+
+def expired_partitions(client: Client, retention_days: int) -> list[tuple[int, int]]:
+    """(partition, rows) of events months lying entirely before today - retention_days."""
+    cutoff = client.execute("SELECT today() - %(days)s", {"days": retention_days})[0][0]
+    rows = client.execute(
+        """
+        SELECT toUInt32(partition) AS p, sum(rows)
+        FROM system.parts
+        WHERE database = 'default' AND table = 'events' AND active
+        GROUP BY p
+        ORDER BY p
+        """
+    )
+    return [(int(p), int(n)) for p, n in rows if _month_end(int(p)) <= cutoff]
+
+
+def rolled_until(client: Client, partition: int) -> datetime | None:
+    rows = client.execute(
+        "SELECT rolled_until FROM default.events_rollup_progress FINAL"
+        " WHERE partition = %(p)s",
+        {"p": partition},
+    )
+    return rows[0][0] if rows else None
+
+
+def compact_partition(client: Client, partition: int, mode: str, dry_run: bool = False) -> int:
+    """Roll up one month and expire its raw events; returns the raw rows rolled up."""
+    since = rolled_until(client, partition)
+    until, rows = client.execute(
+        "SELECT max(ingested_at), count() FROM default.events"
+        " WHERE toYYYYMM(ts) = %(p)s AND ingested_at > %(since)s",
+        {"p": partition, "since": since or _EPOCH},
+    )[0]
+    if since is not None and not rows and mode == "recompress":
+        return 0  # compacted before, nothing new
+    if dry_run:
+        logger.info("%s: would roll up %s row(s) and %s", partition, rows, mode)
+        return rows
+    if rows:
+        where = "toYYYYMM(ts) = %(p)s AND ingested_at > %(since)s AND ingested_at <= %(until)s"
+        params = {"p": partition, "since": since or _EPOCH, "until": until}
+        if since is None:
+            for table in ROLLUP_PARTITIONED_TABLES:
+                client.execute(f"ALTER TABLE default.{table} DROP PARTITION {partition}")
+        for statement in ROLLUP_STATEMENTS:
+            client.execute(statement.format(where=where), params)
+        if since is None:
+            rolled = client.execute(
+                "SELECT sum(events) FROM default.events_hourly WHERE toYYYYMM(hour) = %(p)s",
+                {"p": partition},
+            )[0][0]
+            if rolled != rows:
+                raise RuntimeError(f"{partition}: rolled up {rolled} events, raw has {rows}")
+        client.execute(
+            "INSERT INTO default.events_rollup_progress"
+            " (partition, rolled_until, rows, dropped) VALUES",
+            [(partition, until, rows, int(mode == "drop"))],
+        )
+    if mode == "drop":
+        client.execute(f"ALTER TABLE default.events DROP PARTITION {partition}")
+    else:
+        client.execute(f"OPTIMIZE TABLE default.events PARTITION {partition} FINAL")
+    action = "dropped" if mode == "drop" else "recompressed"
+    logger.info("%s: rolled up %s row(s), raw partition %s", partition, rows, action)
+    return rows
+
+
+def ensure_recompress_ttl(client: Client, retention_days: int) -> None:
+    """Set the RECOMPRESS TTL on events unless it is already there (MODIFY TTL rewrites)."""
+    ttl = RECOMPRESS_TTL.format(days=retention_days)
+    engine = client.execute(
+        "SELECT engine_full FROM system.tables WHERE database = 'default' AND name = 'events'"
+    )[0][0]
+    if ttl not in engine:
+        client.execute(f"ALTER TABLE default.events MODIFY TTL {ttl}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Roll up and expire old events partitions")
+    parser.add_argument("--retention-days", type=int, default=RAW_RETENTION_DAYS)
+    parser.add_argument("--mode", choices=("drop", "recompress"), default=EXPIRY_MODE)
+    parser.add_argument("--dry-run", action="store_true", help="only report what would happen")
+    args = parser.parse_args(argv)
+    if args.retention_days < MIN_RAW_RETENTION_DAYS:
+        logger.error(
+            "Retention of %s days is below the %s days raw readers need",
+            args.retention_days,
+            MIN_RAW_RETENTION_DAYS,
+        )
+        return 1
+    try:
+        client = get_client()
+        if args.mode == "recompress" and not args.dry_run:
+            ensure_recompress_ttl(client, args.retention_days)
+        partitions = expired_partitions(client, args.retention_days)
+        for partition, _ in partitions:
+            compact_partition(client, partition, args.mode, args.dry_run)
+        logger.info("%s partition(s) past %s days", len(partitions), args.retention_days)
+        return 0
+    except Exception as e:
+        logger.exception("compact_events failed: %s", e)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,34 @@
 """
 Periodic job to refresh ClickHouse aggregate tables from events.
-Run e.g. daily: python -m jobs.aggregates.refresh_aggregates
+Run e.g. hourly: python -m jobs.aggregates.refresh_aggregates [--full] [--table NAME ...]
+
+Incremental by default: each table keeps a watermark (events.ingested_at it was refreshed
+up to, in default.aggregate_watermarks) and a run recomputes only the days that received
+events since then, late events included. Whole days are recomputed, so ReplacingMergeTree
+keeps exactly one current row per key. --full (or a table without a watermark yet)
+recomputes the last AGGREGATE_DAYS_BACK days.
+
+Months of events compacted by jobs.aggregates.compact_events are no longer read from
+events (before the raw horizon, only late stragglers would be left there):
+post_daily_metrics and daily_active_users take those days from the rollups, the other
+tables keep the rows computed while the events still existed.
+
+Distinct counts (DAU, funnel sessions/users) are exact by default. With
+AGGREGATE_DISTINCT_MODE=approx they come from daily uniqCombined64 states kept in the
+*_state tables of 06_distinct_states.sql: fixed memory per day, and the weekly/monthly
+views merge them without rescanning events (validate with jobs.aggregates.validate_distinct).
 """
+import argparse
 import logging
 import os
 import sys
+import time
+from collections.abc import Callable
+from concurrent import futures
+from dataclasses import dataclass
+from datetime import date, datetime
 from pathlib import Path
+from typing import Any
 
 from dotenv import load_dotenv
 from clickhouse_driver import Client
@@ -22,6 +45,14 @@ CLICKHOUSE_PORT = int(os.environ.get("CLICKHOUSE_PORT", "9000"))
 CLICKHOUSE_USER = os.environ.get("CLICKHOUSE_USER", "default")
 CLICKHOUSE_PASSWORD = os.environ.get("CLICKHOUSE_PASSWORD", "default")
 DAYS_BACK = int(os.environ.get("AGGREGATE_DAYS_BACK", "90"))
+# Events ingested in the last seconds may still be in flight; leave them to the next run.
+WATERMARK_LAG_SEC = int(os.environ.get("AGGREGATE_WATERMARK_LAG_SEC", "60"))
+# Tables refreshed at once, each on its own connection.
+PARALLELISM = int(os.environ.get("AGGREGATE_PARALLELISM", "3"))
+# "exact" (uniqExact) or "approx" (uniqCombined64 states, see 06_distinct_states.sql).
+DISTINCT_MODE = os.environ.get("AGGREGATE_DISTINCT_MODE", "exact").strip().lower()
+if DISTINCT_MODE not in ("exact", "approx"):
+    raise ValueError(f"AGGREGATE_DISTINCT_MODE must be exact or approx, not {DISTINCT_MODE!r}")
 
 
 def get_client() -> Client:
@@ -33,29 +64,165 @@ def get_client() -> Client:
     )
 
 
-def refresh_daily_active_users(client: Client) -> None:
-    """Populate daily_active_users from events (distinct user_id per day)."""
-    client.execute(
+class MeteredClient:
+    """Wraps a Client and adds up the rows/bytes its queries read (from query progress)."""
+
+    def __init__(self, client: Client):
+        self._client = client
+        self.rows_read = 0
+        self.bytes_read = 0
+
+    def execute(self, query: str, params: Any = None) -> Any:
+        result = self._client.execute(query, params)
+        progress = getattr(getattr(self._client, "last_query", None), "progress", None)
+        if progress is not None:
+            self.rows_read += progress.rows
+            self.bytes_read += progress.bytes
+        return result
+
+
+@dataclass
+class TableReport:
+    table: str
+    days: int | None  # days recomputed; None for a full refresh
+    seconds: float
+    rows_read: int
+    bytes_read: int
+
+
+def _window(
+    dates: list[date] | None, column: str = "toDate(ts)", horizon: date | None = None
+) -> tuple[str, dict]:
+    """WHERE clause on a day column: the given days, or the last DAYS_BACK whole days.
+
+    With a horizon (first day still in raw events), only days from the horizon on.
+    """
+    params: dict[str, Any]
+    if dates is None:
+        where, params = f"{column} >= today() - %(days)s", {"days": DAYS_BACK}
+    else:
+        where, params = f"{column} IN %(dates)s", {"dates": tuple(dates)}
+    if horizon is not None:
+        where, params = f"{where} AND {column} >= %(horizon)s", {**params, "horizon": horizon}
+    return where, params
+
+
+def _rollup_window(
+    dates: list[date] | None, column: str, horizon: date | None
+) -> tuple[str, dict] | None:
+    """WHERE clause for the days of the window before the horizon (None: no such days)."""
+    if horizon is None:
+        return None
+    if dates is not None and all(d >= horizon for d in dates):
+        return None
+    where, params = _window(dates, column)
+    return f"{where} AND {column} < %(horizon)s", {**params, "horizon": horizon}
+
+
+def raw_horizon(client: Client) -> date | None:
+    """First day after the newest events partition dropped by compact_events, if any."""
+    rows = client.execute(
+        "SELECT partition FROM default.events_rollup_progress FINAL"
+        " WHERE dropped ORDER BY partition DESC LIMIT 1"
+    )
+    if not rows:
+        return None
+    year, month = divmod(int(rows[0][0]), 100)
+    return date(year + month // 12, month % 12 + 1, 1)
+
+
+def refresh_daily_active_users(
+    client: Client, dates: list[date] | None = None, horizon: date | None = None
+) -> None:
+    """Populate daily_active_users from events (distinct user_id per day).
+
+    Days before the horizon come from events_daily_users (exact) or, in approx mode, from
+    the daily states, which are kept when events are compacted.
+    """
+    window, params = _window(dates, horizon=horizon)
+    if DISTINCT_MODE == "approx":
+        client.execute(
+            f"""
+            INSERT INTO default.daily_active_users_state (date, users)
+            SELECT toDate(ts) AS date, uniqCombined64State(assumeNotNull(user_id)) AS users
+            FROM default.events
+            WHERE {window}
+              AND user_id IS NOT NULL
+            GROUP BY date
+            """,
+            params,
+        )
+        state_window, state_params = _window(dates, "date")
+        client.execute(
+            f"""
+            INSERT INTO default.daily_active_users (date, dau, version)
+            SELECT date, uniqCombined64Merge(users) AS dau, now() AS version
+            FROM default.daily_active_users_state
+            WHERE {state_window}
+            GROUP BY date
+            """,
+            state_params,
+        )
+        logger.info("Refreshed daily_active_users (approx)")
+        return
+    rollup = _rollup_window(dates, "date", horizon)
+    union = ""
+    if rollup is not None:
+        union = f"""
+        UNION ALL
+        SELECT date, uniqExactMerge(users) AS dau, now() AS version
+        FROM default.events_daily_users
+        WHERE {rollup[0]}
+        GROUP BY date
         """
+        params = {**params, **rollup[1]}
+    client.execute(
+        f"""
         INSERT INTO default.daily_active_users (date, dau, version)
         SELECT
             toDate(ts) AS date,
             uniqExact(user_id) AS dau,
             now() AS version
         FROM default.events
-        WHERE ts >= now() - INTERVAL %(days)s DAY
+        WHERE {window}
           AND user_id IS NOT NULL
         GROUP BY date
+        {union}
         """,
-        {"days": DAYS_BACK},
+        params,
     )
     logger.info("Refreshed daily_active_users")
 
 
-def refresh_post_daily_metrics(client: Client) -> None:
-    """Populate post_daily_metrics: views, likes, completion per post per day."""
-    client.execute(
+def refresh_post_daily_metrics(
+    client: Client, dates: list[date] | None = None, horizon: date | None = None
+) -> None:
+    """Populate post_daily_metrics: views, likes, completion per post per day.
+
+    Days before the horizon are summed from the events_hourly rollup.
+    """
+    window, params = _window(dates, horizon=horizon)
+    rollup = _rollup_window(dates, "toDate(hour)", horizon)
+    union = ""
+    if rollup is not None:
+        union = f"""
+        UNION ALL
+        SELECT
+            toDate(hour) AS date,
+            entity_id AS post_id,
+            sumIf(events, event_name = 'post_view') AS views,
+            sumIf(events, event_name = 'post_like') AS likes,
+            sumIf(events, event_name = 'watch_complete') AS completion,
+            now() AS version
+        FROM default.events_hourly
+        WHERE {rollup[0]}
+          AND entity_type = 'post'
+          AND entity_id != toUUID('00000000-0000-0000-0000-000000000000')
+        GROUP BY date, post_id
         """
+        params = {**params, **rollup[1]}
+    client.execute(
+        f"""
         INSERT INTO default.post_daily_metrics (date, post_id, views, likes, completion, version)
         SELECT
             toDate(ts) AS date,
@@ -65,49 +232,247 @@ def refresh_post_daily_metrics(client: Client) -> None:
             countIf(event_name = 'watch_complete') AS completion,
             now() AS version
         FROM default.events
-        WHERE ts >= now() - INTERVAL %(days)s DAY
+        WHERE {window}
           AND entity_type = 'post'
           AND entity_id IS NOT NULL
         GROUP BY date, entity_id
+        {union}
         """,
-        {"days": DAYS_BACK},
+        params,
     )
     logger.info("Refreshed post_daily_metrics")
 
 
-def refresh_funnel(client: Client) -> None:
-    """Populate funnel_record_to_publish: unique sessions/users per step per day."""
-    steps = ["record_start", "record_stop", "upload_success", "publish_success"]
-    for step in steps:
+FUNNEL_STEPS = ["record_start", "record_stop", "upload_success", "publish_success"]
+# Longest time from a session's first step to its last counted one. Must match the
+# windowFunnel(86400) of funnel_record_to_publish_agg (05_aggregate_views.sql).
+FUNNEL_WINDOW_SEC = 86400
+FUNNEL_PARAMS: dict[str, Any] = {
+    "steps": tuple(FUNNEL_STEPS),  # for IN (a list would be sent as an array)
+    "step_names": FUNNEL_STEPS,
+    "window_sec": FUNNEL_WINDOW_SEC,
+    **{f"step_{i}": step for i, step in enumerate(FUNNEL_STEPS, 1)},
+}
+
+
+# Per (day, session): user and the number of FUNNEL_STEPS reached in order.
+FUNNEL_SESSIONS = """
+    SELECT
+        toDate(ts) AS date,
+        session_id,
+        any(user_id) AS user_id,
+        windowFunnel(%(window_sec)s)(
+            toDateTime(ts),
+            event_name = %(step_1)s,
+            event_name = %(step_2)s,
+            event_name = %(step_3)s,
+            event_name = %(step_4)s
+        ) AS level
+    FROM default.events
+    WHERE {window}
+      AND event_name IN %(steps)s
+      AND session_id != ''
+    GROUP BY date, session_id
+"""
+
+
+def refresh_funnel(
+    client: Client, dates: list[date] | None = None, horizon: date | None = None
+) -> None:
+    """Populate funnel_record_to_publish in one pass: sessions/users reaching each step in order.
+
+    windowFunnel gives, per session and day, how many steps were reached in FUNNEL_STEPS
+    order; a session counts for every step up to that level.
+    """
+    window, params = _window(dates, horizon=horizon)
+    params = {**params, **FUNNEL_PARAMS}
+    sessions = FUNNEL_SESSIONS.format(window=window)
+    if DISTINCT_MODE == "approx":
         client.execute(
-            """
-            INSERT INTO default.funnel_record_to_publish (date, step_name, unique_sessions, unique_users, version)
+            f"""
+            INSERT INTO default.funnel_record_to_publish_state (date, step_name, sessions, users)
             SELECT
-                toDate(ts) AS date,
-                %(step)s AS step_name,
-                uniqExact(session_id) AS unique_sessions,
-                uniqExact(user_id) AS unique_users,
+                date,
+                step_name,
+                uniqCombined64State(session_id) AS sessions,
+                uniqCombined64State(user_id) AS users
+            FROM ({sessions})
+            ARRAY JOIN arraySlice(%(step_names)s, 1, level) AS step_name
+            GROUP BY date, step_name
+            """,
+            params,
+        )
+        state_window, state_params = _window(dates, "date")
+        client.execute(
+            f"""
+            INSERT INTO default.funnel_record_to_publish
+                (date, step_name, unique_sessions, unique_users, version)
+            SELECT
+                date,
+                step_name,
+                uniqCombined64Merge(sessions) AS unique_sessions,
+                uniqCombined64Merge(users) AS unique_users,
                 now() AS version
-            FROM default.events
-            WHERE ts >= now() - INTERVAL %(days)s DAY
-              AND event_name = %(step)s
-            GROUP BY date
+            FROM default.funnel_record_to_publish_state
+            WHERE {state_window}
+            GROUP BY date, step_name
             """,
-            {"step": step, "days": DAYS_BACK},
+            state_params,
         )
+        logger.info("Refreshed funnel_record_to_publish (approx)")
+        return
+    client.execute(
+        f"""
+        INSERT INTO default.funnel_record_to_publish
+            (date, step_name, unique_sessions, unique_users, version)
+        SELECT
+            date,
+            step_name,
+            uniqExact(session_id) AS unique_sessions,
+            uniqExact(user_id) AS unique_users,
+            now() AS version
+        FROM ({sessions})
+        ARRAY JOIN arraySlice(%(step_names)s, 1, level) AS step_name
+        GROUP BY date, step_name
+        """,
+        params,
+    )
     logger.info("Refreshed funnel_record_to_publish")
 
 
-def main() -> int:
-    try:
-        client = get_client()
-        refresh_daily_active_users(client)
-        refresh_post_daily_metrics(client)
-        refresh_funnel(client)
-        return 0
-    except Exception as e:
-        logger.exception("refresh_aggregates failed: %s", e)
-        return 1
+def refresh_user_activity(
+    client: Client, dates: list[date] | None = None, horizon: date | None = None
+) -> None:
+    """Populate user_activity_monthly (day bitmaps per user and month) and user_first_seen."""
+    window, params = _window(dates, horizon=horizon)
+    client.execute(
+        f"""
+        INSERT INTO default.user_activity_monthly (month, user_id, days)
+        SELECT
+            toStartOfMonth(toDate(ts)) AS month,
+            assumeNotNull(user_id) AS uid,
+            groupBitOr(bitShiftLeft(toUInt32(1), toDayOfMonth(ts) - 1)) AS days
+        FROM default.events
+        WHERE {window}
+          AND user_id IS NOT NULL
+        GROUP BY month, uid
+        """,
+        params,
+    )
+    client.execute(
+        f"""
+        INSERT INTO default.user_first_seen (user_id, first_seen)
+        SELECT assumeNotNull(user_id) AS uid, min(toDate(ts)) AS first_seen
+        FROM default.events
+        WHERE {window}
+          AND user_id IS NOT NULL
+        GROUP BY uid
+        """,
+        params,
+    )
+    logger.info("Refreshed user_activity_monthly and user_first_seen")
+
+
+# table -> (events predicate selecting the rows it is built from, refresh function)
+AGGREGATES: dict[str, tuple[str, Callable[[Client, list[date] | None, date | None], None]]] = {
+    "daily_active_users": ("user_id IS NOT NULL", refresh_daily_active_users),
+    "post_daily_metrics": (
+        "entity_type = 'post' AND entity_id IS NOT NULL",
+        refresh_post_daily_metrics,
+    ),
+    "funnel_record_to_publish": ("event_name IN %(steps)s", refresh_funnel),
+    "user_activity": ("user_id IS NOT NULL", refresh_user_activity),
+}
+
+
+def read_watermark(client: Client, table: str) -> datetime | None:
+    rows = client.execute(
+        "SELECT watermark FROM default.aggregate_watermarks FINAL WHERE table_name = %(table)s",
+        {"table": table},
+    )
+    return rows[0][0] if rows else None
+
+
+def write_watermark(client: Client, table: str, watermark: datetime) -> None:
+    client.execute(
+        "INSERT INTO default.aggregate_watermarks (table_name, watermark) VALUES",
+        [(table, watermark)],
+    )
+
+
+def changed_dates(client: Client, predicate: str, since: datetime, until: datetime) -> list[date]:
+    """Days (within DAYS_BACK) of events matching predicate ingested in (since, until]."""
+    rows = client.execute(
+        f"""
+        SELECT DISTINCT toDate(ts) AS date
+        FROM default.events
+        WHERE ingested_at > %(since)s
+          AND ingested_at <= %(until)s
+          AND toDate(ts) >= today() - %(days)s
+          AND {predicate}
+        ORDER BY date
+        """,
+        {"since": since, "until": until, "days": DAYS_BACK, "steps": tuple(FUNNEL_STEPS)},
+    )
+    return [r[0] for r in rows]
+
+
+def refresh_table(client: Client, table: str, full: bool = False) -> int | None:
+    """Refresh one aggregate; returns the number of days recomputed (None for a full run)."""
+    predicate, refresh = AGGREGATES[table]
+    until = client.execute(
+        "SELECT now64(3) - toIntervalSecond(%(lag)s)", {"lag": WATERMARK_LAG_SEC}
+    )[0][0]
+    since = None if full else read_watermark(client, table)
+    horizon = raw_horizon(client)
+    if since is None:
+        refresh(client, None, horizon)
+        write_watermark(client, table, until)
+        logger.info("%s: full refresh of %s days, watermark %s", table, DAYS_BACK, until)
+        return None
+    dates = changed_dates(client, predicate, since, until)
+    if dates:
+        refresh(client, dates, horizon)
+    write_watermark(client, table, until)
+    logger.info("%s: %s changed day(s) since %s, watermark %s", table, len(dates), since, until)
+    return len(dates)
+
+
+def run_table(table: str, full: bool = False) -> TableReport:
+    """Refresh one table on its own connection, measuring time and rows read."""
+    client = MeteredClient(get_client())
+    started = time.monotonic()
+    days = refresh_table(client, table, full)
+    return TableReport(table, days, time.monotonic() - started, client.rows_read, client.bytes_read)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--full", action="store_true", help=f"recompute the last {DAYS_BACK} days")
+    parser.add_argument(
+        "--table", action="append", choices=sorted(AGGREGATES), help="only these tables"
+    )
+    args = parser.parse_args(argv)
+    tables = args.table or list(AGGREGATES)
+    failed = False
+    with futures.ThreadPoolExecutor(max_workers=max(1, min(PARALLELISM, len(tables)))) as pool:
+        pending = {pool.submit(run_table, table, args.full): table for table in tables}
+        for future in futures.as_completed(pending):
+            try:
+                report = future.result()
+            except Exception as e:
+                logger.exception("refresh of %s failed: %s", pending[future], e)
+                failed = True
+                continue
+            logger.info(
+                "%s: %s in %.1fs, %s rows / %.1f MiB read",
+                report.table,
+                "full" if report.days is None else f"{report.days} day(s)",
+                report.seconds,
+                report.rows_read,
+                report.bytes_read / 2**20,
+            )
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":
@@ -0,0 +1,166 @@
+"""
+Cohort retention from the per-user activity bitmaps of 07_user_activity.sql.
+
+  python -m jobs.aggregates.retention [--days N] [--offsets 1,7,30]
+
+A user's cohort is their first active day (user_first_seen); they are retained on day k if
+their bitmap has a bit for cohort + k. One query fetches the bitmaps of the cohorts' users
+for the months the horizon spans; the matrix is built with numpy bit operations, so no
+event is read and no self-join runs. Offsets not yet observable (cohort + k after as_of)
+are NaN in rates.
+"""
+import argparse
+import logging
+import sys
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+import numpy as np
+from clickhouse_driver import Client
+
+from .refresh_aggregates import get_client
+
+logger = logging.getLogger(__name__)
+
+EPOCH = date(1970, 1, 1)
+DEFAULT_OFFSETS = (1, 7, 30)
+
+ACTIVITY_QUERY = """
+SELECT
+    cityHash64(user_id) AS uid,
+    toUInt16(f.first_seen) AS cohort,
+    toUInt16(a.month) AS month,
+    a.days AS days
+FROM
+(
+    SELECT user_id, min(first_seen) AS first_seen
+    FROM default.user_first_seen
+    GROUP BY user_id
+    HAVING first_seen BETWEEN %(start)s AND %(end)s
+) AS f
+INNER JOIN
+(
+    SELECT month, user_id, groupBitOr(days) AS days
+    FROM default.user_activity_monthly
+    WHERE month BETWEEN toStartOfMonth(%(start)s) AND toStartOfMonth(%(last)s)
+    GROUP BY month, user_id
+) AS a USING (user_id)
+"""
+
+
+@dataclass
+class RetentionMatrix:
+    cohorts: list[date]
+    sizes: np.ndarray  # users per cohort
+    retained: np.ndarray  # (cohorts, horizon + 1): users active on cohort day + k
+    observed: np.ndarray  # (cohorts, horizon + 1): False where cohort + k is after as_of
+
+    @property
+    def rates(self) -> np.ndarray:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rates = self.retained / self.sizes[:, None]
+        return np.where(self.observed & (self.sizes[:, None] > 0), rates, np.nan)
+
+    def at(self, offsets: tuple[int, ...] = DEFAULT_OFFSETS) -> np.ndarray:
+        """Rates for the given day offsets, e.g. D1/D7/D30: shape (cohorts, len(offsets))."""
+        return self.rates[:, list(offsets)]
+
+
+def retention_matrix(
+    uids: np.ndarray,
+    cohorts: np.ndarray,
+    months: np.ndarray,
+    bitmaps: np.ndarray,
+    start: date,
+    end: date,
+    horizon: int,
+    as_of: date,
+) -> RetentionMatrix:
+    """Build the matrix from (user, cohort day, month start day, day bitmap) rows.
+
+    Days are numbered from 1970-01-01 (ClickHouse Date as UInt16); a user has one row per
+    active month.
+    """
+    start_day = (start - EPOCH).days
+    n_cohorts = (end - start).days + 1
+    span = n_cohorts + horizon
+    users, user_idx = np.unique(np.asarray(uids, dtype=np.uint64), return_inverse=True)
+
+    # Activity per user on days start .. end + horizon, from the month bitmaps.
+    bits = (np.asarray(bitmaps, dtype=np.uint32)[:, None] >> np.arange(31, dtype=np.uint32)) & 1
+    day = np.asarray(months, dtype=np.int64)[:, None] - start_day + np.arange(31)
+    hit = bits.astype(bool) & (day >= 0) & (day < span)
+    rows, cols = np.nonzero(hit)
+    active = np.zeros((len(users), span), dtype=bool)
+    active[user_idx[rows], day[rows, cols]] = True
+
+    cohort_of = np.zeros(len(users), dtype=np.int64)
+    cohort_of[user_idx] = np.asarray(cohorts, dtype=np.int64) - start_day
+    offsets = np.arange(horizon + 1)
+    per_user = active[np.arange(len(users))[:, None], cohort_of[:, None] + offsets]
+    retained = np.zeros((n_cohorts, horizon + 1), dtype=np.int64)
+    np.add.at(retained, cohort_of, per_user)
+    sizes = np.bincount(cohort_of, minlength=n_cohorts)
+
+    last = (as_of - start).days
+    observed = np.arange(n_cohorts)[:, None] + offsets <= last
+    return RetentionMatrix(
+        cohorts=[start + timedelta(days=i) for i in range(n_cohorts)],
+        sizes=sizes,
+        retained=retained,
+        observed=observed,
+    )
+
+
+def cohort_retention(
+    client: Client,
+    start: date,
+    end: date,
+    horizon: int = max(DEFAULT_OFFSETS),
+    as_of: date | None = None,
+) -> RetentionMatrix:
+    """Daily cohorts first seen start..end, retention on days 0..horizon after."""
+    as_of = as_of or date.today() - timedelta(days=1)
+    last = min(end + timedelta(days=horizon), as_of)
+    uids, cohorts, months, bitmaps = client.execute(
+        ACTIVITY_QUERY, {"start": start, "end": end, "last": last}, columnar=True
+    ) or ([], [], [], [])
+    return retention_matrix(
+        np.array(uids, dtype=np.uint64),
+        np.array(cohorts, dtype=np.int64),
+        np.array(months, dtype=np.int64),
+        np.array(bitmaps, dtype=np.uint32),
+        start,
+        end,
+        horizon,
+        as_of,
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Print daily cohort retention")
+    parser.add_argument("--days", type=int, default=30, help="cohorts of the last N days")
+    parser.add_argument(
+        "--offsets",
+        type=lambda v: tuple(int(x) for x in v.split(",")),
+        default=DEFAULT_OFFSETS,
+        help="retention days, comma-separated",
+    )
+    args = parser.parse_args(argv)
+    end = date.today() - timedelta(days=1)
+    start = end - timedelta(days=args.days - 1)
+    try:
+        matrix = cohort_retention(get_client(), start, end, horizon=max(args.offsets))
+    except Exception as e:
+        logger.exception("retention query failed: %s", e)
+        return 1
+    print("cohort      users  " + "  ".join(f"D{k:<5}" for k in args.offsets))
+    rows = zip(matrix.cohorts, matrix.sizes, matrix.at(args.offsets), strict=True)
+    for cohort, size, rates in rows:
+        cells = "  ".join("  -   " if np.isnan(r) else f"{100 * r:5.1f}%" for r in rates)
+        print(f"{cohort}  {size:6d}  {cells}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
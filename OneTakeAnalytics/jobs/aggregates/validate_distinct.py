@@ -0,0 +1,152 @@
+"""
+Validate approximate distinct counts (AGGREGATE_DISTINCT_MODE=approx) against exact ones.
+
+  python -m jobs.aggregates.validate_distinct [--days N] [--sample K] [--max-error F]
+
+Picks K random days among the last N complete days that have daily states and, for each,
+compares DAU and the per-step funnel sessions/users merged from the *_state tables with
+uniqExact over events. The last complete week is checked too (weekly_active_users), which
+exercises merging daily states. Logs one line per comparison and the mean and max relative
+error; exits 1 if any error exceeds --max-error.
+"""
+import argparse
+import logging
+import random
+import sys
+from dataclasses import dataclass
+from datetime import date
+
+from clickhouse_driver import Client
+
+from .refresh_aggregates import DAYS_BACK, FUNNEL_PARAMS, FUNNEL_SESSIONS, get_client
+
+logger = logging.getLogger(__name__)
+
+# uniqCombined64 (17-bit precision) stays well within this for realistic cardinalities.
+DEFAULT_MAX_ERROR = 0.02
+
+
+@dataclass(frozen=True)
+class Comparison:
+    metric: str
+    key: str
+    exact: int
+    approx: int
+
+    @property
+    def error(self) -> float:
+        if self.exact == 0:
+            return 0.0 if self.approx == 0 else 1.0
+        return abs(self.approx - self.exact) / self.exact
+
+
+def sample_days(client: Client, days: int, sample: int, rng: random.Random) -> list[date]:
+    """Up to sample complete days of the last days that have DAU states, oldest first."""
+    rows = client.execute(
+        "SELECT DISTINCT date FROM default.daily_active_users_state"
+        " WHERE date >= today() - %(days)s AND date < today()",
+        {"days": days},
+    )
+    candidates = sorted(r[0] for r in rows)
+    return sorted(rng.sample(candidates, min(sample, len(candidates))))
+
+
+def compare_day(client: Client, day: date) -> list[Comparison]:
+    exact_dau = client.execute(
+        "SELECT uniqExact(user_id) FROM default.events"
+        " WHERE toDate(ts) = %(day)s AND user_id IS NOT NULL",
+        {"day": day},
+    )[0][0]
+    approx_dau = client.execute(
+        "SELECT uniqCombined64Merge(users) FROM default.daily_active_users_state"
+        " WHERE date = %(day)s",
+        {"day": day},
+    )[0][0]
+    result = [Comparison("dau", str(day), int(exact_dau), int(approx_dau))]
+
+    params = {"day": day, **FUNNEL_PARAMS}
+    exact = client.execute(
+        f"""
+        SELECT step_name, uniqExact(session_id), uniqExact(user_id)
+        FROM ({FUNNEL_SESSIONS.format(window="toDate(ts) = %(day)s")})
+        ARRAY JOIN arraySlice(%(step_names)s, 1, level) AS step_name
+        GROUP BY step_name
+        """,
+        params,
+    )
+    approx = client.execute(
+        """
+        SELECT step_name, uniqCombined64Merge(sessions), uniqCombined64Merge(users)
+        FROM default.funnel_record_to_publish_state
+        WHERE date = %(day)s
+        GROUP BY step_name
+        """,
+        params,
+    )
+    exact_by_step = {r[0]: r[1:] for r in exact}
+    approx_by_step = {r[0]: r[1:] for r in approx}
+    for step in FUNNEL_PARAMS["step_names"]:
+        e_sessions, e_users = exact_by_step.get(step, (0, 0))
+        a_sessions, a_users = approx_by_step.get(step, (0, 0))
+        key = f"{day} {step}"
+        result.append(Comparison("funnel_sessions", key, int(e_sessions), int(a_sessions)))
+        result.append(Comparison("funnel_users", key, int(e_users), int(a_users)))
+    return result
+
+
+def compare_last_week(client: Client) -> Comparison | None:
+    """WAU of the last complete week (Monday to Sunday), exact vs merged daily states."""
+    week = client.execute("SELECT toMonday(today()) - 7")[0][0]
+    approx = client.execute(
+        "SELECT wau FROM default.weekly_active_users WHERE week = %(week)s", {"week": week}
+    )
+    if not approx:
+        return None
+    exact = client.execute(
+        "SELECT uniqExact(user_id) FROM default.events"
+        " WHERE toDate(ts) >= %(week)s AND toDate(ts) < %(week)s + 7 AND user_id IS NOT NULL",
+        {"week": week},
+    )[0][0]
+    return Comparison("wau", str(week), int(exact), int(approx[0][0]))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare approximate distinct counts to exact")
+    parser.add_argument("--days", type=int, default=DAYS_BACK, help="days back to sample from")
+    parser.add_argument("--sample", type=int, default=7, help="days to check")
+    parser.add_argument("--max-error", type=float, default=DEFAULT_MAX_ERROR)
+    parser.add_argument("--seed", type=int, help="seed for the day sample")
+    args = parser.parse_args(argv)
+    try:
+        client = get_client()
+        comparisons: list[Comparison] = []
+        for day in sample_days(client, args.days, args.sample, random.Random(args.seed)):
+            comparisons.extend(compare_day(client, day))
+        week = compare_last_week(client)
+        if week is not None:
+            comparisons.append(week)
+    except Exception as e:
+        logger.exception("validate_distinct failed: %s", e)
+        return 1
+    if not comparisons:
+        logger.warning("No daily states to validate; run refresh_aggregates in approx mode first")
+        return 1
+    for c in comparisons:
+        logger.info(
+            "%s %s: exact %s, approx %s (%.2f%%)", c.metric, c.key, c.exact, c.approx, 100 * c.error
+        )
+    errors = [c.error for c in comparisons]
+    worst = max(comparisons, key=lambda c: c.error)
+    logger.info(
+        "%s comparisons: mean error %.3f%%, max %.3f%% (%s %s)",
+        len(comparisons),
+        100 * sum(errors) / len(errors),
+        100 * worst.error,
+        worst.metric,
+        worst.key,
+    )
+    return 1 if worst.error > args.max_error else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
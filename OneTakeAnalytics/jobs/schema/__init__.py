@@ -0,0 +1 @@
+# Schema job package
@@ -0,0 +1,127 @@
+"""
+Benchmark the reco service's per-user and per-post ClickHouse queries on default.events.
+
+  python -m jobs.schema.bench_reco_queries [--runs N] [--save before.json]
+  python -m jobs.schema.migrate up
+  python -m jobs.schema.bench_reco_queries [--runs N] --compare before.json
+
+Ids are sampled from recent events once and then reused (with --compare, the ids stored in
+the baseline), so both runs ask for the same users and posts. Reports latency percentiles
+and the rows/bytes each query read (from query progress); fewer rows read is what the
+skip indexes of 0002_events_user_entity_indexes buy.
+"""
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from clickhouse_driver import Client
+
+from services.reco_service.prefetch import USER_HISTORY_QUERY
+
+from ..aggregates.refresh_aggregates import get_client
+
+logger = logging.getLogger(__name__)
+
+BATCH_USERS = 32
+
+POST_EVENTS_QUERY = """
+SELECT event_name, count()
+FROM default.events
+WHERE entity_id IN %(post_ids)s
+  AND ts >= now() - INTERVAL 3 DAY
+GROUP BY event_name
+"""
+
+SAMPLE_QUERY = """
+SELECT DISTINCT toString({column})
+FROM default.events
+WHERE {column} IS NOT NULL AND ts >= now() - INTERVAL 30 DAY
+LIMIT %(n)s
+"""
+
+
+def sample_ids(client: Client, column: str, n: int) -> list[str]:
+    return [r[0] for r in client.execute(SAMPLE_QUERY.format(column=column), {"n": n})]
+
+
+def cases(users: list[str], posts: list[str], rng: random.Random) -> dict[str, tuple[str, dict]]:
+    """name -> (query, params) per run; the queries the reco service issues by user or post."""
+    return {
+        "user_history_1": (USER_HISTORY_QUERY, {"user_ids": (rng.choice(users),)}),
+        f"user_history_{BATCH_USERS}": (
+            USER_HISTORY_QUERY,
+            {"user_ids": tuple(rng.sample(users, min(BATCH_USERS, len(users))))},
+        ),
+        "post_events_1": (POST_EVENTS_QUERY, {"post_ids": (rng.choice(posts),)}),
+    }
+
+
+def run(client: Client, users: list[str], posts: list[str], runs: int, seed: int) -> dict:
+    rng = random.Random(seed)
+    samples: dict[str, dict[str, list[float]]] = {}
+    for _ in range(runs):
+        for name, (query, params) in cases(users, posts, rng).items():
+            started = time.perf_counter()
+            client.execute(query, params)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            progress = client.last_query.progress
+            s = samples.setdefault(name, {"ms": [], "rows": [], "bytes": []})
+            s["ms"].append(elapsed_ms)
+            s["rows"].append(progress.rows)
+            s["bytes"].append(progress.bytes)
+    return {
+        name: {
+            "p50_ms": statistics.median(s["ms"]),
+            "p95_ms": statistics.quantiles(s["ms"], n=20)[-1] if len(s["ms"]) > 1 else s["ms"][0],
+            "rows_read": statistics.mean(s["rows"]),
+            "bytes_read": statistics.mean(s["bytes"]),
+        }
+        for name, s in samples.items()
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark reco queries on default.events")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save", type=Path, help="write results and sampled ids here")
+    parser.add_argument("--compare", type=Path, help="baseline written by --save")
+    args = parser.parse_args(argv)
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    try:
+        client = get_client()
+        if baseline is not None:
+            users, posts = baseline["users"], baseline["posts"]
+        else:
+            users, posts = sample_ids(client, "user_id", 500), sample_ids(client, "entity_id", 500)
+        if not users or not posts:
+            logger.error("No recent events to sample user and post ids from")
+            return 1
+        results = run(client, users, posts, args.runs, args.seed)
+    except Exception as e:
+        logger.exception("benchmark failed: %s", e)
+        return 1
+    before = baseline["results"] if baseline is not None else {}
+    for name, r in results.items():
+        line = (
+            f"{name:18s} p50 {r['p50_ms']:7.1f}ms  p95 {r['p95_ms']:7.1f}ms"
+            f"  rows {r['rows_read']:12.0f}  MiB {r['bytes_read'] / 2**20:8.1f}"
+        )
+        if name in before and before[name]["rows_read"]:
+            line += (
+                f"  (p50 x{r['p50_ms'] / before[name]['p50_ms']:.2f},"
+                f" rows x{r['rows_read'] / before[name]['rows_read']:.3f})"
+            )
+        print(line)
+    if args.save:
+        args.save.write_text(json.dumps({"users": users, "posts": posts, "results": results}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Versioned ClickHouse schema migrations from contracts/clickhouse/migrations.
+
+  python -m jobs.schema.migrate status
+  python -m jobs.schema.migrate up [--to VERSION] [--dry-run]
+
+Migrations are files NNNN_description.sql, applied in version order, statement by
+statement, and recorded with their checksum in default.schema_migrations. ClickHouse DDL is
+not transactional: a failed migration is not recorded and is retried from its first
+statement, so every statement must be safe to repeat (IF NOT EXISTS, MODIFY to a final
+type, MATERIALIZE). An applied file whose checksum changed stops the run; add a new
+migration instead of editing one. contracts/clickhouse/init creates fresh databases in the
+migrated state, so on those the migrations are no-ops.
+"""
+import argparse
+import hashlib
+import logging
+import os
+import re
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+from clickhouse_driver import Client
+
+from ..aggregates.refresh_aggregates import get_client
+
+logger = logging.getLogger(__name__)
+
+_repo = Path(__file__).resolve().parents[3]
+MIGRATIONS_DIR = Path(
+    os.environ.get("CLICKHOUSE_MIGRATIONS_DIR", _repo / "contracts" / "clickhouse" / "migrations")
+)
+
+CREATE_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS default.schema_migrations
+(
+    version    UInt32,
+    name       String,
+    checksum   String,
+    applied_at DateTime DEFAULT now()
+)
+ENGINE = ReplacingMergeTree(applied_at)
+ORDER BY version
+"""
+
+_FILE_RE = re.compile(r"^(\d{4})_(\w+)\.sql$")
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    path: Path
+
+    @property
+    def sql(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+    @property
+    def checksum(self) -> str:
+        return hashlib.sha256(self.sql.encode("utf-8")).hexdigest()
+
+    def statements(self) -> list[str]:
+        """Statements of the file: comment lines dropped, split on ';' at line ends."""
+        lines = [line for line in self.sql.splitlines() if not line.lstrip().startswith("--")]
+        return [s.strip() for s in re.split(r";\s*$", "\n".join(lines), flags=re.M) if s.strip()]
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> list[Migration]:
+    migrations = []
+    for path in sorted(directory.glob("*.sql")):
+        match = _FILE_RE.match(path.name)
+        if match is None:
+            raise ValueError(f"{path.name}: migration files are named NNNN_description.sql")
+        migrations.append(Migration(int(match.group(1)), match.group(2), path))
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise ValueError(f"duplicate migration versions in {directory}")
+    return migrations
+
+
+def applied(client: Client) -> dict[int, str]:
+    """version -> checksum of the migrations recorded in schema_migrations."""
+    client.execute(CREATE_MIGRATIONS_TABLE)
+    rows = client.execute("SELECT version, checksum FROM default.schema_migrations FINAL")
+    return {int(v): c for v, c in rows}
+
+
+def check_applied(migrations: list[Migration], done: dict[int, str]) -> list[str]:
+    """Problems with already applied migrations (edited or missing files)."""
+    by_version = {m.version: m for m in migrations}
+    problems = []
+    for version, checksum in sorted(done.items()):
+        migration = by_version.get(version)
+        if migration is None:
+            problems.append(f"{version:04d} is applied but its file is missing")
+        elif migration.checksum != checksum:
+            problems.append(f"{migration.path.name} changed after it was applied")
+    return problems
+
+
+def migrate(
+    client: Client,
+    migrations: list[Migration],
+    to_version: int | None = None,
+    dry_run: bool = False,
+) -> list[Migration]:
+    """Apply pending migrations up to to_version (all by default); returns those applied."""
+    done = applied(client)
+    problems = check_applied(migrations, done)
+    if problems:
+        raise RuntimeError("; ".join(problems))
+    pending = [
+        m
+        for m in migrations
+        if m.version not in done and (to_version is None or m.version <= to_version)
+    ]
+    for migration in pending:
+        for statement in migration.statements():
+            if dry_run:
+                print(f"-- {migration.path.name}\n{statement};")
+                continue
+            client.execute(statement)
+        if not dry_run:
+            client.execute(
+                "INSERT INTO default.schema_migrations (version, name, checksum) VALUES",
+                [(migration.version, migration.name, migration.checksum)],
+            )
+            logger.info("Applied %s", migration.path.name)
+    return pending
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Apply ClickHouse schema migrations")
+    parser.add_argument("command", choices=("status", "up"))
+    parser.add_argument("--to", type=int, help="stop after this version")
+    parser.add_argument("--dry-run", action="store_true", help="print statements only")
+    args = parser.parse_args(argv)
+    try:
+        migrations = discover()
+        client = get_client()
+        if args.command == "up":
+            done = migrate(client, migrations, args.to, args.dry_run)
+            logger.info("%s migration(s) %s", len(done), "pending" if args.dry_run else "applied")
+            return 0
+        recorded = applied(client)
+        for m in migrations:
+            state = "applied" if m.version in recorded else "pending"
+            logger.info("%04d %-45s %s", m.version, m.name, state)
+        problems = check_applied(migrations, recorded)
+        for problem in problems:
+            logger.error(problem)
+        return 1 if problems else 0
+    except Exception as e:
+        logger.exception("migrate %s failed: %s", args.command, e)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1c\x61nalytics/v1/analytics.proto\x12\x14onetake.analytics.v1\"\xc7\x01\n\x11TrackEventRequest\x12\x10\n\x08\x65vent_id\x18\x01 \x01(\t\x12\n\n\x02ts\x18\x02 \x01(\x03\x12\x0f\n\x07user_id\x18\x03 \x01(\t\x12\x12\n\nsession_id\x18\x04 \x01(\t\x12\x12\n\nevent_name\x18\x05 \x01(\t\x12\r\n\x05route\x18\x06 \x01(\t\x12\x13\n\x0b\x65ntity_type\x18\x07 \x01(\t\x12\x11\n\tentity_id\x18\x08 \x01(\t\x12\x12\n\nprops_json\x18\t \x01(\t\x12\x10\n\x08trace_id\x18\n \x01(\t\"5\n\x12TrackEventResponse\x12\x10\n\x08\x61\x63\x63\x65pted\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t2r\n\x0f\x41nalyticsIngest\x12_\n\nTrackEvent\x12\'.onetake.analytics.v1.TrackEventRequest\x1a(.onetake.analytics.v1.TrackEventResponseB%\xaa\x02\"OneTake.GrpcContracts.Analytics.V1b\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x1c\x61nalytics/v1/analytics.proto\x12\x14onetake.analytics.v1\"\xc7\x01\n\x11TrackEventRequest\x12\x10\n\x08\x65vent_id\x18\x01 \x01(\t\x12\n\n\x02ts\x18\x02 \x01(\x03\x12\x0f\n\x07user_id\x18\x03 \x01(\t\x12\x12\n\nsession_id\x18\x04 \x01(\t\x12\x12\n\nevent_name\x18\x05 \x01(\t\x12\r\n\x05route\x18\x06 \x01(\t\x12\x13\n\x0b\x65ntity_type\x18\x07 \x01(\t\x12\x11\n\tentity_id\x18\x08 \x01(\t\x12\x12\n\nprops_json\x18\t \x01(\t\x12\x10\n\x08trace_id\x18\n \x01(\t\"5\n\x12TrackEventResponse\x12\x10\n\x08\x61\x63\x63\x65pted\x18\x01 \x01(\x08\x12\r\n\x05\x65rror\x18\x02 \x01(\t\"a\n\x12GetTopPostsRequest\x12\x0e\n\x06metric\x18\x01 \x01(\t\x12\x12\n\nwindow_sec\x18\x02 \x01(\x05\x12\r\n\x05limit\x18\x03 \x01(\x05\x12\x18\n\x10\x65xclude_post_ids\x18\x04 \x03(\t\"+\n\tPostCount\x12\x0f\n\x07post_id\x18\x01 \x01(\t\x12\r\n\x05\x63ount\x18\x02 \x01(\x03\"Y\n\x13GetTopPostsResponse\x12.\n\x05posts\x18\x01 \x03(\x0b\x32\x1f.onetake.analytics.v1.PostCount\x12\x12\n\nwindow_sec\x18\x02 \x01(\x05\">\n\x16GetPostCountersRequest\x12\x10\n\x08post_ids\x18\x01 \x03(\t\x12\x12\n\nwindow_sec\x18\x02 \x01(\x05\"R\n\x0cPostCounters\x12\x0f\n\x07post_id\x18\x01 \x01(\t\x12\r\n\x05views\x18\x02 \x01(\x03\x12\r\n\x05likes\x18\x03 \x01(\x03\x12\x13\n\x0b\x63ompletions\x18\x04 \x01(\x03\"`\n\x17GetPostCountersResponse\x12\x31\n\x05posts\x18\x01 \x03(\x0b\x32\".onetake.analytics.v1.PostCounters\x12\x12\n\nwindow_sec\x18\x02 \x01(\x05\x32r\n\x0f\x41nalyticsIngest\x12_\n\nTrackEvent\x12\'.onetake.analytics.v1.TrackEventRequest\x1a(.onetake.analytics.v1.TrackEventResponse2\xe2\x01\n\x0cLiveCounters\x12\x62\n\x0bGetTopPosts\x12(.onetake.analytics.v1.GetTopPostsRequest\x1a).onetake.analytics.v1.GetTopPostsResponse\x12n\n\x0fGetPostCounters\x12,.onetake.analytics.v1.GetPostCountersRequest\x1a-.onetake.analytics.v1.GetPostCountersResponseB%\xaa\x02\"OneTake.GrpcContracts.Analytics.V1b\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -36,6 +36,20 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['_TRACKEVENTREQUEST']._serialized_end=254
   _globals['_TRACKEVENTRESPONSE']._serialized_start=256
   _globals['_TRACKEVENTRESPONSE']._serialized_end=309
-  _globals['_ANALYTICSINGEST']._serialized_start=311
-  _globals['_ANALYTICSINGEST']._serialized_end=425
+  _globals['_GETTOPPOSTSREQUEST']._serialized_start=311
+  _globals['_GETTOPPOSTSREQUEST']._serialized_end=408
+  _globals['_POSTCOUNT']._serialized_start=410
+  _globals['_POSTCOUNT']._serialized_end=453
+  _globals['_GETTOPPOSTSRESPONSE']._serialized_start=455
+  _globals['_GETTOPPOSTSRESPONSE']._serialized_end=544
+  _globals['_GETPOSTCOUNTERSREQUEST']._serialized_start=546
+  _globals['_GETPOSTCOUNTERSREQUEST']._serialized_end=608
+  _globals['_POSTCOUNTERS']._serialized_start=610
+  _globals['_POSTCOUNTERS']._serialized_end=692
+  _globals['_GETPOSTCOUNTERSRESPONSE']._serialized_start=694
+  _globals['_GETPOSTCOUNTERSRESPONSE']._serialized_end=790
+  _globals['_ANALYTICSINGEST']._serialized_start=792
+  _globals['_ANALYTICSINGEST']._serialized_end=906
+  _globals['_LIVECOUNTERS']._serialized_start=909
+  _globals['_LIVECOUNTERS']._serialized_end=1135
 # @@protoc_insertion_point(module_scope)
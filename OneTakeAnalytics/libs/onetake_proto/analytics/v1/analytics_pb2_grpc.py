@@ -95,3 +95,124 @@ class AnalyticsIngest(object):
             timeout,
             metadata,
             _registered_method=True)
+
+
+class LiveCountersStub(object):
+    """Sliding-window per-post counters kept in memory by the ingest service.
+    Counts are estimates from a bounded top-K sketch (may overcount, never undercount tracked posts).
+    """
+
+    def __init__(self, channel):
+        """Constructor.
+
+        Args:
+            channel: A grpc.Channel.
+        """
+        self.GetTopPosts = channel.unary_unary(
+                '/onetake.analytics.v1.LiveCounters/GetTopPosts',
+                request_serializer=analytics_dot_v1_dot_analytics__pb2.GetTopPostsRequest.SerializeToString,
+                response_deserializer=analytics_dot_v1_dot_analytics__pb2.GetTopPostsResponse.FromString,
+                _registered_method=True)
+        self.GetPostCounters = channel.unary_unary(
+                '/onetake.analytics.v1.LiveCounters/GetPostCounters',
+                request_serializer=analytics_dot_v1_dot_analytics__pb2.GetPostCountersRequest.SerializeToString,
+                response_deserializer=analytics_dot_v1_dot_analytics__pb2.GetPostCountersResponse.FromString,
+                _registered_method=True)
+
+
+class LiveCountersServicer(object):
+    """Sliding-window per-post counters kept in memory by the ingest service.
+    Counts are estimates from a bounded top-K sketch (may overcount, never undercount tracked posts).
+    """
+
+    def GetTopPosts(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def GetPostCounters(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+
+def add_LiveCountersServicer_to_server(servicer, server):
+    rpc_method_handlers = {
+            'GetTopPosts': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetTopPosts,
+                    request_deserializer=analytics_dot_v1_dot_analytics__pb2.GetTopPostsRequest.FromString,
+                    response_serializer=analytics_dot_v1_dot_analytics__pb2.GetTopPostsResponse.SerializeToString,
+            ),
+            'GetPostCounters': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetPostCounters,
+                    request_deserializer=analytics_dot_v1_dot_analytics__pb2.GetPostCountersRequest.FromString,
+                    response_serializer=analytics_dot_v1_dot_analytics__pb2.GetPostCountersResponse.SerializeToString,
+            ),
+    }
+    generic_handler = grpc.method_handlers_generic_handler(
+            'onetake.analytics.v1.LiveCounters', rpc_method_handlers)
+    server.add_generic_rpc_handlers((generic_handler,))
+    server.add_registered_method_handlers('onetake.analytics.v1.LiveCounters', rpc_method_handlers)
+
+
+ # This class is part of an EXPERIMENTAL API.
+class LiveCounters(object):
+    """Sliding-window per-post counters kept in memory by the ingest service.
+    Counts are estimates from a bounded top-K sketch (may overcount, never undercount tracked posts).
+    """
+
+    @staticmethod
+    def GetTopPosts(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/onetake.analytics.v1.LiveCounters/GetTopPosts',
+            analytics_dot_v1_dot_analytics__pb2.GetTopPostsRequest.SerializeToString,
+            analytics_dot_v1_dot_analytics__pb2.GetTopPostsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def GetPostCounters(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/onetake.analytics.v1.LiveCounters/GetPostCounters',
+            analytics_dot_v1_dot_analytics__pb2.GetPostCountersRequest.SerializeToString,
+            analytics_dot_v1_dot_analytics__pb2.GetPostCountersResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
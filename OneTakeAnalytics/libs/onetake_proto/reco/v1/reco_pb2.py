@@ -24,7 +24,7 @@ _sym_db = _symbol_database.Default()
 
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12reco/v1/reco.proto\x12\x0fonetake.reco.v1\"\xa9\x01\n\x19GetRecommendationsRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\x12\x11\n\tfeed_type\x18\x03 \x01(\t\x12\x17\n\x0f\x63ontext_post_id\x18\x04 \x01(\t\x12\x14\n\x0c\x63ontext_tags\x18\x05 \x03(\t\x12\x18\n\x10\x65xclude_post_ids\x18\x06 \x03(\t\x12\x10\n\x08trace_id\x18\x07 \x01(\t\"D\n\x12RecommendationItem\x12\x0f\n\x07post_id\x18\x01 \x01(\t\x12\r\n\x05score\x18\x02 \x01(\x01\x12\x0e\n\x06reason\x18\x03 \x01(\t\"P\n\x1aGetRecommendationsResponse\x12\x32\n\x05items\x18\x01 \x03(\x0b\x32#.onetake.reco.v1.RecommendationItem2|\n\x0bRecoService\x12m\n\x12GetRecommendations\x12*.onetake.reco.v1.GetRecommendationsRequest\x1a+.onetake.reco.v1.GetRecommendationsResponseB \xaa\x02\x1dOneTake.GrpcContracts.Reco.V1b\x06proto3')
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n\x12reco/v1/reco.proto\x12\x0fonetake.reco.v1\"\xcb\x01\n\x19GetRecommendationsRequest\x12\x0f\n\x07user_id\x18\x01 \x01(\t\x12\r\n\x05limit\x18\x02 \x01(\x05\x12\x11\n\tfeed_type\x18\x03 \x01(\t\x12\x17\n\x0f\x63ontext_post_id\x18\x04 \x01(\t\x12\x14\n\x0c\x63ontext_tags\x18\x05 \x03(\t\x12\x18\n\x10\x65xclude_post_ids\x18\x06 \x03(\t\x12\x10\n\x08trace_id\x18\x07 \x01(\t\x12\x0e\n\x06\x63ursor\x18\x08 \x01(\t\x12\x10\n\x08paginate\x18\t \x01(\x08\"D\n\x12RecommendationItem\x12\x0f\n\x07post_id\x18\x01 \x01(\t\x12\r\n\x05score\x18\x02 \x01(\x01\x12\x0e\n\x06reason\x18\x03 \x01(\t\"e\n\x1aGetRecommendationsResponse\x12\x32\n\x05items\x18\x01 \x03(\x0b\x32#.onetake.reco.v1.RecommendationItem\x12\x13\n\x0bnext_cursor\x18\x02 \x01(\t\"^\n\x1eGetRecommendationsBatchRequest\x12<\n\x08requests\x18\x01 \x03(\x0b\x32*.onetake.reco.v1.GetRecommendationsRequest\"a\n\x1fGetRecommendationsBatchResponse\x12>\n\tresponses\x18\x01 \x03(\x0b\x32+.onetake.reco.v1.GetRecommendationsResponse2\xee\x02\n\x0bRecoService\x12m\n\x12GetRecommendations\x12*.onetake.reco.v1.GetRecommendationsRequest\x1a+.onetake.reco.v1.GetRecommendationsResponse\x12|\n\x17GetRecommendationsBatch\x12/.onetake.reco.v1.GetRecommendationsBatchRequest\x1a\x30.onetake.reco.v1.GetRecommendationsBatchResponse\x12r\n\x15StreamRecommendations\x12*.onetake.reco.v1.GetRecommendationsRequest\x1a+.onetake.reco.v1.GetRecommendationsResponse0\x01\x42 \xaa\x02\x1dOneTake.GrpcContracts.Reco.V1b\x06proto3')
 
 _globals = globals()
 _builder.BuildMessageAndEnumDescriptors(DESCRIPTOR, _globals)
@@ -33,11 +33,15 @@ if not _descriptor._USE_C_DESCRIPTORS:
   _globals['DESCRIPTOR']._loaded_options = None
   _globals['DESCRIPTOR']._serialized_options = b'\252\002\035OneTake.GrpcContracts.Reco.V1'
   _globals['_GETRECOMMENDATIONSREQUEST']._serialized_start=40
-  _globals['_GETRECOMMENDATIONSREQUEST']._serialized_end=209
-  _globals['_RECOMMENDATIONITEM']._serialized_start=211
-  _globals['_RECOMMENDATIONITEM']._serialized_end=279
-  _globals['_GETRECOMMENDATIONSRESPONSE']._serialized_start=281
-  _globals['_GETRECOMMENDATIONSRESPONSE']._serialized_end=361
-  _globals['_RECOSERVICE']._serialized_start=363
-  _globals['_RECOSERVICE']._serialized_end=487
+  _globals['_GETRECOMMENDATIONSREQUEST']._serialized_end=243
+  _globals['_RECOMMENDATIONITEM']._serialized_start=245
+  _globals['_RECOMMENDATIONITEM']._serialized_end=313
+  _globals['_GETRECOMMENDATIONSRESPONSE']._serialized_start=315
+  _globals['_GETRECOMMENDATIONSRESPONSE']._serialized_end=416
+  _globals['_GETRECOMMENDATIONSBATCHREQUEST']._serialized_start=418
+  _globals['_GETRECOMMENDATIONSBATCHREQUEST']._serialized_end=512
+  _globals['_GETRECOMMENDATIONSBATCHRESPONSE']._serialized_start=514
+  _globals['_GETRECOMMENDATIONSBATCHRESPONSE']._serialized_end=611
+  _globals['_RECOSERVICE']._serialized_start=614
+  _globals['_RECOSERVICE']._serialized_end=980
 # @@protoc_insertion_point(module_scope)
@@ -39,6 +39,16 @@ class RecoServiceStub(object):
                 request_serializer=reco_dot_v1_dot_reco__pb2.GetRecommendationsRequest.SerializeToString,
                 response_deserializer=reco_dot_v1_dot_reco__pb2.GetRecommendationsResponse.FromString,
                 _registered_method=True)
+        self.GetRecommendationsBatch = channel.unary_unary(
+                '/onetake.reco.v1.RecoService/GetRecommendationsBatch',
+                request_serializer=reco_dot_v1_dot_reco__pb2.GetRecommendationsBatchRequest.SerializeToString,
+                response_deserializer=reco_dot_v1_dot_reco__pb2.GetRecommendationsBatchResponse.FromString,
+                _registered_method=True)
+        self.StreamRecommendations = channel.unary_stream(
+                '/onetake.reco.v1.RecoService/StreamRecommendations',
+                request_serializer=reco_dot_v1_dot_reco__pb2.GetRecommendationsRequest.SerializeToString,
+                response_deserializer=reco_dot_v1_dot_reco__pb2.GetRecommendationsResponse.FromString,
+                _registered_method=True)
 
 
 class RecoServiceServicer(object):
@@ -50,6 +60,20 @@ class RecoServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def GetRecommendationsBatch(self, request, context):
+        """Many users/feeds in one call; upstream queries are shared across the batch.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def StreamRecommendations(self, request, context):
+        """Pages of `limit` items from one cursor session, streamed until the list is exhausted.
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_RecoServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -58,6 +82,16 @@ def add_RecoServiceServicer_to_server(servicer, server):
                     request_deserializer=reco_dot_v1_dot_reco__pb2.GetRecommendationsRequest.FromString,
                     response_serializer=reco_dot_v1_dot_reco__pb2.GetRecommendationsResponse.SerializeToString,
             ),
+            'GetRecommendationsBatch': grpc.unary_unary_rpc_method_handler(
+                    servicer.GetRecommendationsBatch,
+                    request_deserializer=reco_dot_v1_dot_reco__pb2.GetRecommendationsBatchRequest.FromString,
+                    response_serializer=reco_dot_v1_dot_reco__pb2.GetRecommendationsBatchResponse.SerializeToString,
+            ),
+            'StreamRecommendations': grpc.unary_stream_rpc_method_handler(
+                    servicer.StreamRecommendations,
+                    request_deserializer=reco_dot_v1_dot_reco__pb2.GetRecommendationsRequest.FromString,
+                    response_serializer=reco_dot_v1_dot_reco__pb2.GetRecommendationsResponse.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'onetake.reco.v1.RecoService', rpc_method_handlers)
@@ -95,3 +129,57 @@ class RecoService(object):
             timeout,
             metadata,
             _registered_method=True)
+
+    @staticmethod
+    def GetRecommendationsBatch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(
+            request,
+            target,
+            '/onetake.reco.v1.RecoService/GetRecommendationsBatch',
+            reco_dot_v1_dot_reco__pb2.GetRecommendationsBatchRequest.SerializeToString,
+            reco_dot_v1_dot_reco__pb2.GetRecommendationsBatchResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
+
+    @staticmethod
+    def StreamRecommendations(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(
+            request,
+            target,
+            '/onetake.reco.v1.RecoService/StreamRecommendations',
+            reco_dot_v1_dot_reco__pb2.GetRecommendationsRequest.SerializeToString,
+            reco_dot_v1_dot_reco__pb2.GetRecommendationsResponse.FromString,
+            options,
+            channel_credentials,
+            insecure,
+            call_credentials,
+            compression,
+            wait_for_ready,
+            timeout,
+            metadata,
+            _registered_method=True)
@@ -0,0 +1 @@
+# Analytics read API (HTTP/JSON) over the aggregate tables
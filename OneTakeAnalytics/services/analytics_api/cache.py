@@ -0,0 +1,108 @@
+"""Query-result cache invalidated by aggregate watermarks, and request coalescing.
+
+A cached result is stored with the watermark its aggregate table had when it was computed
+(default.aggregate_watermarks, advanced by every refresh_aggregates run). Once the job
+moves the watermark, lookups carry the new one and miss. Concurrent misses for the same key
+share one computation (SingleFlight), so a dashboard refresh storm costs one query.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """LRU of key -> (version, stored_at, value); a different version or an old entry misses."""
+
+    def __init__(self, max_entries: int, max_age_sec: float):
+        self._max_entries = max_entries
+        self._max_age_sec = max_age_sec
+        self._entries: OrderedDict[Hashable, tuple[Any, float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Any, now: float | None = None) -> Any | None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_version, stored_at, value = entry
+            if stored_version != version or now - stored_at > self._max_age_sec:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, version: Any, value: Any, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._entries[key] = (version, now, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SingleFlight:
+    """Run fn once per key at a time; callers arriving meanwhile wait for its result."""
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, Future[Any]] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> tuple[Any, bool]:
+        """(result, shared): shared is True for callers that joined another's call."""
+        with self._lock:
+            pending = self._calls.get(key)
+            if pending is None:
+                future: Future[Any] = Future()
+                self._calls[key] = future
+        if pending is not None:
+            return pending.result(), True
+        try:
+            result = fn()
+            future.set_result(result)
+            return result, False
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+class WatermarkTracker:
+    """Latest watermark per aggregate table, re-read every interval_sec in a daemon thread."""
+
+    def __init__(self, fetch: Callable[[], dict[str, Any]], interval_sec: float):
+        self._fetch = fetch
+        self._interval_sec = interval_sec
+        self._watermarks: dict[str, Any] = {}
+
+    def current(self, table: str) -> Any | None:
+        return self._watermarks.get(table)
+
+    def refresh(self) -> None:
+        # Replaced as a whole, so readers never see a partial update.
+        self._watermarks = dict(self._fetch())
+
+    def start(self) -> threading.Thread:
+        def _run() -> None:
+            while True:
+                try:
+                    self.refresh()
+                except Exception as e:
+                    logger.warning("reading aggregate watermarks failed: %s", e)
+                time.sleep(self._interval_sec)
+
+        thread = threading.Thread(target=_run, name="watermarks", daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,22 @@
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# .env at OneTakeAnalytics root (one level above services/analytics_api)
+_env_path = Path(__file__).resolve().parent.parent.parent / ".env"
+load_dotenv(_env_path)
+
+HTTP_PORT = int(os.environ.get("ANALYTICS_API_PORT", "8090"))
+CLICKHOUSE_HOST = os.environ.get("CLICKHOUSE_HOST", "localhost")
+CLICKHOUSE_PORT = int(os.environ.get("CLICKHOUSE_PORT", "9000"))
+CLICKHOUSE_USER = os.environ.get("CLICKHOUSE_USER", "default")
+CLICKHOUSE_PASSWORD = os.environ.get("CLICKHOUSE_PASSWORD", "default")
+# Result cache: entries kept (least recently used dropped) and how often the aggregate
+# watermarks that invalidate them are re-read
+CACHE_ENTRIES = int(os.environ.get("ANALYTICS_API_CACHE_ENTRIES", "2000"))
+WATERMARK_POLL_SEC = float(os.environ.get("ANALYTICS_API_WATERMARK_POLL_SEC", "5"))
+# Longest date range one request may ask for
+MAX_RANGE_DAYS = int(os.environ.get("ANALYTICS_API_MAX_RANGE_DAYS", "366"))
+# Cached results also expire after this long, for tables no job keeps a watermark for
+CACHE_MAX_AGE_SEC = float(os.environ.get("ANALYTICS_API_CACHE_MAX_AGE_SEC", "300"))
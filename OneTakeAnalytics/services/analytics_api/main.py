@@ -0,0 +1,5 @@
+"""Entry point for the Analytics read API (HTTP/JSON)."""
+from .server import serve
+
+if __name__ == "__main__":
+    serve()
@@ -0,0 +1,130 @@
+"""Dashboard queries over the aggregate tables, read through the result cache."""
+import logging
+import threading
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from clickhouse_driver import Client
+
+from .cache import ResultCache, SingleFlight, WatermarkTracker
+from .config import (
+    CLICKHOUSE_HOST,
+    CLICKHOUSE_PASSWORD,
+    CLICKHOUSE_PORT,
+    CLICKHOUSE_USER,
+)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Query:
+    table: str  # aggregate whose watermark invalidates cached results
+    sql: str
+    columns: tuple[str, ...]
+
+
+QUERIES = {
+    "dau": Query(
+        "daily_active_users",
+        """
+        SELECT date, dau
+        FROM default.daily_active_users FINAL
+        WHERE date BETWEEN %(start)s AND %(end)s
+        ORDER BY date
+        """,
+        ("date", "dau"),
+    ),
+    "top_posts": Query(
+        "post_daily_metrics",
+        """
+        SELECT toString(post_id), sum(views) AS v, sum(likes), sum(completion)
+        FROM default.post_daily_metrics FINAL
+        WHERE date BETWEEN %(start)s AND %(end)s
+        GROUP BY post_id
+        ORDER BY v DESC, post_id
+        LIMIT %(limit)s
+        """,
+        ("post_id", "views", "likes", "completion"),
+    ),
+    "post_daily": Query(
+        "post_daily_metrics",
+        """
+        SELECT date, views, likes, completion
+        FROM default.post_daily_metrics FINAL
+        WHERE post_id = %(post_id)s AND date BETWEEN %(start)s AND %(end)s
+        ORDER BY date
+        """,
+        ("date", "views", "likes", "completion"),
+    ),
+    "funnel": Query(
+        "funnel_record_to_publish",
+        """
+        SELECT date, step_name, unique_sessions, unique_users
+        FROM default.funnel_record_to_publish FINAL
+        WHERE date BETWEEN %(start)s AND %(end)s
+        ORDER BY date, unique_sessions DESC
+        """,
+        ("date", "step_name", "unique_sessions", "unique_users"),
+    ),
+}
+
+WATERMARKS_QUERY = "SELECT table_name, watermark FROM default.aggregate_watermarks FINAL"
+
+_local = threading.local()
+
+
+def _ch_client() -> Client:
+    """One connection per server thread (a Client is not safe to share)."""
+    client = getattr(_local, "client", None)
+    if client is None:
+        client = Client(
+            host=CLICKHOUSE_HOST,
+            port=CLICKHOUSE_PORT,
+            user=CLICKHOUSE_USER,
+            password=CLICKHOUSE_PASSWORD,
+        )
+        _local.client = client
+    return client
+
+
+def fetch_watermarks() -> dict[str, Any]:
+    return {str(t): w for t, w in _ch_client().execute(WATERMARKS_QUERY)}
+
+
+@dataclass
+class Result:
+    rows: list[dict[str, Any]]
+    watermark: Any
+    cache: str  # "hit", "miss" or "coalesced"
+
+
+class AnalyticsReader:
+    def __init__(
+        self,
+        cache: ResultCache,
+        watermarks: WatermarkTracker,
+        execute: Callable[[str, dict], list[tuple]] | None = None,
+    ):
+        self._cache = cache
+        self._watermarks = watermarks
+        self._flight = SingleFlight()
+        self._execute = execute or (lambda sql, params: _ch_client().execute(sql, params))
+
+    def read(self, name: str, params: dict[str, Any]) -> Result:
+        query = QUERIES[name]
+        version = self._watermarks.current(query.table)
+        key = (name, tuple(sorted(params.items())))
+        rows = self._cache.get(key, version)
+        if rows is not None:
+            return Result(rows, version, "hit")
+
+        def _load() -> list[dict[str, Any]]:
+            rows = self._execute(query.sql, params)
+            loaded = [dict(zip(query.columns, r, strict=True)) for r in rows]
+            self._cache.set(key, version, loaded)
+            return loaded
+
+        rows, shared = self._flight.do((key, version), _load)
+        return Result(rows, version, "coalesced" if shared else "miss")
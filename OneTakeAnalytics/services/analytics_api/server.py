@@ -0,0 +1,156 @@
+"""Analytics read API: DAU, post metrics and the funnel over date ranges, as JSON over HTTP.
+
+  GET /v1/dau?from=2026-05-01&to=2026-05-31
+  GET /v1/posts/top?from=...&to=...&limit=100
+  GET /v1/posts/<post_id>/daily?from=...&to=...
+  GET /v1/funnel?from=...&to=...
+  GET /healthz
+
+from/to are inclusive ISO dates (default: the last 30 days up to today). Responses are
+{"data": [...], "watermark": ...}, where watermark is how far the aggregate job had refreshed
+the table; the X-Cache header says whether the result came from the cache, ran a query,
+or joined a query another request had started.
+"""
+import json
+import logging
+import re
+import signal
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+from .cache import ResultCache, WatermarkTracker
+from .config import (
+    CACHE_ENTRIES,
+    CACHE_MAX_AGE_SEC,
+    HTTP_PORT,
+    MAX_RANGE_DAYS,
+    WATERMARK_POLL_SEC,
+)
+from .queries import AnalyticsReader, fetch_watermarks
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_RANGE_DAYS = 30
+DEFAULT_TOP_LIMIT = 100
+MAX_TOP_LIMIT = 1000
+
+_POST_DAILY = re.compile(r"^/v1/posts/([^/]+)/daily$")
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def _date_range(args: dict[str, str], today: date) -> dict[str, date]:
+    try:
+        end = date.fromisoformat(args["to"]) if "to" in args else today
+        start = (
+            date.fromisoformat(args["from"])
+            if "from" in args
+            else end - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+        )
+    except ValueError as e:
+        raise BadRequest(f"from/to must be YYYY-MM-DD: {e}") from None
+    if start > end:
+        raise BadRequest("from is after to")
+    if (end - start).days + 1 > MAX_RANGE_DAYS:
+        raise BadRequest(f"range is longer than {MAX_RANGE_DAYS} days")
+    return {"start": start, "end": end}
+
+
+def route(path: str, args: dict[str, str], today: date) -> tuple[str, dict[str, Any]] | None:
+    """(query name, params) for a request path, None if unknown; BadRequest on bad input."""
+    if path == "/v1/dau":
+        return "dau", _date_range(args, today)
+    if path == "/v1/funnel":
+        return "funnel", _date_range(args, today)
+    if path == "/v1/posts/top":
+        try:
+            limit = int(args.get("limit", DEFAULT_TOP_LIMIT))
+        except ValueError:
+            raise BadRequest("limit must be an integer") from None
+        if not 1 <= limit <= MAX_TOP_LIMIT:
+            raise BadRequest(f"limit must be between 1 and {MAX_TOP_LIMIT}")
+        return "top_posts", {**_date_range(args, today), "limit": limit}
+    match = _POST_DAILY.match(path)
+    if match:
+        try:
+            post_id = uuid.UUID(match.group(1))
+        except ValueError:
+            raise BadRequest("post_id must be a UUID") from None
+        return "post_daily", {**_date_range(args, today), "post_id": post_id}
+    return None
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, date | datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"not JSON serializable: {type(value).__name__}")
+
+
+def make_handler(reader: AnalyticsReader) -> type[BaseHTTPRequestHandler]:
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            url = urlsplit(self.path)
+            if url.path == "/healthz":
+                self._send(200, {"status": "ok"})
+                return
+            args = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try:
+                target = route(url.path, args, date.today())
+            except BadRequest as e:
+                self._send(400, {"error": str(e)})
+                return
+            if target is None:
+                self._send(404, {"error": "not found"})
+                return
+            name, params = target
+            try:
+                result = reader.read(name, params)
+            except Exception as e:
+                logger.exception("query %s %s failed: %s", name, params, e)
+                self._send(503, {"error": "query failed"})
+                return
+            self._send(
+                200, {"data": result.rows, "watermark": result.watermark}, cache=result.cache
+            )
+
+        def _send(self, status: int, body: dict[str, Any], cache: str | None = None) -> None:
+            data = json.dumps(body, default=_json_default).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            if cache is not None:
+                self.send_header("X-Cache", cache)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    return _Handler
+
+
+def serve() -> None:
+    watermarks = WatermarkTracker(fetch_watermarks, WATERMARK_POLL_SEC)
+    watermarks.start()
+    reader = AnalyticsReader(ResultCache(CACHE_ENTRIES, CACHE_MAX_AGE_SEC), watermarks)
+    server = ThreadingHTTPServer(("0.0.0.0", HTTP_PORT), make_handler(reader))
+    server.daemon_threads = True
+
+    def _stop(signum: int, _frame: object) -> None:
+        logger.info("Received signal %s, shutting down", signum)
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    logger.info("Analytics API listening on port %s", HTTP_PORT)
+    server.serve_forever()
+    server.server_close()
@@ -18,16 +18,18 @@ class BatchBuffer:
         self._thread: threading.Thread | None = None
         self._stop = threading.Event()
 
-    def add(self, row: dict) -> None:
+    def add(self, row: dict) -> bool:
+        """Queue row for insert; False if its event_id was seen recently (duplicate)."""
         event_id = row.get("event_id")
         with self._lock:
             if event_id and event_id in self._seen_ids:
-                return
+                return False
             self._buffer.append(row)
             if event_id:
                 self._seen_ids.add(event_id)
                 if len(self._seen_ids) > self._seen_max:
                     self._seen_ids.clear()
+            return True
 
     def _flush(self) -> None:
         with self._lock:
@@ -4,6 +4,7 @@ from clickhouse_driver import Client
 from .config import CLICKHOUSE_HOST, CLICKHOUSE_PORT, CLICKHOUSE_USER, CLICKHOUSE_PASSWORD
 
 EVENTS_TABLE = "default.events"
+# Same table as contracts/clickhouse/init/01_events.sql (kept identical, see its header).
 CREATE_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS default.events
 (
@@ -13,14 +14,18 @@ CREATE TABLE IF NOT EXISTS default.events
     session_id  String,
     event_name  LowCardinality(String),
     route       String,
-    entity_type Nullable(LowCardinality(String)),
+    entity_type LowCardinality(Nullable(String)),
     entity_id   Nullable(UUID),
     props_json  String,
-    trace_id    String
+    trace_id    String,
+    ingested_at DateTime64(3) DEFAULT now64(3),
+    INDEX idx_ingested_at ingested_at TYPE minmax GRANULARITY 4,
+    INDEX idx_user_id user_id TYPE bloom_filter(0.01) GRANULARITY 2,
+    INDEX idx_entity_id entity_id TYPE bloom_filter(0.01) GRANULARITY 2
 )
 ENGINE = MergeTree()
 PARTITION BY toYYYYMM(ts)
-ORDER BY (event_name, ts, user_id, entity_id)
+ORDER BY (event_name, ts, event_id)
 """
 
 
@@ -14,3 +14,7 @@ CLICKHOUSE_USER = os.environ.get("CLICKHOUSE_USER", "default")
 CLICKHOUSE_PASSWORD = os.environ.get("CLICKHOUSE_PASSWORD", "default")
 BATCH_SIZE = int(os.environ.get("BATCH_SIZE", "200"))
 BATCH_INTERVAL_SEC = float(os.environ.get("BATCH_INTERVAL_SEC", "1.5"))
+# In-memory sliding-window post counters served by the LiveCounters gRPC service
+LIVE_BUCKET_SEC = int(os.environ.get("LIVE_BUCKET_SEC", "300"))
+LIVE_WINDOW_SEC = int(os.environ.get("LIVE_WINDOW_SEC", "86400"))
+LIVE_TOPK_CAPACITY = int(os.environ.get("LIVE_TOPK_CAPACITY", "300"))
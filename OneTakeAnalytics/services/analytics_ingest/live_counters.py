@@ -0,0 +1,187 @@
+"""Sliding-window per-post counters for views, likes and completions, fed by TrackEvent.
+
+Each metric keeps a ring of time buckets (LIVE_BUCKET_SEC wide, LIVE_WINDOW_SEC in total).
+A bucket is a Space-Saving sketch bounded to LIVE_TOPK_CAPACITY posts: when full, a new post
+takes over the least-counted slot and inherits its count, so heavy hitters are never lost
+and counts can only be overestimated. A window query sums the buckets it covers; merged
+totals are memoised for MERGE_TTL_SEC so frequent readers do not re-merge every bucket.
+"""
+import heapq
+import math
+import threading
+import time
+
+from .config import LIVE_BUCKET_SEC, LIVE_TOPK_CAPACITY, LIVE_WINDOW_SEC
+
+METRIC_BY_EVENT = {"post_view": "views", "post_like": "likes", "watch_complete": "completions"}
+METRICS = ("views", "likes", "completions")
+MERGE_TTL_SEC = 1.0
+
+
+class SpaceSaving:
+    """Top-K counter over at most capacity keys (Metwally et al. Space-Saving)."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: dict[str, int] = {}
+        # Min-heap of (count, key); entries whose count is stale are skipped lazily.
+        self._heap: list[tuple[int, str]] = []
+
+    def add(self, key: str, n: int = 1) -> None:
+        counts = self.counts
+        if key in counts:
+            counts[key] += n
+        elif len(counts) < self.capacity:
+            counts[key] = n
+        else:
+            while True:
+                count, victim = heapq.heappop(self._heap)
+                if counts.get(victim) == count:
+                    break
+            del counts[victim]
+            counts[key] = count + n
+        heapq.heappush(self._heap, (counts[key], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(c, k) for k, c in counts.items()]
+            heapq.heapify(self._heap)
+
+
+class WindowedCounter:
+    """Ring of per-bucket SpaceSaving sketches covering window_sec."""
+
+    def __init__(self, bucket_sec: int, window_sec: int, capacity: int):
+        self.bucket_sec = bucket_sec
+        self.n_buckets = max(1, math.ceil(window_sec / bucket_sec))
+        self._capacity = capacity
+        self._ids = [-1] * self.n_buckets
+        self._buckets: list[SpaceSaving | None] = [None] * self.n_buckets
+        self._lock = threading.Lock()
+
+    @property
+    def window_sec(self) -> int:
+        return self.n_buckets * self.bucket_sec
+
+    def add(self, key: str, ts: float, now: float) -> None:
+        current = int(now // self.bucket_sec)
+        bucket = min(int(ts // self.bucket_sec), current)  # client clocks may run ahead
+        if bucket <= current - self.n_buckets:
+            return
+        slot = bucket % self.n_buckets
+        with self._lock:
+            if self._ids[slot] != bucket:
+                if self._ids[slot] > bucket:
+                    return  # slot already reused by a newer bucket
+                self._ids[slot] = bucket
+                self._buckets[slot] = SpaceSaving(self._capacity)
+            sketch = self._buckets[slot]
+            assert sketch is not None
+            sketch.add(key)
+
+    def totals(self, window_sec: int, now: float) -> dict[str, int]:
+        current = int(now // self.bucket_sec)
+        n = min(self.n_buckets, max(1, math.ceil(window_sec / self.bucket_sec)))
+        first = current - n + 1
+        merged: dict[str, int] = {}
+        with self._lock:
+            sketches = [
+                self._buckets[slot]
+                for slot in range(self.n_buckets)
+                if first <= self._ids[slot] <= current
+            ]
+            for sketch in sketches:
+                assert sketch is not None
+                for key, count in sketch.counts.items():
+                    merged[key] = merged.get(key, 0) + count
+        return merged
+
+
+class LiveCounters:
+    def __init__(
+        self,
+        bucket_sec: int = LIVE_BUCKET_SEC,
+        window_sec: int = LIVE_WINDOW_SEC,
+        capacity: int = LIVE_TOPK_CAPACITY,
+        started: float | None = None,
+    ):
+        self._counters = {m: WindowedCounter(bucket_sec, window_sec, capacity) for m in METRICS}
+        # Counters are in memory only: nothing before the process started has been counted.
+        self._started = time.time() if started is None else started
+        self._merged: dict[tuple[str, int], tuple[float, dict[str, int]]] = {}
+        self._merged_lock = threading.Lock()
+
+    @property
+    def window_sec(self) -> int:
+        return self._counters["views"].window_sec
+
+    def _window(self, window_sec: int) -> int:
+        counter = self._counters["views"]
+        if window_sec <= 0:
+            return counter.window_sec
+        buckets = math.ceil(window_sec / counter.bucket_sec)
+        return min(counter.window_sec, buckets * counter.bucket_sec)
+
+    def _covered(self, window_sec: int, now: float) -> int:
+        """Seconds of the window actually observed: short of it until the uptime reaches it."""
+        return min(self._window(window_sec), max(0, int(now - self._started)))
+
+    def record(
+        self,
+        event_name: str,
+        entity_type: str | None,
+        entity_id: str | None,
+        ts_ms: int,
+        now: float | None = None,
+    ) -> None:
+        metric = METRIC_BY_EVENT.get(event_name)
+        if metric is None or entity_type != "post" or not entity_id:
+            return
+        now = time.time() if now is None else now
+        self._counters[metric].add(entity_id, ts_ms / 1000 if ts_ms else now, now)
+
+    def totals(self, metric: str, window_sec: int, now: float | None = None) -> dict[str, int]:
+        """post_id -> count over the last window_sec (rounded up to whole buckets)."""
+        now = time.time() if now is None else now
+        window_sec = self._window(window_sec)
+        key = (metric, window_sec)
+        with self._merged_lock:
+            cached = self._merged.get(key)
+        if cached is not None and now - cached[0] < MERGE_TTL_SEC:
+            return cached[1]
+        merged = self._counters[metric].totals(window_sec, now)
+        with self._merged_lock:
+            self._merged[key] = (now, merged)
+        return merged
+
+    def top(
+        self,
+        metric: str,
+        window_sec: int,
+        limit: int,
+        exclude_ids: list[str] | None = None,
+        now: float | None = None,
+    ) -> tuple[list[tuple[str, int]], int]:
+        """(best limit (post_id, count) pairs, window covered in seconds)."""
+        if metric not in self._counters:
+            raise ValueError(f"unknown metric {metric!r}")
+        now = time.time() if now is None else now
+        totals = self.totals(metric, window_sec, now)
+        exclude_set = set(exclude_ids or ())
+        ranked = heapq.nlargest(
+            limit + len(exclude_set), totals.items(), key=lambda item: item[1]
+        )
+        top = [(pid, count) for pid, count in ranked if pid not in exclude_set][:limit]
+        return top, self._covered(window_sec, now)
+
+    def counts(
+        self, post_ids: list[str], window_sec: int, now: float | None = None
+    ) -> tuple[dict[str, tuple[int, int, int]], int]:
+        """post_id -> (views, likes, completions), and the window covered in seconds."""
+        now = time.time() if now is None else now
+        views, likes, completions = (self.totals(m, window_sec, now) for m in METRICS)
+        result = {
+            pid: (views.get(pid, 0), likes.get(pid, 0), completions.get(pid, 0)) for pid in post_ids
+        }
+        return result, self._covered(window_sec, now)
+
+
+live_counters = LiveCounters()
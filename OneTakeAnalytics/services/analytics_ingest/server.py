@@ -8,6 +8,7 @@ import grpc
 from .config import GRPC_PORT, BATCH_SIZE, BATCH_INTERVAL_SEC
 from .clickhouse_writer import ClickHouseWriter
 from .batch_buffer import BatchBuffer
+from .live_counters import LiveCounters, live_counters
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -20,8 +21,9 @@ from analytics.v1 import analytics_pb2, analytics_pb2_grpc
 
 
 class AnalyticsIngestServicer(analytics_pb2_grpc.AnalyticsIngestServicer):
-    def __init__(self, buffer: BatchBuffer):
+    def __init__(self, buffer: BatchBuffer, counters: LiveCounters | None = None):
         self._buffer = buffer
+        self._counters = counters
 
     def TrackEvent(self, request, context):
         try:
@@ -37,13 +39,48 @@ class AnalyticsIngestServicer(analytics_pb2_grpc.AnalyticsIngestServicer):
                 "props_json": request.props_json or "{}",
                 "trace_id": request.trace_id or "",
             }
-            self._buffer.add(row)
+            if self._buffer.add(row) and self._counters is not None:
+                self._counters.record(
+                    row["event_name"], row["entity_type"], row["entity_id"], request.ts
+                )
             return analytics_pb2.TrackEventResponse(accepted=True)
         except Exception as e:
             logger.exception("TrackEvent error")
             return analytics_pb2.TrackEventResponse(accepted=False, error=str(e))
 
 
+class LiveCountersServicer(analytics_pb2_grpc.LiveCountersServicer):
+    def __init__(self, counters: LiveCounters):
+        self._counters = counters
+
+    def GetTopPosts(self, request, context):
+        try:
+            top, window_sec = self._counters.top(
+                request.metric or "views",
+                request.window_sec,
+                request.limit or 10,
+                list(request.exclude_post_ids),
+            )
+        except ValueError as e:
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        return analytics_pb2.GetTopPostsResponse(
+            posts=[analytics_pb2.PostCount(post_id=pid, count=count) for pid, count in top],
+            window_sec=window_sec,
+        )
+
+    def GetPostCounters(self, request, context):
+        counts, window_sec = self._counters.counts(list(request.post_ids), request.window_sec)
+        return analytics_pb2.GetPostCountersResponse(
+            posts=[
+                analytics_pb2.PostCounters(
+                    post_id=pid, views=views, likes=likes, completions=completions
+                )
+                for pid, (views, likes, completions) in counts.items()
+            ],
+            window_sec=window_sec,
+        )
+
+
 def serve():
     writer = ClickHouseWriter()
     buffer = BatchBuffer(
@@ -55,7 +92,10 @@ def serve():
 
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
     analytics_pb2_grpc.add_AnalyticsIngestServicer_to_server(
-        AnalyticsIngestServicer(buffer), server
+        AnalyticsIngestServicer(buffer, live_counters), server
+    )
+    analytics_pb2_grpc.add_LiveCountersServicer_to_server(
+        LiveCountersServicer(live_counters), server
     )
     server.add_insecure_port(f"[::]:{GRPC_PORT}")
     server.start()
@@ -0,0 +1,117 @@
+"""Admission control: bounded concurrency, queue-time tracking and an overload mode.
+
+At most max_concurrent requests run the full pipeline; the rest wait for a slot up to
+queue_timeout_sec and are shed after that. Queue time is tracked as an EWMA. Once it
+exceeds enter_ms the service turns degraded: requests that cannot get a slot right away
+are answered from cache or the in-memory trending snapshot instead of queueing (counted
+as a full queue wait in the EWMA, since that is what they avoided). It recovers once the
+EWMA falls below exit_ms and it has been degraded for at least min_degraded_sec.
+"""
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+
+from .config import (
+    ADMISSION_QUEUE_MS,
+    DEGRADE_ENTER_QUEUE_MS,
+    DEGRADE_EXIT_QUEUE_MS,
+    DEGRADE_MIN_SEC,
+    MAX_CONCURRENT,
+)
+from .deadline import Deadline
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ADMIT = "admit"
+DEGRADE = "degrade"
+SHED = "shed"
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT,
+        queue_timeout_sec: float = ADMISSION_QUEUE_MS / 1000,
+        enter_ms: float = DEGRADE_ENTER_QUEUE_MS,
+        exit_ms: float = DEGRADE_EXIT_QUEUE_MS,
+        min_degraded_sec: float = DEGRADE_MIN_SEC,
+        alpha: float = 0.2,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._queue_timeout_sec = queue_timeout_sec
+        self._enter_ms = enter_ms
+        self._exit_ms = exit_ms
+        self._min_degraded_sec = min_degraded_sec
+        self._alpha = alpha
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._ewma_ms = 0.0
+        self._inflight = 0
+        self._degraded_since: float | None = None
+
+    @property
+    def degraded(self) -> bool:
+        return self._degraded_since is not None
+
+    @property
+    def queue_ewma_ms(self) -> float:
+        return self._ewma_ms
+
+    def _observe(self, queue_sec: float) -> None:
+        now = self._clock()
+        with self._lock:
+            self._ewma_ms += self._alpha * (queue_sec * 1000 - self._ewma_ms)
+            if self._degraded_since is None and self._ewma_ms > self._enter_ms:
+                self._degraded_since = now
+                metrics.inc("reco_degraded_transitions_total", to="degraded")
+                logger.warning("reco overloaded (queue ewma %.0fms): degraded mode", self._ewma_ms)
+            elif (
+                self._degraded_since is not None
+                and self._ewma_ms < self._exit_ms
+                and now - self._degraded_since >= self._min_degraded_sec
+            ):
+                self._degraded_since = None
+                metrics.inc("reco_degraded_transitions_total", to="normal")
+                logger.info("reco load back to normal (queue ewma %.0fms)", self._ewma_ms)
+            metrics.set_gauge("reco_queue_time_ewma_ms", self._ewma_ms)
+            metrics.set_gauge("reco_degraded_mode", float(self._degraded_since is not None))
+
+    def _acquire(self, deadline: Deadline | None) -> str:
+        if self.degraded:
+            admitted = self._slots.acquire(blocking=False)
+            self._observe(0.0 if admitted else self._queue_timeout_sec)
+            if admitted:
+                return ADMIT
+            metrics.inc("reco_degraded_total")
+            return DEGRADE
+        timeout = self._queue_timeout_sec
+        if deadline is not None:
+            timeout = min(timeout, deadline.remaining())
+        started = self._clock()
+        admitted = self._slots.acquire(timeout=timeout)
+        self._observe(self._clock() - started)
+        if admitted:
+            return ADMIT
+        metrics.inc("reco_shed_total")
+        return SHED
+
+    @contextmanager
+    def admit(self, deadline: Deadline | None = None) -> Iterator[str]:
+        """Yield ADMIT (full pipeline), DEGRADE (cache / trending only) or SHED (reject)."""
+        decision = self._acquire(deadline)
+        if decision == ADMIT:
+            with self._lock:
+                self._inflight += 1
+                metrics.set_gauge("reco_inflight_requests", self._inflight)
+        try:
+            yield decision
+        finally:
+            if decision == ADMIT:
+                with self._lock:
+                    self._inflight -= 1
+                    metrics.set_gauge("reco_inflight_requests", self._inflight)
+                self._slots.release()
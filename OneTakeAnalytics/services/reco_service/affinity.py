@@ -0,0 +1,20 @@
+"""Precomputed per-user tag-affinity profiles (written by jobs/aggregates/build_tag_affinity)."""
+import logging
+
+from .config import AFFINITY_PATH, MODEL_RELOAD_SEC
+from .topk_store import ReloadingTopKStore
+
+logger = logging.getLogger(__name__)
+
+affinity_store = ReloadingTopKStore(AFFINITY_PATH, check_interval_sec=MODEL_RELOAD_SEC)
+
+
+def get_user_affinity(user_id: str, n: int = 10) -> list[tuple[str, float]] | None:
+    """Top-n (tag, weight) for user_id, heaviest first; None when the user has no profile yet."""
+    store = affinity_store.get()
+    if store is None or not user_id:
+        return None
+    pairs = store.lookup(user_id)
+    if not pairs:
+        return None
+    return [(store.vocab_at(idx), weight) for idx, weight in pairs[:n]]
@@ -2,8 +2,12 @@
 import logging
 import threading
 import time
+from collections.abc import Callable
 from typing import Any
 
+from .metrics import metrics
+from .shm_cache import SharedMemoryCache
+
 logger = logging.getLogger(__name__)
 
 
@@ -44,3 +48,84 @@ class RecoCache:
         k = self._key(user_id, feed_type, context_post_id, context_tags, exclude_ids)
         with self._lock:
             self._store[k] = (items, time.time() + self._ttl_seconds)
+
+    def export(self, max_entries: int) -> list[tuple[str, Any, float]]:
+        """Up to max_entries live (key, items, expires_at) entries, most recently set first."""
+        now = time.time()
+        with self._lock:
+            entries = [(k, v, exp) for k, (v, exp) in self._store.items() if exp > now]
+        entries.sort(key=lambda e: -e[2])
+        return entries[:max_entries]
+
+    def restore(self, entries: list[tuple[str, Any, float]]) -> int:
+        """Re-insert exported entries that have not expired yet; returns how many."""
+        if not self._enabled:
+            return 0
+        now = time.time()
+        live = [(k, v, exp) for k, v, exp in entries if exp > now]
+        with self._lock:
+            for k, v, exp in live:
+                self._store.setdefault(k, (v, exp))
+        return len(live)
+
+
+class SharedRecoCache(RecoCache):
+    """RecoCache over a SharedMemoryCache, so worker processes share hits.
+
+    Values cross processes as bytes: encode/decode convert the item lists.
+    """
+
+    def __init__(
+        self,
+        shm: SharedMemoryCache,
+        ttl_minutes: int,
+        encode: Callable[[list], bytes],
+        decode: Callable[[bytes], list],
+        enabled: bool = True,
+    ):
+        super().__init__(ttl_minutes, enabled)
+        self._shm = shm
+        self._encode = encode
+        self._decode = decode
+
+    def get(
+        self,
+        user_id: str,
+        feed_type: str,
+        context_post_id: str = "",
+        context_tags: tuple[str, ...] = (),
+        exclude_ids: tuple[str, ...] = (),
+    ) -> list | None:
+        if not self._enabled:
+            return None
+        k = self._key(user_id, feed_type, context_post_id, context_tags, exclude_ids)
+        raw = self._shm.get(k)
+        return None if raw is None else self._decode(raw)
+
+    def set(
+        self,
+        user_id: str,
+        feed_type: str,
+        items: list,
+        context_post_id: str = "",
+        context_tags: tuple[str, ...] = (),
+        exclude_ids: tuple[str, ...] = (),
+    ) -> None:
+        if not self._enabled:
+            return
+        k = self._key(user_id, feed_type, context_post_id, context_tags, exclude_ids)
+        if not self._shm.set(k, self._encode(items), self._ttl_seconds):
+            metrics.inc("reco_shared_cache_oversize_total")
+
+    def export(self, max_entries: int) -> list[tuple[str, Any, float]]:
+        return []  # slots are not enumerable; the shared segment outlives worker restarts anyway
+
+    def restore(self, entries: list[tuple[str, Any, float]]) -> int:
+        if not self._enabled:
+            return 0
+        now = time.time()
+        restored = 0
+        for k, v, exp in entries:
+            if exp > now and self._shm.set(k, self._encode(v), exp - now):
+                restored += 1
+        return restored
@@ -13,5 +13,93 @@ CLICKHOUSE_PORT = int(os.environ.get("CLICKHOUSE_PORT", "9000"))
 CLICKHOUSE_USER = os.environ.get("CLICKHOUSE_USER", "default")
 CLICKHOUSE_PASSWORD = os.environ.get("CLICKHOUSE_PASSWORD", "default")
 CORE_API_URL = os.environ.get("CORE_API_URL", "http://localhost:5000")
+# Shared token for Core's /api/internal bulk endpoints (Core's INTERNAL_API_TOKEN)
+CORE_INTERNAL_TOKEN = os.environ.get("CORE_INTERNAL_TOKEN", "")
 CACHE_TTL_MINUTES = int(os.environ.get("CACHE_TTL_MINUTES", "15"))
 CACHE_ENABLED = os.environ.get("CACHE_ENABLED", "true").lower() in ("true", "1", "yes")
+# Deadline used when the caller sets none; reserve is kept back for building the response
+DEFAULT_DEADLINE_MS = int(os.environ.get("RECO_DEFAULT_DEADLINE_MS", "1500"))
+DEADLINE_RESERVE_MS = int(os.environ.get("RECO_DEADLINE_RESERVE_MS", "50"))
+STAGE_WORKERS = int(os.environ.get("RECO_STAGE_WORKERS", "16"))
+TRENDING_SNAPSHOT_SIZE = int(os.environ.get("TRENDING_SNAPSHOT_SIZE", "200"))
+TRENDING_SNAPSHOT_INTERVAL_SEC = float(os.environ.get("TRENDING_SNAPSHOT_INTERVAL_SEC", "60"))
+BATCH_WORKERS = int(os.environ.get("RECO_BATCH_WORKERS", "4"))
+SESSION_TTL_SEC = float(os.environ.get("RECO_SESSION_TTL_SEC", "1800"))
+SESSION_MAX = int(os.environ.get("RECO_SESSION_MAX", "10000"))
+SESSION_MAX_ITEMS = int(os.environ.get("RECO_SESSION_MAX_ITEMS", "200"))
+SESSION_DEPTH_PAGES = int(os.environ.get("RECO_SESSION_DEPTH_PAGES", "10"))
+POST_META_MAX = int(os.environ.get("RECO_POST_META_MAX", "50000"))
+SCORING_ENABLED = os.environ.get("RECO_SCORING_ENABLED", "true").lower() in ("true", "1", "yes")
+# Candidates gathered per requested item before ranking, and an absolute cap
+CANDIDATE_MULTIPLIER = int(os.environ.get("RECO_CANDIDATE_MULTIPLIER", "3"))
+CANDIDATE_POOL_MAX = int(os.environ.get("RECO_CANDIDATE_POOL_MAX", "300"))
+SCORE_WEIGHTS = os.environ.get(
+    "RECO_SCORE_WEIGHTS",
+    "source=1.0,tag_overlap=2.0,recency=1.0,views_24h=1.0,views_72h=0.5,"
+    "like_rate=1.0,completion_rate=1.0",
+)
+RECENCY_HALF_LIFE_HOURS = float(os.environ.get("RECO_RECENCY_HALF_LIFE_HOURS", "48"))
+# Offline model files (written by jobs/aggregates, memory-mapped here)
+_data_dir = Path(__file__).resolve().parent.parent.parent / "data"
+COVISIT_PATH = os.environ.get("RECO_COVISIT_PATH", str(_data_dir / "covisit.bin"))
+MODEL_RELOAD_SEC = float(os.environ.get("RECO_MODEL_RELOAD_SEC", "60"))
+AFFINITY_PATH = os.environ.get("RECO_AFFINITY_PATH", str(_data_dir / "tag_affinity.bin"))
+# In-process MinHash LSH index over post tag sets, synced from Core GET /api/posts
+LSH_ENABLED = os.environ.get("RECO_LSH_ENABLED", "true").lower() in ("true", "1", "yes")
+LSH_NUM_PERM = int(os.environ.get("RECO_LSH_NUM_PERM", "64"))
+LSH_BANDS = int(os.environ.get("RECO_LSH_BANDS", "32"))
+LSH_MAX_POSTS = int(os.environ.get("RECO_LSH_MAX_POSTS", "50000"))
+LSH_SYNC_INTERVAL_SEC = float(os.environ.get("RECO_LSH_SYNC_INTERVAL_SEC", "30"))
+# Per-user filter of recently served / viewed posts; memory per user = 2 * SEEN_FILTER_BITS / 8
+SEEN_FILTER_ENABLED = os.environ.get("RECO_SEEN_FILTER_ENABLED", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+SEEN_FILTER_BITS = int(os.environ.get("RECO_SEEN_FILTER_BITS", "4096"))
+SEEN_FILTER_HASHES = int(os.environ.get("RECO_SEEN_FILTER_HASHES", "6"))
+SEEN_FILTER_CAPACITY = int(os.environ.get("RECO_SEEN_FILTER_CAPACITY", "400"))
+SEEN_FILTER_ROTATE_SEC = float(os.environ.get("RECO_SEEN_FILTER_ROTATE_SEC", "21600"))
+SEEN_FILTER_MAX_USERS = int(os.environ.get("RECO_SEEN_FILTER_MAX_USERS", "20000"))
+SEEN_VIEWS_POLL_SEC = float(os.environ.get("RECO_SEEN_VIEWS_POLL_SEC", "15"))
+# FOLLOWING feed: follow graph and creators' recent posts, kept in memory
+FOLLOWING_ENABLED = os.environ.get("RECO_FOLLOWING_ENABLED", "true").lower() in ("true", "1", "yes")
+FOLLOWING_DAYS = int(os.environ.get("RECO_FOLLOWING_DAYS", "30"))
+FOLLOWING_POSTS_PER_CREATOR = int(os.environ.get("RECO_FOLLOWING_POSTS_PER_CREATOR", "50"))
+FOLLOWING_REFRESH_SEC = float(os.environ.get("RECO_FOLLOWING_REFRESH_SEC", "30"))
+FOLLOWING_RELOAD_SEC = float(os.environ.get("RECO_FOLLOWING_RELOAD_SEC", "600"))
+# Ingest LiveCounters gRPC address (host:port) for second-fresh trending; empty = ClickHouse only
+LIVE_COUNTERS_ADDR = os.environ.get("RECO_LIVE_COUNTERS_ADDR", "")
+LIVE_COUNTERS_TIMEOUT_SEC = float(os.environ.get("RECO_LIVE_COUNTERS_TIMEOUT_MS", "200")) / 1000
+# Time-decayed trending from the post_hourly_counts rollup
+DECAYED_TRENDING_ENABLED = os.environ.get("RECO_DECAYED_TRENDING_ENABLED", "true").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+TRENDING_HALF_LIFE_HOURS = float(os.environ.get("RECO_TRENDING_HALF_LIFE_HOURS", "24"))
+TRENDING_WEIGHTS = os.environ.get("RECO_TRENDING_WEIGHTS", "views=1.0,likes=3.0,completions=2.0")
+TRENDING_LOOKBACK_HOURS = int(os.environ.get("RECO_TRENDING_LOOKBACK_HOURS", "336"))
+# Admission control: gRPC threads, requests computed at once, and overload (degraded) mode
+GRPC_WORKERS = int(os.environ.get("RECO_GRPC_WORKERS", "16"))
+MAX_CONCURRENT = int(os.environ.get("RECO_MAX_CONCURRENT", "8"))
+ADMISSION_QUEUE_MS = int(os.environ.get("RECO_ADMISSION_QUEUE_MS", "250"))
+DEGRADE_ENTER_QUEUE_MS = float(os.environ.get("RECO_DEGRADE_ENTER_QUEUE_MS", "100"))
+DEGRADE_EXIT_QUEUE_MS = float(os.environ.get("RECO_DEGRADE_EXIT_QUEUE_MS", "20"))
+DEGRADE_MIN_SEC = float(os.environ.get("RECO_DEGRADE_MIN_SEC", "10"))
+METRICS_PORT = int(os.environ.get("RECO_METRICS_PORT", "9102"))
+# Pre-fork serving: worker processes sharing a shared-memory cache; 1 = single process
+PROCESSES = int(os.environ.get("RECO_PROCESSES", "1"))
+SHARED_CACHE_SLOTS = int(os.environ.get("RECO_SHARED_CACHE_SLOTS", "8192"))
+SHARED_CACHE_SLOT_BYTES = int(os.environ.get("RECO_SHARED_CACHE_SLOT_BYTES", "8192"))
+SHARED_CACHE_LOCKS = int(os.environ.get("RECO_SHARED_CACHE_LOCKS", "64"))
+SHARED_DIR = os.environ.get("RECO_SHARED_DIR", str(_data_dir / "shared"))
+SHARED_POLL_SEC = float(os.environ.get("RECO_SHARED_POLL_SEC", "2"))
+# Warm-start snapshot of the cache, trending state and post index; interval 0 disables
+SNAPSHOT_PATH = os.environ.get("RECO_SNAPSHOT_PATH", str(_data_dir / "reco_snapshot.bin"))
+SNAPSHOT_INTERVAL_SEC = float(os.environ.get("RECO_SNAPSHOT_INTERVAL_SEC", "60"))
+SNAPSHOT_MAX_AGE_SEC = float(os.environ.get("RECO_SNAPSHOT_MAX_AGE_SEC", "900"))
+SNAPSHOT_CACHE_ENTRIES = int(os.environ.get("RECO_SNAPSHOT_CACHE_ENTRIES", "20000"))
+# Slow-request log: traces at least this slow (0 disables) are logged, for this sampled share
+SLOW_LOG_MS = float(os.environ.get("RECO_SLOW_LOG_MS", "0"))
+SLOW_LOG_SAMPLE = float(os.environ.get("RECO_SLOW_LOG_SAMPLE", "1.0"))
@@ -0,0 +1,35 @@
+"""Viewers also watched: item-to-item co-occurrence neighbours from an offline model file."""
+import logging
+
+from .config import COVISIT_PATH, MODEL_RELOAD_SEC
+from .deadline import Deadline
+from .topk_store import ReloadingTopKStore
+
+logger = logging.getLogger(__name__)
+
+REASON = "viewers_also_watched"
+
+covisit_store = ReloadingTopKStore(COVISIT_PATH, check_interval_sec=MODEL_RELOAD_SEC)
+
+
+def get_covisited(
+    post_id: str,
+    limit: int,
+    exclude_ids: list[str],
+    deadline: Deadline | None = None,
+) -> list[tuple[str, float, str]]:
+    """Return (post_id, weight, reason) of posts co-viewed/co-liked with post_id."""
+    store = covisit_store.get()
+    if store is None or not post_id or limit <= 0:
+        return []
+    exclude_set = set(exclude_ids)
+    exclude_set.add(post_id)
+    result = []
+    for idx, weight in store.lookup(post_id):
+        pid = store.key_at(idx)
+        if pid in exclude_set:
+            continue
+        result.append((pid, weight, REASON))
+        if len(result) >= limit:
+            break
+    return result
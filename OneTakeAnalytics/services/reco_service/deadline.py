@@ -0,0 +1,134 @@
+"""Request deadline and per-stage latency budgets for the reco pipeline."""
+import logging
+import time
+from collections.abc import Callable
+from concurrent import futures
+from typing import Any
+
+from .config import STAGE_WORKERS
+from .metrics import metrics
+from .tracing import run_in_context, span
+
+logger = logging.getLogger(__name__)
+
+# Smallest timeout handed to an outbound call; below this a request cannot complete anyway.
+MIN_CALL_TIMEOUT_SEC = 0.05
+
+# Relative share of the remaining deadline for each stage, in pipeline order.
+STAGE_SHARES: tuple[tuple[str, float], ...] = (
+    ("similar_by_tags", 0.3),
+    ("affinity", 0.45),
+    ("watch_based", 0.25),
+    ("liked_based", 0.2),
+    ("trending", 0.15),
+    ("scoring", 0.1),
+)
+
+# reco_stage_candidates histogram bounds (candidates returned per stage run).
+CANDIDATE_BUCKETS = (0, 1, 5, 10, 25, 50, 100, 200, 300)
+
+_executor = futures.ThreadPoolExecutor(max_workers=STAGE_WORKERS, thread_name_prefix="reco-stage")
+
+
+class Deadline:
+    """Absolute point in time (monotonic clock) by which work must finish."""
+
+    def __init__(self, timeout_sec: float):
+        self._expires_at = time.monotonic() + max(0.0, timeout_sec)
+
+    @classmethod
+    def from_context(cls, context: Any, default_sec: float, reserve_sec: float = 0.0) -> "Deadline":
+        """Build from the gRPC context's remaining time, or default_sec if the caller set none."""
+        remaining = None
+        if context is not None:
+            try:
+                remaining = context.time_remaining()
+            except Exception:
+                remaining = None
+        if remaining is None:
+            remaining = default_sec
+        return cls(remaining - reserve_sec)
+
+    def remaining(self) -> float:
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def cap(self, timeout_sec: float) -> float:
+        """Clamp an outbound call timeout to what is left of the deadline."""
+        return max(MIN_CALL_TIMEOUT_SEC, min(timeout_sec, self.remaining()))
+
+
+class StageRunner:
+    """Runs pipeline stages, each cut off after its share of the remaining deadline.
+
+    A stage gets remaining * share / (sum of shares of this and later stages), so time
+    left unused by a fast or skipped stage flows to the stages after it. Stages that
+    will not run at all (alternatives to each other) are dropped up front with skip().
+    """
+
+    def __init__(self, deadline: Deadline, shares: tuple[tuple[str, float], ...] = STAGE_SHARES):
+        self.deadline = deadline
+        self._shares = shares
+        self.timed_out: list[str] = []
+
+    def skip(self, *stages: str) -> None:
+        self._shares = tuple((name, w) for name, w in self._shares if name not in stages)
+
+    def budget(self, stage: str) -> float:
+        names = [name for name, _ in self._shares]
+        if stage not in names:
+            return self.deadline.remaining()
+        idx = names.index(stage)
+        share = self._shares[idx][1]
+        total = sum(w for _, w in self._shares[idx:])
+        return self.deadline.remaining() * share / total if total > 0 else 0.0
+
+    def run(
+        self,
+        stage: str,
+        fn: Callable[..., list[tuple[str, float, str]]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> list[tuple[str, float, str]]:
+        """Call fn(*args, deadline=<stage deadline>, **kwargs); return [] if it overruns."""
+        budget = self.budget(stage)
+        with span("stage", stage, budget_ms=round(budget * 1000, 1)) as attrs:
+            result = self._run(stage, budget, fn, *args, **kwargs)
+            attrs["candidates"] = len(result)
+            if stage in self.timed_out:
+                attrs["timed_out"] = True
+        metrics.observe("reco_stage_candidates", len(result), CANDIDATE_BUCKETS, stage=stage)
+        return result
+
+    def _run(
+        self,
+        stage: str,
+        budget: float,
+        fn: Callable[..., list[tuple[str, float, str]]],
+        *args: Any,
+        **kwargs: Any,
+    ) -> list[tuple[str, float, str]]:
+        if budget < MIN_CALL_TIMEOUT_SEC:
+            self._record_timeout(stage, budget)
+            return []
+        future = _executor.submit(run_in_context(fn), *args, deadline=Deadline(budget), **kwargs)
+        try:
+            return future.result(timeout=budget)
+        except futures.TimeoutError:
+            self._record_timeout(stage, budget)
+            return []
+        except Exception as e:
+            logger.exception("reco stage %s failed: %s", stage, e)
+            metrics.inc("reco_stage_errors_total", stage=stage)
+            return []
+
+    @property
+    def complete(self) -> bool:
+        return not self.timed_out
+
+    def _record_timeout(self, stage: str, budget: float) -> None:
+        self.timed_out.append(stage)
+        metrics.inc("reco_stage_timeouts_total", stage=stage)
+        logger.warning("reco stage %s exceeded budget %.0fms", stage, budget * 1000)
@@ -0,0 +1,260 @@
+"""FOLLOWING feed: recent posts of followed creators from an in-memory follow graph.
+
+The follow graph and each creator's recent public posts are bulk-loaded from Core's
+internal export endpoints (/api/internal/follows, /api/internal/recent-posts), the source
+of truth. Between loads, follow / unfollow / publish_success events polled after a
+watermark are applied as increments, and a periodic full reload from Core repairs what
+events cannot express: lost events, follows older than analytics and deleted posts.
+"""
+import bisect
+import heapq
+import logging
+import threading
+import time
+from collections.abc import Iterator
+from datetime import UTC, datetime, timedelta
+from typing import Any
+
+import requests
+from clickhouse_driver import Client
+
+from .config import (
+    CLICKHOUSE_HOST,
+    CLICKHOUSE_PASSWORD,
+    CLICKHOUSE_PORT,
+    CLICKHOUSE_USER,
+    CORE_API_URL,
+    CORE_INTERNAL_TOKEN,
+    FOLLOWING_DAYS,
+    FOLLOWING_POSTS_PER_CREATOR,
+    FOLLOWING_RELOAD_SEC,
+    RECENCY_HALF_LIFE_HOURS,
+)
+
+logger = logging.getLogger(__name__)
+
+# Events are re-read this far behind the watermark to pick up late-arriving ones.
+EVENTS_OVERLAP_SEC = 60
+CORE_PAGE_SIZE = 5000
+HTTP_TIMEOUT_SEC = 10.0
+
+FOLLOW_CHANGES_QUERY = """
+SELECT toString(user_id), toString(entity_id), event_name = 'follow', ts
+FROM default.events
+WHERE event_name IN ('follow', 'unfollow')
+  AND entity_type = 'user'
+  AND user_id IS NOT NULL
+  AND entity_id IS NOT NULL
+  AND ts > %(since)s
+ORDER BY ts
+"""
+
+CREATOR_POSTS_QUERY = """
+SELECT
+    toString(user_id) AS creator,
+    toString(entity_id) AS post_id,
+    toUnixTimestamp64Milli(ts) / 1000 AS published_at,
+    ts
+FROM default.events
+WHERE event_name = 'publish_success'
+  AND entity_type = 'post'
+  AND user_id IS NOT NULL
+  AND entity_id IS NOT NULL
+  AND ts >= now() - INTERVAL %(days)s DAY
+  AND ts > %(since)s
+ORDER BY user_id, ts DESC
+LIMIT %(per_creator)s BY user_id
+"""
+
+
+class FollowingIndex:
+    """follower -> followed creators, creator -> recent (published_at, post_id) newest first."""
+
+    def __init__(
+        self,
+        posts_per_creator: int = FOLLOWING_POSTS_PER_CREATOR,
+        max_age_sec: float = FOLLOWING_DAYS * 86400,
+    ):
+        self._posts_per_creator = posts_per_creator
+        self._max_age_sec = max_age_sec
+        self._follows: dict[str, set[str]] = {}
+        # Ascending by published_at, replaced (never mutated) on insert so feed() can merge
+        # the lists without holding the lock.
+        self._posts: dict[str, list[tuple[float, str]]] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def set_follow(self, follower: str, creator: str, following: bool) -> None:
+        with self._lock:
+            if following:
+                self._follows.setdefault(follower, set()).add(creator)
+            elif follower in self._follows:
+                self._follows[follower].discard(creator)
+                if not self._follows[follower]:
+                    del self._follows[follower]
+
+    def add_post(self, creator: str, post_id: str, published_at: float) -> None:
+        with self._lock:
+            posts = list(self._posts.get(creator, ()))
+            if any(pid == post_id for _, pid in posts):
+                return
+            bisect.insort(posts, (published_at, post_id))
+            self._posts[creator] = posts[-self._posts_per_creator :]
+
+    def followed(self, follower: str) -> frozenset[str]:
+        with self._lock:
+            return frozenset(self._follows.get(follower, ()))
+
+    def feed(
+        self,
+        user_id: str,
+        limit: int,
+        exclude_ids: list[str],
+        now: float | None = None,
+        half_life_hours: float = RECENCY_HALF_LIFE_HOURS,
+    ) -> list[tuple[str, float, str]]:
+        """Newest posts across followed creators as (post_id, recency score, "following").
+
+        Each creator's list is already sorted, so a k-way heap merge yields the newest
+        limit posts in O(F + limit * log F) for F followed creators.
+        """
+        if not user_id or limit <= 0:
+            return []
+        now = time.time() if now is None else now
+        cutoff = now - self._max_age_sec
+        with self._lock:
+            lists = [self._posts[c] for c in self._follows.get(user_id, ()) if c in self._posts]
+        # Heap of each creator's newest unread post: (-published_at, list index, position).
+        heap = [(-posts[-1][0], i, len(posts) - 1) for i, posts in enumerate(lists)]
+        heapq.heapify(heap)
+        exclude_set = set(exclude_ids)
+        result: list[tuple[str, float, str]] = []
+        while heap and len(result) < limit:
+            neg_published_at, i, pos = heapq.heappop(heap)
+            if -neg_published_at < cutoff:
+                break
+            if pos > 0:
+                heapq.heappush(heap, (-lists[i][pos - 1][0], i, pos - 1))
+            post_id = lists[i][pos][1]
+            if post_id in exclude_set:
+                continue
+            age_hours = max(0.0, now + neg_published_at) / 3600.0
+            result.append((post_id, 2.0 ** (-age_hours / half_life_hours), "following"))
+        return result
+
+    def load(self) -> datetime:
+        """Bulk-load the graph and recent posts from Core; returns the watermark for update().
+
+        Replaces the whole index, so follows and posts that events missed or that were
+        deleted since the last load are corrected.
+        """
+        # Naive UTC, like the ts values ClickHouse returns and compares it with.
+        started = datetime.now(UTC).replace(tzinfo=None)
+        graph: dict[str, set[str]] = {}
+        for edge in _core_pages("follows", "follows", {}):
+            graph.setdefault(str(edge["followerId"]), set()).add(str(edge["followedId"]))
+        by_creator: dict[str, list[tuple[float, str]]] = {}
+        for post in _core_pages("recent-posts", "posts", {"days": FOLLOWING_DAYS}):
+            by_creator.setdefault(str(post["authorId"]), []).append(
+                (_parse_utc(post["createdAt"]), str(post["id"]))
+            )
+        for creator, creator_posts in by_creator.items():
+            by_creator[creator] = sorted(set(creator_posts))[-self._posts_per_creator :]
+        with self._lock:
+            self._follows = graph
+            self._posts = by_creator
+        self.loaded = True
+        logger.info("Loaded follow graph: %s followers, %s creators", len(graph), len(by_creator))
+        return started
+
+    def update(self, client: Client, since: datetime) -> datetime:
+        """Apply follow changes and new posts after since; returns the new watermark."""
+        params = {"since": since - timedelta(seconds=EVENTS_OVERLAP_SEC)}
+        watermark = since
+        for follower, creator, is_follow, ts in client.execute(FOLLOW_CHANGES_QUERY, params):
+            self.set_follow(str(follower), str(creator), bool(is_follow))
+            watermark = max(watermark, ts)
+        posts = client.execute(
+            CREATOR_POSTS_QUERY,
+            {**params, "days": FOLLOWING_DAYS, "per_creator": self._posts_per_creator},
+        )
+        for creator, post_id, published_at, ts in posts:
+            self.add_post(str(creator), str(post_id), float(published_at))
+            watermark = max(watermark, ts)
+        return watermark
+
+
+following_index = FollowingIndex()
+
+
+def _core_pages(path: str, key: str, params: dict[str, Any]) -> Iterator[dict]:
+    """Rows of a paged Core internal export; raises rather than yield a partial export."""
+    url = f"{CORE_API_URL.rstrip('/')}/api/internal/{path}"
+    offset = 0
+    while True:
+        resp = requests.get(
+            url,
+            params={**params, "offset": offset, "pageSize": CORE_PAGE_SIZE},
+            headers={"X-Internal-Token": CORE_INTERNAL_TOKEN},
+            timeout=HTTP_TIMEOUT_SEC,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        rows = data.get(key) if isinstance(data, dict) else None
+        if not isinstance(rows, list):
+            raise ValueError(f"unexpected response from {url}")
+        yield from rows
+        if not rows or not data.get("hasMore"):
+            return
+        offset += len(rows)
+
+
+def _parse_utc(value: str) -> float:
+    """Unix time of an ISO 8601 timestamp from Core; naive values are UTC."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=UTC)
+    return parsed.timestamp()
+
+
+def _ch_client() -> Client:
+    return Client(
+        host=CLICKHOUSE_HOST,
+        port=CLICKHOUSE_PORT,
+        user=CLICKHOUSE_USER,
+        password=CLICKHOUSE_PASSWORD,
+    )
+
+
+def get_following_feed(
+    user_id: str, limit: int, exclude_ids: list[str], index: FollowingIndex | None = None
+) -> list[tuple[str, float, str]]:
+    return (index or following_index).feed(user_id, limit, exclude_ids)
+
+
+def start_following_refresher(
+    interval_sec: float,
+    reload_sec: float = FOLLOWING_RELOAD_SEC,
+    index: FollowingIndex = following_index,
+) -> threading.Thread:
+    """Load the index from Core, then apply new events every interval_sec and reload
+    from Core every reload_sec, in a daemon thread."""
+
+    def _run() -> None:
+        watermark: datetime | None = None
+        loaded_at = 0.0
+        while True:
+            try:
+                if watermark is None or time.monotonic() - loaded_at >= reload_sec:
+                    # Set first: a failed reload is retried after reload_sec, not every poll.
+                    loaded_at = time.monotonic()
+                    watermark = index.load()
+                else:
+                    watermark = index.update(_ch_client(), watermark)
+            except Exception as e:
+                logger.warning("following index refresh failed: %s", e)
+            time.sleep(interval_sec)
+
+    thread = threading.Thread(target=_run, name="following-refresher", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,60 @@
+"""Client for the ingest service's LiveCounters gRPC API (second-fresh trending)."""
+import logging
+import sys
+import threading
+from pathlib import Path
+
+import grpc
+
+from .config import LIVE_COUNTERS_ADDR, LIVE_COUNTERS_TIMEOUT_SEC
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "libs" / "onetake_proto"))
+from analytics.v1 import analytics_pb2, analytics_pb2_grpc  # noqa: E402
+
+_stub: analytics_pb2_grpc.LiveCountersStub | None = None
+_stub_lock = threading.Lock()
+
+
+def _get_stub() -> analytics_pb2_grpc.LiveCountersStub:
+    global _stub
+    with _stub_lock:
+        if _stub is None:
+            _stub = analytics_pb2_grpc.LiveCountersStub(grpc.insecure_channel(LIVE_COUNTERS_ADDR))
+        return _stub
+
+
+def get_live_trending(
+    limit: int,
+    exclude_ids: list[str],
+    interval_hours: int,
+    reason: str,
+    timeout_sec: float = LIVE_COUNTERS_TIMEOUT_SEC,
+) -> list[tuple[str, float, str]] | None:
+    """Top posts by views over interval_hours from ingest memory.
+
+    None when live counters are not configured, unreachable, or keep less history than
+    interval_hours; callers then query ClickHouse.
+    """
+    if not LIVE_COUNTERS_ADDR:
+        return None
+    window_sec = interval_hours * 3600
+    try:
+        with span("grpc", "live_counters.top_posts"):
+            resp = _get_stub().GetTopPosts(
+                analytics_pb2.GetTopPostsRequest(
+                    metric="views",
+                    window_sec=window_sec,
+                    limit=limit,
+                    exclude_post_ids=exclude_ids,
+                ),
+                timeout=timeout_sec,
+            )
+    except grpc.RpcError as e:
+        logger.warning("LiveCounters.GetTopPosts failed: %s", e.code())
+        return None
+    if resp.window_sec < window_sec:
+        return None
+    return [(p.post_id, float(p.count), reason) for p in resp.posts]
@@ -0,0 +1,214 @@
+"""MinHash LSH index over post tag sets for approximate Jaccard-nearest posts.
+
+Each post's tag set is reduced to a MinHash signature of num_perm values; the signature is
+cut into bands and posts sharing any band land in the same bucket. A query hashes its tags
+the same way, collects the posts from its buckets and ranks them by exact Jaccard
+similarity of the tag sets. With rows = num_perm / bands, a post at similarity s is found
+with probability 1 - (1 - s ** rows) ** bands (64 / 32: ~0.73 at s=0.2, ~1.0 at s=0.5).
+
+The index lives in memory and is filled from Core GET /api/posts (newest first): the first
+sync walks back up to max_posts, later syncs insert only posts published since.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+
+import numpy as np
+import requests
+
+from .config import CORE_API_URL, LSH_BANDS, LSH_MAX_POSTS, LSH_NUM_PERM
+from .post_meta import PostMeta, post_meta
+
+logger = logging.getLogger(__name__)
+
+SYNC_PAGE_SIZE = 100
+HTTP_TIMEOUT_SEC = 10
+
+
+def _tag_hash(tag: str) -> int:
+    return int.from_bytes(hashlib.blake2b(tag.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+@dataclass(frozen=True)
+class _Entry:
+    tags: frozenset[str]
+    bands: tuple[bytes, ...]
+    seq: int  # insertion order, newer is larger
+
+
+class MinHashLSH:
+    """Thread-safe MinHash LSH index of post_id -> tag set, bounded to max_posts (oldest out)."""
+
+    def __init__(
+        self,
+        num_perm: int = LSH_NUM_PERM,
+        bands: int = LSH_BANDS,
+        max_posts: int = LSH_MAX_POSTS,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.max_posts = max_posts
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hashing: h_i(x) = high 32 bits of (a_i * x + b_i) mod 2**64, a_i odd.
+        self._a = rng.integers(1, 2**63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_perm, dtype=np.uint64)
+        self._posts: OrderedDict[str, _Entry] = OrderedDict()
+        self._buckets: list[dict[bytes, set[str]]] = [{} for _ in range(bands)]
+        self._seq = 0
+        self._lock = threading.Lock()
+        self.ready = False
+
+    def signature(self, tags: frozenset[str]) -> np.ndarray:
+        hashes = np.fromiter((_tag_hash(t) for t in tags), dtype=np.uint64, count=len(tags))
+        mixed = (np.outer(hashes, self._a) + self._b) >> np.uint64(32)
+        return mixed.min(axis=0).astype(np.uint32)
+
+    def _band_keys(self, tags: frozenset[str]) -> tuple[bytes, ...]:
+        if not tags:
+            return ()
+        return tuple(row.tobytes() for row in self.signature(tags).reshape(self.bands, -1))
+
+    def insert(self, post_id: str, tags: tuple[str, ...] | list[str]) -> None:
+        """Add or re-index a post. Posts inserted later count as newer for eviction."""
+        tag_set = frozenset(tags)
+        bands = self._band_keys(tag_set)
+        with self._lock:
+            old = self._posts.get(post_id)
+            if old is not None:
+                if old.tags == tag_set:
+                    return
+                self._unlink(post_id, old)
+            self._seq += 1
+            entry = _Entry(tag_set, bands, self._seq)
+            self._posts[post_id] = entry
+            for band, key in enumerate(entry.bands):
+                self._buckets[band].setdefault(key, set()).add(post_id)
+            while len(self._posts) > self.max_posts:
+                evicted_id, evicted = self._posts.popitem(last=False)
+                self._unlink(evicted_id, evicted)
+
+    def _unlink(self, post_id: str, entry: _Entry) -> None:
+        self._posts.pop(post_id, None)
+        for band, key in enumerate(entry.bands):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(post_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def __contains__(self, post_id: str) -> bool:
+        with self._lock:
+            return post_id in self._posts
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._posts)
+
+    def posts(self) -> list[tuple[str, tuple[str, ...]]]:
+        """All (post_id, tags) pairs, oldest first."""
+        with self._lock:
+            return [(pid, tuple(sorted(e.tags))) for pid, e in self._posts.items()]
+
+    def tags_of(self, post_id: str) -> tuple[str, ...]:
+        with self._lock:
+            entry = self._posts.get(post_id)
+        return tuple(sorted(entry.tags)) if entry is not None else ()
+
+    def query(
+        self, tags: list[str] | tuple[str, ...], limit: int, exclude_ids: list[str] | None = None
+    ) -> list[tuple[str, float]]:
+        """Up to limit (post_id, jaccard) pairs, most similar first (ties: newest first)."""
+        tag_set = frozenset(tags)
+        if not tag_set or limit <= 0:
+            return []
+        keys = self._band_keys(tag_set)
+        exclude_set = set(exclude_ids or ())
+        with self._lock:
+            candidates: set[str] = set()
+            for band, key in enumerate(keys):
+                candidates |= self._buckets[band].get(key, set())
+            candidates -= exclude_set
+            entries = [(pid, self._posts[pid]) for pid in candidates]
+        scored = [(len(tag_set & e.tags) / len(tag_set | e.tags), e.seq, pid) for pid, e in entries]
+        scored.sort(key=lambda item: (-item[0], -item[1]))
+        return [(pid, similarity) for similarity, _, pid in scored[:limit]]
+
+    def query_post(
+        self, post_id: str, limit: int, exclude_ids: list[str] | None = None
+    ) -> list[tuple[str, float]]:
+        """Posts with tag sets similar to an indexed post (the post itself excluded)."""
+        return self.query(self.tags_of(post_id), limit, [post_id, *(exclude_ids or ())])
+
+
+lsh_index = MinHashLSH()
+
+
+def sync_from_core(
+    index: MinHashLSH = lsh_index,
+    page_size: int = SYNC_PAGE_SIZE,
+    on_insert: Callable[[str, PostMeta], None] | None = None,
+) -> int:
+    """Insert posts published since the last sync (up to max_posts on the first run).
+
+    Pages Core newest first and stops at the first post already indexed. Returns the
+    number of posts added; the index is marked ready after the first complete pass.
+    on_insert(post_id, meta) is called for each post added, oldest first.
+    """
+    fresh: list[dict] = []
+    cursor: str | None = None
+    url = f"{CORE_API_URL.rstrip('/')}/api/posts"
+    while len(fresh) < index.max_posts:
+        params: dict[str, str | int] = {"pageSize": page_size}
+        if cursor:
+            params["cursor"] = cursor
+        resp = requests.get(url, params=params, timeout=HTTP_TIMEOUT_SEC)
+        resp.raise_for_status()
+        data = resp.json()
+        posts = data.get("posts") if isinstance(data, dict) else None
+        if not isinstance(posts, list):
+            break
+        caught_up = False
+        for post in posts:
+            if not isinstance(post, dict) or post.get("id") is None:
+                continue
+            if str(post["id"]) in index:
+                caught_up = True
+                break
+            fresh.append(post)
+        cursor = data.get("nextCursor")
+        if caught_up or not data.get("hasMore") or not cursor:
+            break
+    # Oldest first, so eviction order matches publication order.
+    for post in reversed(fresh[: index.max_posts]):
+        meta = post_meta.put_from_api(post)
+        if meta is not None:
+            index.insert(str(post["id"]), meta.tags)
+            if on_insert is not None:
+                on_insert(str(post["id"]), meta)
+    index.ready = True
+    return len(fresh)
+
+
+def start_lsh_sync(interval_sec: float, index: MinHashLSH = lsh_index) -> threading.Thread:
+    """Sync the index now and then every interval_sec in a daemon thread."""
+
+    def _run() -> None:
+        while True:
+            try:
+                added = sync_from_core(index)
+                if added:
+                    logger.info("LSH index: +%s posts (%s total)", added, len(index))
+            except Exception as e:
+                logger.warning("LSH index sync failed: %s", e)
+            time.sleep(interval_sec)
+
+    thread = threading.Thread(target=_run, name="lsh-sync", daemon=True)
+    thread.start()
+    return thread
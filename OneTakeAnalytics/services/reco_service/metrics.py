@@ -0,0 +1,162 @@
+"""In-process metrics registry for the reco service, with a Prometheus text exporter."""
+import bisect
+import logging
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+_LabelKey = tuple[tuple[str, str], ...]
+
+# Default histogram upper bounds, in milliseconds.
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+def _label_key(labels: dict[str, str]) -> _LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _render(name: str, labels: _LabelKey) -> str:
+    if not labels:
+        return name
+    rendered = ",".join(f'{k}="{v}"' for k, v in labels)
+    return f"{name}{{{rendered}}}"
+
+
+class _Histogram:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self.bounds, value)
+        if idx < len(self.counts):
+            self.counts[idx] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """Thread-safe counters, gauges and histograms keyed by name and labels."""
+
+    def __init__(self) -> None:
+        self._counters: dict[tuple[str, _LabelKey], float] = defaultdict(float)
+        self._gauges: dict[tuple[str, _LabelKey], float] = {}
+        self._histograms: dict[tuple[str, _LabelKey], _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        with self._lock:
+            self._counters[(name, _label_key(labels))] += value
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def observe(
+        self,
+        name: str,
+        value: float,
+        buckets: tuple[float, ...] = LATENCY_BUCKETS_MS,
+        **labels: str,
+    ) -> None:
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(buckets)
+            histogram.observe(value)
+
+    def histogram(self, name: str, **labels: str) -> tuple[int, float]:
+        """(count, sum) of a histogram; (0, 0.0) if nothing was observed."""
+        with self._lock:
+            histogram = self._histograms.get((name, _label_key(labels)))
+            return (histogram.count, histogram.sum) if histogram else (0, 0.0)
+
+    def get(self, name: str, **labels: str) -> float:
+        key = (name, _label_key(labels))
+        with self._lock:
+            if key in self._gauges:
+                return self._gauges[key]
+            return self._counters.get(key, 0.0)
+
+    def snapshot(self) -> dict[str, float]:
+        """Return all counters and gauges as {'name{label="value"}': value}."""
+        with self._lock:
+            items = list(self._counters.items()) + list(self._gauges.items())
+        return {_render(name, labels): value for (name, labels), value in items}
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            series: list[tuple[str, tuple[tuple[str, str], ...], float]] = []
+            kinds: dict[str, str] = {}
+            for kind, values in (("counter", self._counters), ("gauge", self._gauges)):
+                for (name, labels), value in values.items():
+                    series.append((name, labels, value))
+                    kinds[name] = kind
+            histograms = {
+                key: (h.bounds, list(h.counts), h.sum, h.count)
+                for key, h in self._histograms.items()
+            }
+        for name, labels in histograms:
+            series.append((name, labels, 0.0))
+            kinds[name] = "histogram"
+        lines: list[str] = []
+        seen: set[str] = set()
+        for name, labels, value in sorted(series, key=lambda s: (s[0], s[1])):
+            kind = kinds[name]
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+            if kind != "histogram":
+                lines.append(f"{_render(name, labels)} {value}")
+                continue
+            bounds, counts, total, count = histograms[(name, labels)]
+            cumulative = 0
+            for bound, n in zip(bounds, counts, strict=True):
+                cumulative += n
+                le = labels + (("le", f"{bound:g}"),)
+                lines.append(f"{_render(name + '_bucket', le)} {cumulative}")
+            lines.append(f"{_render(name + '_bucket', labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{_render(name + '_sum', labels)} {total}")
+            lines.append(f"{_render(name + '_count', labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+
+metrics = Metrics()
+
+
+def start_metrics_server(port: int, registry: Metrics = metrics) -> ThreadingHTTPServer:
+    """Serve registry on http://0.0.0.0:port/metrics from a daemon thread."""
+
+    class _Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path.split("?", 1)[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Metrics exporter listening on port %s", port)
+    return server
@@ -1,40 +1,40 @@
 """Personalization rules: watch-based, liked-based, trending fallback."""
 import logging
-import urllib.parse
-from typing import Any
+from collections import Counter
 
 import requests
-from clickhouse_driver import Client
-
-from .config import (
-    CLICKHOUSE_HOST,
-    CLICKHOUSE_PORT,
-    CLICKHOUSE_USER,
-    CLICKHOUSE_PASSWORD,
-    CORE_API_URL,
-)
+
+from .affinity import get_user_affinity
+from .config import CORE_API_URL
+from .deadline import Deadline
+from .post_meta import post_meta
+from .prefetch import BatchPrefetch, UserHistory, fetch_user_histories
 from .similar_by_tags import get_similar_by_tags
-from .trending import get_trending_post_ids
+from .tracing import span
+from .trending import decayed_trending, get_trending_post_ids
 
 logger = logging.getLogger(__name__)
 
-
-def _ch_client() -> Client:
-    return Client(
-        host=CLICKHOUSE_HOST,
-        port=CLICKHOUSE_PORT,
-        user=CLICKHOUSE_USER,
-        password=CLICKHOUSE_PASSWORD,
-    )
+POST_TAGS_TIMEOUT_SEC = 3
 
 
-def _get_post_tags(post_id: str) -> list[str]:
-    """Fetch tags for a post from Core API."""
+def _get_post_tags(post_id: str, deadline: Deadline | None = None) -> list[str]:
+    """Fetch tags for a post from Core API (or the post metadata store if already seen)."""
+    meta = post_meta.get(post_id)
+    if meta is not None:
+        return list(meta.tags)
+    if deadline is not None and deadline.expired():
+        return []
     try:
         url = f"{CORE_API_URL.rstrip('/')}/api/posts/{post_id}"
-        resp = requests.get(url, timeout=3)
+        timeout: float = POST_TAGS_TIMEOUT_SEC
+        if deadline is not None:
+            timeout = deadline.cap(POST_TAGS_TIMEOUT_SEC)
+        with span("http", "core.get_post"):
+            resp = requests.get(url, timeout=timeout)
         resp.raise_for_status()
         data = resp.json()
+        post_meta.put_from_api(data)
         tags = data.get("tags") if isinstance(data, dict) else []
         return list(tags) if isinstance(tags, list) else []
     except Exception as e:
@@ -42,41 +42,53 @@ def _get_post_tags(post_id: str) -> list[str]:
         return []
 
 
+def _collect_tags(
+    post_ids: list[str],
+    deadline: Deadline | None,
+    prefetch: BatchPrefetch | None,
+) -> list[str]:
+    """Tags of post_ids, most frequent first (ties: first seen), reusing batch lookups."""
+    counts: Counter[str] = Counter()
+    for pid in post_ids:
+        tags = prefetch.post_tags.get(pid) if prefetch is not None else None
+        if tags is None:
+            tags = _get_post_tags(pid, deadline)
+            if prefetch is not None:
+                with prefetch.lock:
+                    prefetch.post_tags[pid] = tags
+        counts.update(dict.fromkeys(tags, 1))
+    return [tag for tag, _ in counts.most_common()]
+
+
+def _user_history(user_id: str, prefetch: BatchPrefetch | None) -> UserHistory:
+    """History from the prefetch, else fetched once and kept there for the next stage."""
+    if prefetch is not None and user_id in prefetch.histories:
+        return prefetch.histories[user_id]
+    history = fetch_user_histories([user_id]).get(user_id) or UserHistory()
+    if prefetch is not None:
+        with prefetch.lock:
+            prefetch.histories[user_id] = history
+    return history
+
+
 def get_liked_based(
     user_id: str,
     limit: int,
     exclude_ids: list[str],
+    deadline: Deadline | None = None,
+    prefetch: BatchPrefetch | None = None,
 ) -> list[tuple[str, float, str]]:
     """Posts similar to what the user liked (post_like events in ClickHouse)."""
     if not user_id:
         return []
     try:
-        client = _ch_client()
-        rows = client.execute(
-            """
-            SELECT entity_id
-            FROM default.events
-            WHERE event_name = 'post_like'
-              AND user_id = %(user_id)s
-              AND entity_type = 'post'
-              AND entity_id IS NOT NULL
-              AND ts >= now() - INTERVAL 30 DAY
-            GROUP BY entity_id
-            ORDER BY max(ts) DESC
-            LIMIT 10
-            """,
-            {"user_id": user_id},
-        )
-        post_ids = [str(r[0]) for r in rows if r and r[0]]
+        post_ids = _user_history(user_id, prefetch).liked
         if not post_ids:
             return []
-        tags_set: set[str] = set()
-        for pid in post_ids[:5]:
-            tags_set.update(_get_post_tags(pid))
-        tags_list = list(tags_set)[:10]
+        tags_list = _collect_tags(post_ids[:5], deadline, prefetch)[:10]
         if not tags_list:
-            return get_trending_post_ids(limit, exclude_ids, interval_hours=72)
-        return get_similar_by_tags(tags_list, limit, exclude_ids)
+            return get_trending_fallback(limit, exclude_ids, deadline, prefetch, hours=(72,))
+        return get_similar_by_tags(tags_list, limit, exclude_ids, deadline)
     except Exception as e:
         logger.exception("get_liked_based failed: %s", e)
         return []
@@ -86,49 +98,71 @@ def get_watch_based(
     user_id: str,
     limit: int,
     exclude_ids: list[str],
+    deadline: Deadline | None = None,
+    prefetch: BatchPrefetch | None = None,
 ) -> list[tuple[str, float, str]]:
     """Posts similar to what the user watched (post_view / watch_complete). watch_complete weighted higher."""
     if not user_id:
         return []
     try:
-        client = _ch_client()
-        rows = client.execute(
-            """
-            SELECT entity_id, event_name
-            FROM default.events
-            WHERE user_id = %(user_id)s
-              AND entity_type = 'post'
-              AND entity_id IS NOT NULL
-              AND event_name IN ('post_view', 'watch_complete')
-              AND ts >= now() - INTERVAL 14 DAY
-            ORDER BY
-              CASE event_name WHEN 'watch_complete' THEN 2 ELSE 1 END,
-              ts DESC
-            LIMIT 15
-            """,
-            {"user_id": user_id},
-        )
-        if not rows:
+        post_ids = _user_history(user_id, prefetch).watched
+        if not post_ids:
             return []
-        tags_set: set[str] = set()
-        for r in rows:
-            if r and r[0]:
-                tags_set.update(_get_post_tags(str(r[0])))
-        tags_list = list(tags_set)[:10]
+        tags_list = _collect_tags(post_ids, deadline, prefetch)[:10]
         if not tags_list:
-            return get_trending_post_ids(limit, exclude_ids, interval_hours=72)
-        return get_similar_by_tags(tags_list, limit, exclude_ids)
+            return get_trending_fallback(limit, exclude_ids, deadline, prefetch, hours=(72,))
+        return get_similar_by_tags(tags_list, limit, exclude_ids, deadline)
     except Exception as e:
         logger.exception("get_watch_based failed: %s", e)
         return []
 
 
-def get_trending_fallback(limit: int, exclude_ids: list[str]) -> list[tuple[str, float, str]]:
-    """Fallback: trending 72h then 24h."""
+def get_affinity_based(
+    user_id: str,
+    limit: int,
+    exclude_ids: list[str],
+    deadline: Deadline | None = None,
+    prefetch: BatchPrefetch | None = None,
+) -> list[tuple[str, float, str]]:
+    """Posts matching the user's precomputed tag-affinity profile, heaviest tags first.
+
+    Returns [] for users without a profile; callers use the watch/liked path for them.
+    """
+    profile = get_user_affinity(user_id)
+    if not profile:
+        return []
+    return get_similar_by_tags([tag for tag, _ in profile], limit, exclude_ids, deadline)
+
+
+def _trending(
+    limit: int,
+    exclude_ids: list[str],
+    interval_hours: int,
+    prefetch: BatchPrefetch | None,
+) -> list[tuple[str, float, str]]:
+    if prefetch is not None and interval_hours in prefetch.trending:
+        exclude_set = set(exclude_ids)
+        items = prefetch.trending[interval_hours]
+        return [item for item in items if item[0] not in exclude_set][:limit]
+    return get_trending_post_ids(limit, exclude_ids, interval_hours=interval_hours)
+
+
+def get_trending_fallback(
+    limit: int,
+    exclude_ids: list[str],
+    deadline: Deadline | None = None,
+    prefetch: BatchPrefetch | None = None,
+    hours: tuple[int, ...] = (72, 24),
+) -> list[tuple[str, float, str]]:
+    """Fallback: time-decayed trending once loaded, else trending 72h then 24h."""
+    if decayed_trending.ready:
+        return decayed_trending.top(limit, exclude_ids)
     out: list[tuple[str, float, str]] = []
-    out.extend(get_trending_post_ids(limit, exclude_ids, interval_hours=72))
-    exclude_ids = exclude_ids + [p[0] for p in out]
-    remaining = limit - len(out)
-    if remaining > 0:
-        out.extend(get_trending_post_ids(remaining, exclude_ids, interval_hours=24))
+    for interval_hours in hours:
+        remaining = limit - len(out)
+        if remaining <= 0 or (out and deadline is not None and deadline.expired()):
+            break
+        items = _trending(remaining, exclude_ids, interval_hours, prefetch)
+        out.extend(items)
+        exclude_ids = exclude_ids + [p[0] for p in items]
     return out[:limit]
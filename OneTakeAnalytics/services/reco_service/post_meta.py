@@ -0,0 +1,65 @@
+"""Bounded in-memory store of post metadata (tags, created_at) seen in Core API responses."""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from typing import Any
+
+from .config import POST_META_MAX
+
+
+@dataclass(frozen=True)
+class PostMeta:
+    tags: tuple[str, ...]
+    created_at: float | None  # unix seconds
+
+
+def _parse_created_at(value: Any) -> float | None:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    return dt.timestamp()
+
+
+class PostMetaStore:
+    """LRU of post_id -> PostMeta, so later stages need no extra Core API calls."""
+
+    def __init__(self, max_items: int):
+        self._max_items = max_items
+        self._items: OrderedDict[str, PostMeta] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, post_id: str, meta: PostMeta) -> None:
+        with self._lock:
+            self._items[post_id] = meta
+            self._items.move_to_end(post_id)
+            while len(self._items) > self._max_items:
+                self._items.popitem(last=False)
+
+    def put_from_api(self, post: Any) -> PostMeta | None:
+        """Record a post dict as returned by Core GET /api/posts[/{id}]."""
+        if not isinstance(post, dict) or post.get("id") is None:
+            return None
+        tags = post.get("tags")
+        meta = PostMeta(
+            tags=tuple(str(t) for t in tags) if isinstance(tags, list) else (),
+            created_at=_parse_created_at(post.get("createdAt")),
+        )
+        self.put(str(post["id"]), meta)
+        return meta
+
+    def get(self, post_id: str) -> PostMeta | None:
+        with self._lock:
+            return self._items.get(post_id)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+
+post_meta = PostMetaStore(POST_META_MAX)
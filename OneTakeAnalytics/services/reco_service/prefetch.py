@@ -0,0 +1,120 @@
+"""Shared upstream fetches for a batch of recommendation requests.
+
+One ClickHouse query loads the watch/like history of every user in the batch and trending
+lists are fetched once, so N requests cost a handful of queries instead of N times as many.
+"""
+import logging
+import threading
+from dataclasses import dataclass, field
+
+from clickhouse_driver import Client
+
+from .config import (
+    CLICKHOUSE_HOST,
+    CLICKHOUSE_PASSWORD,
+    CLICKHOUSE_PORT,
+    CLICKHOUSE_USER,
+)
+from .tracing import span
+from .trending import decayed_trending, get_trending_post_ids
+
+logger = logging.getLogger(__name__)
+
+WATCHED_LIMIT = 15
+LIKED_LIMIT = 10
+
+USER_HISTORY_QUERY = """
+SELECT
+    toString(user_id) AS uid,
+    toString(entity_id) AS post_id,
+    event_name,
+    ts >= now() - INTERVAL 14 DAY AS recent
+FROM default.events
+WHERE user_id IN %(user_ids)s
+  AND entity_type = 'post'
+  AND entity_id IS NOT NULL
+  AND event_name IN ('post_view', 'watch_complete', 'post_like')
+  AND ts >= now() - INTERVAL 30 DAY
+ORDER BY ts DESC
+LIMIT 50 BY user_id, event_name
+"""
+
+
+@dataclass
+class UserHistory:
+    """Recent post ids a user watched (watch_complete first) and liked, newest first."""
+
+    watched: list[str] = field(default_factory=list)
+    liked: list[str] = field(default_factory=list)
+
+
+@dataclass
+class BatchPrefetch:
+    histories: dict[str, UserHistory] = field(default_factory=dict)
+    # interval_hours -> trending list deep enough for every request in the batch
+    trending: dict[int, list[tuple[str, float, str]]] = field(default_factory=dict)
+    # Core API tag lookups shared between requests of the batch
+    post_tags: dict[str, list[str]] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+def _ch_client() -> Client:
+    return Client(
+        host=CLICKHOUSE_HOST,
+        port=CLICKHOUSE_PORT,
+        user=CLICKHOUSE_USER,
+        password=CLICKHOUSE_PASSWORD,
+    )
+
+
+def _histories_from_rows(rows: list[tuple]) -> dict[str, UserHistory]:
+    watched_complete: dict[str, list[str]] = {}
+    watched_view: dict[str, list[str]] = {}
+    histories: dict[str, UserHistory] = {}
+    for uid, post_id, event_name, recent in rows:
+        if not uid or not post_id:
+            continue
+        history = histories.setdefault(uid, UserHistory())
+        if event_name == "post_like":
+            if post_id not in history.liked and len(history.liked) < LIKED_LIMIT:
+                history.liked.append(post_id)
+        elif recent:
+            bucket = watched_complete if event_name == "watch_complete" else watched_view
+            bucket.setdefault(uid, []).append(post_id)
+    for uid, history in histories.items():
+        for pid in watched_complete.get(uid, []) + watched_view.get(uid, []):
+            if pid not in history.watched:
+                history.watched.append(pid)
+            if len(history.watched) >= WATCHED_LIMIT:
+                break
+    return histories
+
+
+def fetch_user_histories(user_ids: list[str]) -> dict[str, UserHistory]:
+    """Watch and like history for all user_ids with one IN query."""
+    user_ids = sorted({u for u in user_ids if u})
+    if not user_ids:
+        return {}
+    try:
+        with span("clickhouse", "user_histories"):
+            rows = _ch_client().execute(USER_HISTORY_QUERY, {"user_ids": tuple(user_ids)})
+    except Exception as e:
+        logger.exception("fetch_user_histories failed: %s", e)
+        return {}
+    histories = _histories_from_rows(rows)
+    for uid in user_ids:
+        histories.setdefault(uid, UserHistory())
+    return histories
+
+
+def build_prefetch(user_ids: list[str], max_rows: int) -> BatchPrefetch:
+    """Load what every request in a batch needs: user histories and 72h/24h trending.
+
+    Window trending is skipped once the in-memory decayed score serves the fallback.
+    """
+    prefetch = BatchPrefetch(histories=fetch_user_histories(user_ids))
+    if decayed_trending.ready:
+        return prefetch
+    for hours in (72, 24):
+        prefetch.trending[hours] = get_trending_post_ids(max_rows, [], interval_hours=hours)
+    return prefetch
@@ -0,0 +1,195 @@
+"""Multi-signal scoring: rank candidates from all generators in one vectorized pass.
+
+Features per candidate (columns of the feature matrix, in FEATURES order):
+  source           1 for personalised/contextual generators, 0 for popularity fallbacks
+  tag_overlap      share of the context tags the post carries
+  recency          2 ** (-age_hours / half_life), from Core createdAt or first metrics day
+  views_24h/72h    log-scaled views from post_daily_metrics, normalised to the batch max
+  like_rate        likes / views
+  completion_rate  watch_complete / views
+The score is feature_matrix @ weights; weights come from RECO_SCORE_WEIGHTS.
+"""
+import logging
+import time
+
+import numpy as np
+from clickhouse_driver import Client
+
+from .config import (
+    CLICKHOUSE_HOST,
+    CLICKHOUSE_PASSWORD,
+    CLICKHOUSE_PORT,
+    CLICKHOUSE_USER,
+    RECENCY_HALF_LIFE_HOURS,
+    SCORE_WEIGHTS,
+)
+from .deadline import Deadline
+from .post_meta import post_meta
+from .tracing import span
+
+logger = logging.getLogger(__name__)
+
+FEATURES = (
+    "source",
+    "tag_overlap",
+    "recency",
+    "views_24h",
+    "views_72h",
+    "like_rate",
+    "completion_rate",
+)
+
+# Generator reasons that reflect relevance to the user or context rather than popularity.
+PERSONAL_REASONS = frozenset({"similar_by_tags", "viewers_also_watched", "following"})
+
+FEATURES_DAYS = 30
+
+POST_FEATURES_QUERY = """
+SELECT
+    toString(post_id) AS pid,
+    sumIf(views, date >= today() - 1) AS views_24h,
+    sumIf(views, date >= today() - 3) AS views_72h,
+    sum(views) AS views,
+    sum(likes) AS likes,
+    sum(completion) AS completion,
+    toUnixTimestamp(toDateTime(min(date))) AS first_seen
+FROM default.post_daily_metrics FINAL
+WHERE post_id IN %(post_ids)s
+  AND date >= today() - %(days)s
+GROUP BY post_id
+"""
+
+
+def parse_weights(spec: str) -> np.ndarray:
+    """Parse "name=value,..." into a weight vector ordered like FEATURES; missing names are 0."""
+    weights = dict.fromkeys(FEATURES, 0.0)
+    for part in spec.split(","):
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if not name:
+            continue
+        if name not in weights:
+            logger.warning("Unknown score weight %s ignored", name)
+            continue
+        weights[name] = float(value)
+    return np.array([weights[f] for f in FEATURES], dtype=np.float64)
+
+
+WEIGHTS = parse_weights(SCORE_WEIGHTS)
+
+
+def fetch_post_features(post_ids: list[str]) -> dict[str, tuple[float, ...]]:
+    """post_id -> (views_24h, views_72h, views, likes, completion, first_seen) in one query."""
+    if not post_ids:
+        return {}
+    try:
+        client = Client(
+            host=CLICKHOUSE_HOST,
+            port=CLICKHOUSE_PORT,
+            user=CLICKHOUSE_USER,
+            password=CLICKHOUSE_PASSWORD,
+        )
+        with span("clickhouse", "post_features"):
+            rows = client.execute(
+                POST_FEATURES_QUERY, {"post_ids": tuple(post_ids), "days": FEATURES_DAYS}
+            )
+    except Exception as e:
+        logger.warning("fetch_post_features failed: %s", e)
+        return {}
+    return {str(r[0]): tuple(float(v) for v in r[1:]) for r in rows}
+
+
+def _log_norm(values: np.ndarray) -> np.ndarray:
+    scaled = np.log1p(values)
+    top = scaled.max(initial=0.0)
+    return scaled / top if top > 0 else scaled
+
+
+def feature_matrix(
+    candidates: list[tuple[str, float, str]],
+    context_tags: list[str],
+    features: dict[str, tuple[float, ...]],
+    now: float,
+    half_life_hours: float = RECENCY_HALF_LIFE_HOURS,
+) -> np.ndarray:
+    """Build the (len(candidates), len(FEATURES)) matrix."""
+    n = len(candidates)
+    ids = [c[0] for c in candidates]
+    reasons = [c[2] for c in candidates]
+    base = np.fromiter((c[1] for c in candidates), dtype=np.float64, count=n)
+
+    missing = (0.0, 0.0, 0.0, 0.0, 0.0, np.nan)
+    metric = np.array([features.get(pid, missing) for pid in ids], dtype=np.float64)
+    metric = metric.reshape(n, len(missing))
+    views_24h, views_72h, views, likes, completion, first_seen = metric.T
+
+    # Trending generators already carry a fresh view count; use it when the daily table lags.
+    trending = np.fromiter((r.startswith("trending_") for r in reasons), dtype=bool, count=n)
+    views_72h = np.where(trending, np.maximum(views_72h, base), views_72h)
+    views = np.maximum(views, views_72h)
+
+    source = np.fromiter((r in PERSONAL_REASONS for r in reasons), dtype=np.float64, count=n)
+
+    metas = [post_meta.get(pid) for pid in ids]
+    created = np.array(
+        [m.created_at if m is not None and m.created_at is not None else np.nan for m in metas],
+        dtype=np.float64,
+    )
+    created = np.where(np.isnan(created), first_seen, created)
+    age_hours = np.clip((now - created) / 3600.0, 0.0, None)
+    recency = np.where(np.isnan(age_hours), 0.0, np.exp2(-age_hours / half_life_hours))
+
+    tag_overlap = np.zeros(n)
+    vocab = {t: i for i, t in enumerate(dict.fromkeys(context_tags))}
+    if vocab:
+        pairs = [
+            (row, vocab[tag])
+            for row, m in enumerate(metas)
+            if m is not None
+            for tag in m.tags
+            if tag in vocab
+        ]
+        if pairs:
+            incidence = np.zeros((n, len(vocab)))
+            rows, cols = np.array(pairs).T
+            incidence[rows, cols] = 1.0
+            tag_overlap = incidence.sum(axis=1) / len(vocab)
+
+    safe_views = np.maximum(views, 1.0)
+    return np.column_stack(
+        [
+            source,
+            tag_overlap,
+            recency,
+            _log_norm(views_24h),
+            _log_norm(views_72h),
+            np.clip(likes / safe_views, 0.0, 1.0),
+            np.clip(completion / safe_views, 0.0, 1.0),
+        ]
+    )
+
+
+def rank_candidates(
+    candidates: list[tuple[str, float, str]],
+    context_tags: list[str],
+    deadline: Deadline | None = None,
+    weights: np.ndarray = WEIGHTS,
+    features: dict[str, tuple[float, ...]] | None = None,
+    now: float | None = None,
+) -> list[tuple[str, float, str]]:
+    """Score candidates and return them best first as (post_id, score, reason).
+
+    Duplicates keep their first occurrence; ties keep generator order.
+    """
+    first: dict[str, tuple[str, float, str]] = {}
+    for candidate in candidates:
+        first.setdefault(candidate[0], candidate)
+    unique = list(first.values())
+    if not unique:
+        return []
+    if features is None:
+        features = fetch_post_features([c[0] for c in unique])
+    matrix = feature_matrix(unique, context_tags, features, time.time() if now is None else now)
+    scores = matrix @ weights
+    order = np.argsort(-scores, kind="stable")
+    return [(unique[i][0], float(scores[i]), unique[i][2]) for i in order]
@@ -0,0 +1,196 @@
+"""Per-user filter of recently served and viewed posts, so feeds do not repeat themselves.
+
+Each user gets two Bloom filter generations of SEEN_FILTER_BITS bits. New post ids go into
+the current one; when it is older than rotate_sec or holds capacity ids, it becomes the
+previous one and the old previous is dropped. A post therefore stays "seen" for between
+one and two rotation periods, with no per-item timestamps. Users are kept in an LRU bounded
+to max_users, so memory is at most max_users * 2 * bits / 8 bytes.
+
+Served items are recorded by the server; post_view events are tailed from ClickHouse.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Iterable
+from datetime import UTC, datetime, timedelta
+
+import numpy as np
+from clickhouse_driver import Client
+
+from .config import (
+    CLICKHOUSE_HOST,
+    CLICKHOUSE_PASSWORD,
+    CLICKHOUSE_PORT,
+    CLICKHOUSE_USER,
+    SEEN_FILTER_BITS,
+    SEEN_FILTER_CAPACITY,
+    SEEN_FILTER_HASHES,
+    SEEN_FILTER_MAX_USERS,
+    SEEN_FILTER_ROTATE_SEC,
+)
+
+logger = logging.getLogger(__name__)
+
+# Views are re-read this far behind the watermark to pick up late-arriving events.
+VIEWS_OVERLAP_SEC = 60
+VIEWS_BATCH_ROWS = 100_000
+
+RECENT_VIEWS_QUERY = """
+SELECT toString(user_id) AS uid, toString(entity_id) AS post_id, ts
+FROM default.events
+WHERE event_name = 'post_view'
+  AND entity_type = 'post'
+  AND entity_id IS NOT NULL
+  AND user_id IS NOT NULL
+  AND ts > %(since)s
+ORDER BY ts
+LIMIT %(max_rows)s
+"""
+
+
+def _hash_pair(post_id: str) -> tuple[int, int]:
+    digest = hashlib.blake2b(post_id.encode("utf-8"), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+class _UserFilter:
+    __slots__ = ("current", "previous", "count", "started_at")
+
+    def __init__(self, n_bytes: int, now: float):
+        self.current = np.zeros(n_bytes, dtype=np.uint8)
+        self.previous: np.ndarray | None = None
+        self.count = 0
+        self.started_at = now
+
+
+class SeenFilter:
+    """user_id -> rotating two-generation Bloom filter of post ids."""
+
+    def __init__(
+        self,
+        bits: int = SEEN_FILTER_BITS,
+        hashes: int = SEEN_FILTER_HASHES,
+        capacity: int = SEEN_FILTER_CAPACITY,
+        rotate_sec: float = SEEN_FILTER_ROTATE_SEC,
+        max_users: int = SEEN_FILTER_MAX_USERS,
+    ):
+        self._bits = max(8, bits - bits % 8)
+        self._hashes = hashes
+        self._capacity = capacity
+        self._rotate_sec = rotate_sec
+        self._max_users = max_users
+        self._users: OrderedDict[str, _UserFilter] = OrderedDict()
+        self._lock = threading.Lock()
+        self._steps = np.arange(hashes, dtype=np.uint64)
+
+    def _positions(self, post_ids: list[str]) -> np.ndarray:
+        """(len(post_ids), hashes) bit positions by double hashing h1 + i * h2."""
+        pairs = np.array([_hash_pair(pid) for pid in post_ids], dtype=np.uint64).reshape(-1, 2)
+        positions = pairs[:, :1] + pairs[:, 1:] * self._steps
+        return (positions % np.uint64(self._bits)).astype(np.int64)
+
+    def _rotate(self, f: _UserFilter, now: float) -> None:
+        if f.count >= self._capacity or now - f.started_at >= self._rotate_sec:
+            if now - f.started_at >= 2 * self._rotate_sec:
+                f.previous = None  # both generations are stale
+            else:
+                f.previous = f.current
+            f.current = np.zeros(self._bits // 8, dtype=np.uint8)
+            f.count = 0
+            f.started_at = now
+
+    def add(self, user_id: str, post_ids: Iterable[str], now: float | None = None) -> None:
+        post_ids = list(post_ids)
+        if not user_id or not post_ids:
+            return
+        now = time.time() if now is None else now
+        positions = self._positions(post_ids)
+        with self._lock:
+            f = self._users.get(user_id)
+            if f is None:
+                f = self._users[user_id] = _UserFilter(self._bits // 8, now)
+                while len(self._users) > self._max_users:
+                    self._users.popitem(last=False)
+            self._users.move_to_end(user_id)
+            for row in positions:
+                self._rotate(f, now)
+                byte_idx, masks = row >> 3, (1 << (row & 7)).astype(np.uint8)
+                if ((f.current[byte_idx] & masks) != 0).all():
+                    continue  # already in this generation: re-adds do not use up capacity
+                np.bitwise_or.at(f.current, byte_idx, masks)
+                f.count += 1
+
+    def seen(self, user_id: str, post_ids: list[str], now: float | None = None) -> list[bool]:
+        """Per post id: probably seen recently (false positives possible, no false negatives)."""
+        if not user_id or not post_ids:
+            return [False] * len(post_ids)
+        now = time.time() if now is None else now
+        positions = self._positions(post_ids)
+        byte_idx, masks = positions >> 3, (1 << (positions & 7)).astype(np.uint8)
+        with self._lock:
+            f = self._users.get(user_id)
+            if f is None:
+                return [False] * len(post_ids)
+            self._users.move_to_end(user_id)
+            self._rotate(f, now)
+            hits = ((f.current[byte_idx] & masks) != 0).all(axis=1)
+            if f.previous is not None:
+                hits |= ((f.previous[byte_idx] & masks) != 0).all(axis=1)
+        return hits.tolist()
+
+    def unseen(self, user_id: str, post_ids: list[str]) -> list[str]:
+        hits = self.seen(user_id, post_ids)
+        return [pid for pid, hit in zip(post_ids, hits, strict=True) if not hit]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._users)
+
+
+seen_filter = SeenFilter()
+
+
+def _ch_client() -> Client:
+    return Client(
+        host=CLICKHOUSE_HOST,
+        port=CLICKHOUSE_PORT,
+        user=CLICKHOUSE_USER,
+        password=CLICKHOUSE_PASSWORD,
+    )
+
+
+def poll_views(since: datetime, target: SeenFilter = seen_filter) -> datetime:
+    """Add post_view events after since to target; returns the new watermark."""
+    rows = _ch_client().execute(
+        RECENT_VIEWS_QUERY,
+        {"since": since - timedelta(seconds=VIEWS_OVERLAP_SEC), "max_rows": VIEWS_BATCH_ROWS},
+    )
+    by_user: dict[str, list[str]] = {}
+    watermark = since
+    for uid, post_id, ts in rows:
+        by_user.setdefault(str(uid), []).append(str(post_id))
+        watermark = max(watermark, ts)
+    for uid, post_ids in by_user.items():
+        target.add(uid, post_ids)
+    return watermark
+
+
+def start_view_poller(interval_sec: float, target: SeenFilter = seen_filter) -> threading.Thread:
+    """Tail post_view events into the filter every interval_sec, starting one rotation back."""
+
+    def _run() -> None:
+        # Naive UTC, like the ts values ClickHouse returns and compares it with.
+        now = datetime.now(UTC).replace(tzinfo=None)
+        watermark = now - timedelta(seconds=SEEN_FILTER_ROTATE_SEC)
+        while True:
+            try:
+                watermark = poll_views(watermark, target)
+            except Exception as e:
+                logger.warning("seen filter view poll failed: %s", e)
+            time.sleep(interval_sec)
+
+    thread = threading.Thread(target=_run, name="seen-views", daemon=True)
+    thread.start()
+    return thread
@@ -1,15 +1,71 @@
 import logging
+import multiprocessing
+import os
+import signal
 import sys
-from pathlib import Path
+import threading
 from concurrent import futures
+from pathlib import Path
 
 import grpc
 
-from .config import GRPC_PORT, CACHE_TTL_MINUTES, CACHE_ENABLED
-from .cache import RecoCache
-from .trending import get_trending_post_ids
+from .admission import DEGRADE, SHED, AdmissionController
+from .affinity import get_user_affinity
+from .cache import RecoCache, SharedRecoCache
+from .config import (
+    BATCH_WORKERS,
+    CACHE_ENABLED,
+    CACHE_TTL_MINUTES,
+    CANDIDATE_MULTIPLIER,
+    CANDIDATE_POOL_MAX,
+    DEADLINE_RESERVE_MS,
+    DEFAULT_DEADLINE_MS,
+    FOLLOWING_ENABLED,
+    FOLLOWING_REFRESH_SEC,
+    GRPC_PORT,
+    GRPC_WORKERS,
+    LSH_ENABLED,
+    LSH_SYNC_INTERVAL_SEC,
+    METRICS_PORT,
+    PROCESSES,
+    SCORING_ENABLED,
+    SEEN_FILTER_ENABLED,
+    SEEN_VIEWS_POLL_SEC,
+    SESSION_DEPTH_PAGES,
+    SESSION_MAX,
+    SESSION_MAX_ITEMS,
+    SESSION_TTL_SEC,
+    SHARED_CACHE_LOCKS,
+    SHARED_CACHE_SLOT_BYTES,
+    SHARED_CACHE_SLOTS,
+    SHARED_DIR,
+    SHARED_POLL_SEC,
+    SNAPSHOT_INTERVAL_SEC,
+    SNAPSHOT_PATH,
+    TRENDING_SNAPSHOT_INTERVAL_SEC,
+)
+from .covisit import get_covisited
+from .deadline import Deadline, StageRunner
+from .following import following_index, get_following_feed, start_following_refresher
+from .lsh import lsh_index, start_lsh_sync
+from .metrics import metrics, start_metrics_server
+from .personalize import (
+    get_affinity_based,
+    get_liked_based,
+    get_trending_fallback,
+    get_watch_based,
+)
+from .post_meta import post_meta
+from .prefetch import BatchPrefetch, build_prefetch
+from .scoring import rank_candidates
+from .seen_filter import seen_filter, start_view_poller
+from .sessions import RecoSessionStore
+from .shared_state import start_publishers, start_subscriber
+from .shm_cache import SharedMemoryCache
 from .similar_by_tags import get_similar_by_tags
-from .personalize import get_watch_based, get_liked_based, get_trending_fallback
+from .snapshot import start_snapshots
+from .tracing import run_in_context, start_trace
+from .trending import start_trending_refresher, trending_snapshot
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -18,82 +74,487 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / "libs" /
 from reco.v1 import reco_pb2, reco_pb2_grpc
 
 _reco_cache = RecoCache(ttl_minutes=CACHE_TTL_MINUTES, enabled=CACHE_ENABLED)
+_sessions = RecoSessionStore(
+    ttl_seconds=SESSION_TTL_SEC, max_sessions=SESSION_MAX, max_items=SESSION_MAX_ITEMS
+)
+_admission = AdmissionController()
+_batch_executor = futures.ThreadPoolExecutor(
+    max_workers=BATCH_WORKERS, thread_name_prefix="reco-batch"
+)
 
+# Part of a batch deadline the shared prefetch may use before requests fetch on their own.
+PREFETCH_DEADLINE_SHARE = 0.3
 
-def _compute_recommendations(request) -> list:
-    limit = request.limit or 10
+
+def _candidate_pool(limit: int) -> int:
+    """How many candidates to gather before ranking down to limit."""
+    if not SCORING_ENABLED:
+        return limit
+    return max(limit, min(limit * CANDIDATE_MULTIPLIER, CANDIDATE_POOL_MAX))
+
+
+def _compute_recommendations(
+    request,
+    deadline: Deadline | None = None,
+    prefetch: BatchPrefetch | None = None,
+    limit: int | None = None,
+) -> tuple[list, bool]:
+    """Run the pipeline stages within the deadline.
+
+    Generators fill a candidate pool larger than limit, short pools are topped up from
+    the in-memory trending snapshot, and the scoring stage ranks the pool. Returns
+    (items, complete); complete is False when a stage was cut off. limit overrides
+    request.limit (cursor sessions rank several pages at once).
+    """
+    limit = limit or request.limit or 10
+    pool = _candidate_pool(limit)
     exclude_ids = list(request.exclude_post_ids) if request.exclude_post_ids else []
     context_tags = list(request.context_tags) if request.context_tags else []
     context_post_id = (request.context_post_id or "").strip()
     user_id = (request.user_id or "").strip()
+    runner = StageRunner(deadline or Deadline(DEFAULT_DEADLINE_MS / 1000))
     items_tuples = []
 
-    if context_tags:
-        similar = get_similar_by_tags(context_tags, limit, exclude_ids)
+    feed_type = (request.feed_type or "HOME").strip().upper()
+    if feed_type == "FOLLOWING" and FOLLOWING_ENABLED and following_index.loaded:
+        # Only followed creators' posts; an empty feed means the user follows nobody active.
+        items_tuples = get_following_feed(user_id, pool, exclude_ids)
+        return _rank(runner, items_tuples, context_tags)[:limit], runner.complete
+
+    if context_post_id:
+        # In-process mmap lookup: no upstream call, so no stage budget needed.
+        covisited = get_covisited(context_post_id, pool, exclude_ids)
+        items_tuples.extend(covisited)
+        exclude_ids = exclude_ids + [context_post_id] + [pid for pid, _, _ in covisited]
+        if not context_tags:
+            # POST_DETAILS: posts whose tag sets are close to the one being viewed.
+            meta = post_meta.get(context_post_id)
+            context_tags = list(lsh_index.tags_of(context_post_id) or (meta.tags if meta else ()))
+
+    remaining = pool - len(items_tuples)
+    if context_tags and remaining > 0:
+        similar = runner.run(
+            "similar_by_tags", get_similar_by_tags, context_tags, remaining, exclude_ids
+        )
         items_tuples.extend(similar)
         exclude_ids = exclude_ids + [pid for pid, _, _ in similar]
 
-    remaining = limit - len(items_tuples)
-    if remaining > 0 and user_id:
-        watch = get_watch_based(user_id, remaining, exclude_ids)
+    # Users with a precomputed affinity profile skip the live history/tag lookups.
+    profile = get_user_affinity(user_id) if user_id else None
+    if profile:
+        runner.skip("watch_based", "liked_based")
+    else:
+        runner.skip("affinity")
+
+    remaining = pool - len(items_tuples)
+    if remaining > 0 and profile:
+        affine = runner.run("affinity", get_affinity_based, user_id, remaining, exclude_ids)
+        items_tuples.extend(affine)
+        exclude_ids = exclude_ids + [pid for pid, _, _ in affine]
+
+    if prefetch is None and user_id and not profile:
+        # Per-request prefetch: watch_based fetches the history, liked_based reuses it.
+        prefetch = BatchPrefetch()
+
+    remaining = pool - len(items_tuples)
+    if remaining > 0 and user_id and not profile:
+        watch = runner.run(
+            "watch_based", get_watch_based, user_id, remaining, exclude_ids, prefetch=prefetch
+        )
         items_tuples.extend(watch)
         exclude_ids = exclude_ids + [pid for pid, _, _ in watch]
 
-    remaining = limit - len(items_tuples)
-    if remaining > 0 and user_id:
-        liked = get_liked_based(user_id, remaining, exclude_ids)
+    remaining = pool - len(items_tuples)
+    if remaining > 0 and user_id and not profile:
+        liked = runner.run(
+            "liked_based", get_liked_based, user_id, remaining, exclude_ids, prefetch=prefetch
+        )
         items_tuples.extend(liked)
         exclude_ids = exclude_ids + [pid for pid, _, _ in liked]
 
-    remaining = limit - len(items_tuples)
+    remaining = pool - len(items_tuples)
     if remaining > 0:
-        fallback = get_trending_fallback(remaining, exclude_ids)
+        fallback = runner.run(
+            "trending", get_trending_fallback, remaining, exclude_ids, prefetch=prefetch
+        )
         items_tuples.extend(fallback)
+        exclude_ids = exclude_ids + [pid for pid, _, _ in fallback]
+
+    remaining = pool - len(items_tuples)
+    if remaining > 0:
+        topup = trending_snapshot.get(remaining, exclude_ids)
+        if topup:
+            metrics.inc("reco_snapshot_topups_total")
+            items_tuples.extend(topup)
+
+    scoring_tags = context_tags or [tag for tag, _ in profile or ()]
+    return _rank(runner, items_tuples, scoring_tags)[:limit], runner.complete
+
 
-    return items_tuples[:limit]
+def _rank(runner: StageRunner, items_tuples: list, tags: list[str]) -> list:
+    """Scoring stage; keeps generator order if scoring is off or cut off."""
+    if SCORING_ENABLED and len(items_tuples) > 1:
+        ranked = runner.run("scoring", rank_candidates, items_tuples, tags)
+        if ranked:
+            return ranked
+    return items_tuples
+
+
+def _cache_args(request) -> dict:
+    return {
+        "user_id": (request.user_id or "").strip(),
+        "feed_type": (request.feed_type or "HOME").strip(),
+        "context_post_id": (request.context_post_id or "").strip(),
+        "context_tags": tuple(request.context_tags) if request.context_tags else (),
+        "exclude_ids": tuple(sorted(request.exclude_post_ids)) if request.exclude_post_ids else (),
+    }
+
+
+def _batch_key(request) -> tuple:
+    return (*_cache_args(request).values(), request.limit or 10)
+
+
+def _to_items(items_tuples: list) -> list:
+    return [
+        reco_pb2.RecommendationItem(post_id=pid, score=score, reason=reason)
+        for pid, score, reason in items_tuples
+    ]
+
+
+def _unseen_first(user_id: str, items: list, post_ids: list[str]) -> list:
+    """items reordered so posts the user has not seen recently come first (order kept)."""
+    if not (SEEN_FILTER_ENABLED and user_id) or not items:
+        return items
+    hits = seen_filter.seen(user_id, post_ids)
+    fresh = [item for item, hit in zip(items, hits, strict=True) if not hit]
+    if len(fresh) < len(items):
+        metrics.inc("reco_seen_filtered_total", len(items) - len(fresh))
+        return fresh + [item for item, hit in zip(items, hits, strict=True) if hit]
+    return items
+
+
+def _record_served(user_id: str, post_ids: list[str]) -> None:
+    if SEEN_FILTER_ENABLED and user_id:
+        seen_filter.add(user_id, post_ids)
+
+
+def _recommend(request, deadline: Deadline, prefetch: BatchPrefetch | None = None) -> list:
+    """Cached or freshly computed RecommendationItems for one request.
+
+    The cache holds a deeper list than requested; each call serves the first items the
+    user has not seen recently and records them, so repeat requests move on without
+    exclude_post_ids.
+    """
+    limit = request.limit or 10
+    user_id = (request.user_id or "").strip()
+    cache_args = _cache_args(request)
+    items = _reco_cache.get(**cache_args)
+    metrics.inc("reco_cache_lookups_total", result="miss" if items is None else "hit")
+    if items is None:
+        depth = _candidate_pool(limit) if SEEN_FILTER_ENABLED and user_id else limit
+        items_tuples, complete = _compute_recommendations(request, deadline, prefetch, depth)
+        items = _to_items(items_tuples)
+        if complete:
+            # Partial results are served but not cached, so the next request retries the pipeline.
+            _reco_cache.set(items=items, **cache_args)
+    served = _unseen_first(user_id, items, [item.post_id for item in items])[:limit]
+    _record_served(user_id, [item.post_id for item in served])
+    return served
+
+
+def _recommend_deepest_first(
+    requests: list, deadline: Deadline, prefetch: BatchPrefetch | None
+) -> dict[tuple, list]:
+    """_recommend for batch requests with one cache entry, keyed by _batch_key."""
+    return {
+        _batch_key(req): _recommend(req, deadline, prefetch)
+        for req in sorted(requests, key=lambda r: -(r.limit or 10))
+    }
+
+
+def _page(request, deadline: Deadline, cursor: str) -> tuple[list, str]:
+    """Next page of a cursor session; starts a new session if the cursor is unknown or expired."""
+    user_id = (request.user_id or "").strip()
+    page_size = request.limit or 10
+    page = _sessions.page(cursor, user_id, page_size) if cursor else None
+    if cursor and page is None:
+        metrics.inc("reco_session_misses_total")
+    if page is None:
+        depth = min(page_size * SESSION_DEPTH_PAGES, SESSION_MAX_ITEMS)
+        items_tuples, _ = _compute_recommendations(request, deadline, limit=depth)
+        items_tuples = _unseen_first(user_id, items_tuples, [pid for pid, _, _ in items_tuples])
+        metrics.inc("reco_sessions_created_total")
+        page = _sessions.page(_sessions.create(user_id, items_tuples), user_id, page_size)
+    if page is None:
+        return [], ""
+    _record_served(user_id, [pid for pid, _, _ in page[0]])
+    return page
+
+
+def _degraded(request) -> reco_pb2.GetRecommendationsResponse:
+    """Overload answer from memory only: cursor session, cached list or trending snapshot."""
+    user_id = (request.user_id or "").strip()
+    limit = request.limit or 10
+    if request.cursor:
+        page = _sessions.page(request.cursor, user_id, limit)
+        if page is not None:
+            _record_served(user_id, [pid for pid, _, _ in page[0]])
+            return reco_pb2.GetRecommendationsResponse(
+                items=_to_items(page[0]), next_cursor=page[1]
+            )
+    items = _reco_cache.get(**_cache_args(request))
+    if items is None:
+        exclude_ids = list(request.exclude_post_ids)
+        items = _to_items(trending_snapshot.get(_candidate_pool(limit), exclude_ids))
+    served = _unseen_first(user_id, items, [item.post_id for item in items])[:limit]
+    _record_served(user_id, [item.post_id for item in served])
+    return reco_pb2.GetRecommendationsResponse(items=served)
+
+
+def _shed(context) -> None:
+    context.abort(grpc.StatusCode.RESOURCE_EXHAUSTED, "reco service overloaded")
 
 
 class RecoServicer(reco_pb2_grpc.RecoServiceServicer):
     def GetRecommendations(self, request, context):
-        limit = request.limit or 10
-        exclude_ids = list(request.exclude_post_ids) if request.exclude_post_ids else []
-        context_tags = tuple(request.context_tags) if request.context_tags else ()
-        context_post_id = (request.context_post_id or "").strip()
-        user_id = (request.user_id or "").strip()
-        feed_type = (request.feed_type or "HOME").strip()
-
-        cache_key_exclude = tuple(sorted(exclude_ids))
-        cached = _reco_cache.get(
-            user_id=user_id,
-            feed_type=feed_type,
-            context_post_id=context_post_id,
-            context_tags=context_tags,
-            exclude_ids=cache_key_exclude,
+        deadline = Deadline.from_context(
+            context, DEFAULT_DEADLINE_MS / 1000, DEADLINE_RESERVE_MS / 1000
+        )
+        with (
+            start_trace(request.trace_id, "GetRecommendations"),
+            _admission.admit(deadline) as decision,
+        ):
+            if decision == SHED:
+                _shed(context)
+            if decision == DEGRADE:
+                return _degraded(request)
+            if request.cursor or request.paginate:
+                items_tuples, next_cursor = _page(request, deadline, request.cursor)
+                return reco_pb2.GetRecommendationsResponse(
+                    items=_to_items(items_tuples), next_cursor=next_cursor
+                )
+            return reco_pb2.GetRecommendationsResponse(items=_recommend(request, deadline))
+
+    def StreamRecommendations(self, request, context):
+        deadline = Deadline.from_context(
+            context, DEFAULT_DEADLINE_MS / 1000, DEADLINE_RESERVE_MS / 1000
+        )
+        # Only the first page computes anything; later pages are read from the session.
+        with _admission.admit(deadline) as decision:
+            if decision == SHED:
+                _shed(context)
+            if decision == DEGRADE:
+                yield _degraded(request)
+                return
+            with start_trace(request.trace_id, "StreamRecommendations"):
+                items_tuples, next_cursor = _page(request, deadline, request.cursor)
+        yield reco_pb2.GetRecommendationsResponse(
+            items=_to_items(items_tuples), next_cursor=next_cursor
         )
-        if cached is not None:
-            return reco_pb2.GetRecommendationsResponse(items=cached)
+        while next_cursor and context.is_active():
+            page = _sessions.page(next_cursor, (request.user_id or "").strip(), request.limit or 10)
+            if page is None:
+                return
+            items_tuples, next_cursor = page
+            _record_served((request.user_id or "").strip(), [pid for pid, _, _ in items_tuples])
+            yield reco_pb2.GetRecommendationsResponse(
+                items=_to_items(items_tuples), next_cursor=next_cursor
+            )
 
-        items_tuples = _compute_recommendations(request)
-        items = [
-            reco_pb2.RecommendationItem(post_id=pid, score=score, reason=reason)
-            for pid, score, reason in items_tuples
+    def GetRecommendationsBatch(self, request, context):
+        deadline = Deadline.from_context(
+            context, DEFAULT_DEADLINE_MS / 1000, DEADLINE_RESERVE_MS / 1000
+        )
+        requests = list(request.requests)
+        metrics.inc("reco_batch_requests_total")
+        metrics.inc("reco_batch_items_total", len(requests))
+        # One trace for the batch, under the first trace_id its requests carry.
+        trace_id = next((r.trace_id for r in requests if r.trace_id), "")
+        with (
+            start_trace(trace_id, "GetRecommendationsBatch"),
+            _admission.admit(deadline) as decision,
+        ):
+            if decision == SHED:
+                _shed(context)
+            if decision == DEGRADE:
+                return reco_pb2.GetRecommendationsBatchResponse(
+                    responses=[_degraded(req) for req in requests]
+                )
+            return self._batch(requests, deadline)
+
+    def _batch(self, requests: list, deadline: Deadline):
+        # Identical requests in a batch are computed once; the limit is part of the key, since
+        # it is the one field outside the cache key that changes the answer.
+        unique: dict[tuple, reco_pb2.GetRecommendationsRequest] = {}
+        for req in requests:
+            unique.setdefault(_batch_key(req), req)
+
+        misses = [req for req in unique.values() if _reco_cache.get(**_cache_args(req)) is None]
+        prefetch = None
+        if misses:
+            max_rows = max(
+                _candidate_pool(r.limit or 10) * 2 + len(r.exclude_post_ids) for r in misses
+            )
+            users = [(r.user_id or "").strip() for r in misses]
+            future = _batch_executor.submit(run_in_context(build_prefetch), users, max_rows)
+            try:
+                prefetch = future.result(timeout=deadline.remaining() * PREFETCH_DEADLINE_SHARE)
+            except futures.TimeoutError:
+                metrics.inc("reco_stage_timeouts_total", stage="batch_prefetch")
+                logger.warning("batch prefetch exceeded its budget; requests fetch individually")
+
+        # Requests that share a cache entry run in one task, deepest first, so a shorter list
+        # cached for one of them is never served to a larger limit.
+        groups: dict[tuple, list] = {}
+        for key, req in unique.items():
+            groups.setdefault(key[:-1], []).append(req)
+        pending = [
+            (
+                reqs,
+                _batch_executor.submit(
+                    run_in_context(_recommend_deepest_first), reqs, deadline, prefetch
+                ),
+            )
+            for reqs in groups.values()
         ]
-        _reco_cache.set(
-            user_id=user_id,
-            feed_type=feed_type,
-            items=items,
-            context_post_id=context_post_id,
-            context_tags=context_tags,
-            exclude_ids=cache_key_exclude,
+        results: dict[tuple, list] = {}
+        for reqs, future in pending:
+            try:
+                results.update(future.result())
+            except Exception as e:
+                logger.exception("batch item failed: %s", e)
+                results.update((_batch_key(req), []) for req in reqs)
+
+        return reco_pb2.GetRecommendationsBatchResponse(
+            responses=[
+                reco_pb2.GetRecommendationsResponse(items=results[_batch_key(req)])
+                for req in requests
+            ]
         )
-        return reco_pb2.GetRecommendationsResponse(items=items)
 
 
-def serve():
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=4))
+def _start_grpc(reuse_port: bool = False) -> grpc.Server:
+    # More threads than admission slots, so requests over the limit wait (and are measured)
+    # in the admission queue instead of the gRPC executor queue.
+    options = [("grpc.so_reuseport", 1)] if reuse_port else []
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=GRPC_WORKERS), options=options)
     reco_pb2_grpc.add_RecoServiceServicer_to_server(RecoServicer(), server)
     server.add_insecure_port(f"[::]:{GRPC_PORT}")
     server.start()
+    return server
+
+
+def _encode_items(items: list) -> bytes:
+    return reco_pb2.GetRecommendationsResponse(items=items).SerializeToString()
+
+
+def _decode_items(data: bytes) -> list:
+    return list(reco_pb2.GetRecommendationsResponse.FromString(data).items)
+
+
+def _run_refresher() -> None:
+    """Refresher process: the only one querying trending and syncing Core for the LSH index."""
+    start_publishers(
+        SHARED_DIR, TRENDING_SNAPSHOT_INTERVAL_SEC, LSH_SYNC_INTERVAL_SEC if LSH_ENABLED else None
+    )
+    threading.Event().wait()
+
+
+def _run_worker(worker: int, shm_name: str, locks: list) -> None:
+    """Worker process: serves gRPC on the shared port with the shared cache tier."""
+    global _reco_cache
+    shm = SharedMemoryCache(SHARED_CACHE_SLOTS, SHARED_CACHE_SLOT_BYTES, locks, name=shm_name)
+    _reco_cache = SharedRecoCache(
+        shm, CACHE_TTL_MINUTES, _encode_items, _decode_items, enabled=CACHE_ENABLED
+    )
+    start_subscriber(SHARED_DIR, SHARED_POLL_SEC)
+    # Follow graph and seen filters are per user and cheap to poll; each worker keeps its own.
+    if FOLLOWING_ENABLED:
+        start_following_refresher(FOLLOWING_REFRESH_SEC)
+    if SEEN_FILTER_ENABLED:
+        start_view_poller(SEEN_VIEWS_POLL_SEC)
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT + worker)
+    server = _start_grpc(reuse_port=True)
+    logger.info("Reco worker %s (pid %s) listening on port %s", worker, os.getpid(), GRPC_PORT)
+    server.wait_for_termination()
+
+
+def _serve_multiprocess(processes: int) -> None:
+    """Pre-fork mode: one refresher and N gRPC workers sharing a port (SO_REUSEPORT).
+
+    Workers share the recommendation cache through shared memory and pick up trending
+    lists and the post index from files the refresher writes. Dead children are restarted.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    locks = [ctx.Lock() for _ in range(SHARED_CACHE_LOCKS)]
+    shm = SharedMemoryCache(SHARED_CACHE_SLOTS, SHARED_CACHE_SLOT_BYTES, locks, create=True)
+    specs: dict[str, tuple] = {"reco-refresher": (_run_refresher, ())}
+    for i in range(processes):
+        specs[f"reco-worker-{i}"] = (_run_worker, (i, shm.name, locks))
+    children: dict[str, multiprocessing.process.BaseProcess] = {}
+    stopping = threading.Event()
+
+    def _stop(signum, frame) -> None:
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, _stop)
+    signal.signal(signal.SIGINT, _stop)
+    logger.info("Reco pre-fork mode: %s workers on port %s", processes, GRPC_PORT)
+    try:
+        while not stopping.is_set():
+            for name, (target, args) in specs.items():
+                child = children.get(name)
+                if child is not None and child.is_alive():
+                    continue
+                if child is not None:
+                    logger.warning("%s exited with %s, restarting", name, child.exitcode)
+                    metrics.inc("reco_process_restarts_total")
+                children[name] = ctx.Process(target=target, args=args, name=name, daemon=True)
+                children[name].start()
+            stopping.wait(1.0)
+    finally:
+        for child in children.values():
+            child.terminate()
+        for child in children.values():
+            child.join(timeout=10)
+        shm.close()
+        shm.unlink()
+
+
+def _item_tuples(items: list) -> list[tuple[str, float, str]]:
+    return [(item.post_id, item.score, item.reason) for item in items]
+
+
+def _start_refreshers() -> None:
+    start_trending_refresher(TRENDING_SNAPSHOT_INTERVAL_SEC)
+    if LSH_ENABLED:
+        start_lsh_sync(LSH_SYNC_INTERVAL_SEC)
+
+
+def serve():
+    if PROCESSES > 1:
+        _serve_multiprocess(PROCESSES)
+        return
+    if SNAPSHOT_INTERVAL_SEC > 0:
+        # Refreshers start once the snapshot is restored, and continue from it.
+        start_snapshots(
+            SNAPSHOT_PATH,
+            SNAPSHOT_INTERVAL_SEC,
+            _reco_cache,
+            _item_tuples,
+            _to_items,
+            then=_start_refreshers,
+        )
+    else:
+        _start_refreshers()
+    if FOLLOWING_ENABLED:
+        start_following_refresher(FOLLOWING_REFRESH_SEC)
+    if SEEN_FILTER_ENABLED:
+        start_view_poller(SEEN_VIEWS_POLL_SEC)
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    server = _start_grpc()
     logger.info("Reco gRPC server listening on port %s", GRPC_PORT)
     server.wait_for_termination()
 
@@ -0,0 +1,76 @@
+"""Cursor sessions: ranked candidate lists kept server-side for infinite scroll."""
+import logging
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Session:
+    user_id: str
+    items: list[tuple[str, float, str]]
+    expires_at: float
+
+
+class RecoSessionStore:
+    """Holds one ranked list per session, bounded by session count, list length and TTL.
+
+    A cursor is "<session_id>.<offset>"; paging reads a slice, so later pages need neither
+    recomputation nor an exclusion list from the client.
+    """
+
+    def __init__(self, ttl_seconds: float, max_sessions: int, max_items: int):
+        self._ttl_seconds = ttl_seconds
+        self._max_sessions = max_sessions
+        self._max_items = max_items
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, user_id: str, items: list[tuple[str, float, str]]) -> str:
+        """Store items for a new session and return the cursor of its first page."""
+        session_id = secrets.token_urlsafe(12)
+        session = _Session(user_id, list(items[: self._max_items]), time.time() + self._ttl_seconds)
+        with self._lock:
+            self._sessions[session_id] = session
+            while len(self._sessions) > self._max_sessions:
+                self._sessions.popitem(last=False)
+        return f"{session_id}.0"
+
+    def page(
+        self, cursor: str, user_id: str, size: int
+    ) -> tuple[list[tuple[str, float, str]], str] | None:
+        """Return (items, next_cursor) or None if the cursor is unknown, expired or foreign.
+
+        next_cursor is "" once the list is exhausted.
+        """
+        session_id, _, offset_str = cursor.rpartition(".")
+        try:
+            offset = int(offset_str)
+        except ValueError:
+            return None
+        if offset < 0 or size <= 0:
+            return None
+        now = time.time()
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                return None
+            if now > session.expires_at:
+                del self._sessions[session_id]
+                return None
+            if session.user_id != user_id:
+                return None
+            self._sessions.move_to_end(session_id)
+            session.expires_at = now + self._ttl_seconds
+            items = session.items[offset : offset + size]
+            end = offset + len(items)
+            next_cursor = f"{session_id}.{end}" if end < len(session.items) else ""
+        return items, next_cursor
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
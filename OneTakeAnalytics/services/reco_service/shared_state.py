@@ -0,0 +1,183 @@
+"""Read-only indexes the refresher process publishes to pre-fork workers as files in SHARED_DIR.
+
+  trending.json  trending snapshot and decayed ranking, replaced atomically on each refresh
+  posts.jsonl    append-only log of posts synced from Core ({"id", "tags", "created_at"});
+                 rewritten with the newest max_posts lines once it holds twice that
+
+Workers poll both: trending.json is reloaded when its mtime changes, posts.jsonl is read on
+from the last complete line (from the start once it was rewritten) into the worker's LSH
+index and post_meta. The covisitation and affinity models are mmap'd files already, shared
+through the page cache.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from .config import LSH_MAX_POSTS, TRENDING_SNAPSHOT_SIZE
+from .lsh import MinHashLSH, lsh_index, sync_from_core
+from .post_meta import PostMeta, PostMetaStore, post_meta
+from .trending import decayed_trending, refresh_trending_snapshot, trending_snapshot
+
+logger = logging.getLogger(__name__)
+
+TRENDING_FILE = "trending.json"
+POSTS_FILE = "posts.jsonl"
+# Decayed ranking entries published; workers only ever serve the head of it.
+SHARED_DECAYED_MAX = 2000
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def publish_trending(shared_dir: str | Path) -> None:
+    decayed = None
+    if decayed_trending.ready:
+        decayed = [[pid, score] for pid, score, _ in decayed_trending.top(SHARED_DECAYED_MAX, [])]
+    state = {
+        "snapshot": [list(item) for item in trending_snapshot.get(TRENDING_SNAPSHOT_SIZE, [])],
+        "decayed": decayed,
+    }
+    _atomic_write(Path(shared_dir) / TRENDING_FILE, json.dumps(state).encode("utf-8"))
+
+
+def load_trending(shared_dir: str | Path) -> None:
+    state = json.loads((Path(shared_dir) / TRENDING_FILE).read_bytes())
+    snapshot = state.get("snapshot") or []
+    if snapshot:
+        trending_snapshot.update([(str(p), float(s), str(r)) for p, s, r in snapshot])
+    if state.get("decayed") is not None:
+        decayed_trending.set_ranked(state["decayed"])
+
+
+class PostLogWriter:
+    """Refresher side of posts.jsonl. Starts a new file, so workers re-read from scratch."""
+
+    def __init__(self, shared_dir: str | Path, max_posts: int = LSH_MAX_POSTS):
+        self._path = Path(shared_dir) / POSTS_FILE
+        self._max_posts = max_posts
+        self._pending: list[bytes] = []
+        self._lines = 0
+        _atomic_write(self._path, b"")
+
+    def append(self, post_id: str, meta: PostMeta) -> None:
+        record = {"id": post_id, "tags": list(meta.tags), "created_at": meta.created_at}
+        self._pending.append(json.dumps(record).encode("utf-8") + b"\n")
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        # One write per flush, so a reader never sees another flush interleaved.
+        with open(self._path, "ab") as f:
+            f.write(b"".join(self._pending))
+        self._lines += len(self._pending)
+        self._pending = []
+        if self._lines > 2 * self._max_posts:
+            tail = self._path.read_bytes().splitlines(keepends=True)[-self._max_posts :]
+            _atomic_write(self._path, b"".join(tail))
+            self._lines = len(tail)
+
+
+class PostLogReader:
+    """Worker side of posts.jsonl; poll() applies the lines appended since the last call."""
+
+    def __init__(self, shared_dir: str | Path):
+        self._path = Path(shared_dir) / POSTS_FILE
+        self._inode: int | None = None
+        self._offset = 0
+
+    def poll(self, index: MinHashLSH = lsh_index, meta_store: PostMetaStore = post_meta) -> int:
+        try:
+            f = open(self._path, "rb")
+        except FileNotFoundError:
+            return 0
+        with f:
+            st = os.fstat(f.fileno())
+            if st.st_ino != self._inode or st.st_size < self._offset:
+                self._inode = st.st_ino
+                self._offset = 0
+            f.seek(self._offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        self._offset += end
+        added = 0
+        for line in data[:end].splitlines():
+            record = json.loads(line)
+            meta = PostMeta(tags=tuple(record["tags"]), created_at=record["created_at"])
+            meta_store.put(record["id"], meta)
+            index.insert(record["id"], meta.tags)
+            added += 1
+        if added:
+            index.ready = True
+        return added
+
+
+def start_publishers(
+    shared_dir: str | Path,
+    trending_interval_sec: float,
+    lsh_interval_sec: float | None,
+) -> list[threading.Thread]:
+    """Refresher process: refresh trending and sync Core, publishing both for the workers."""
+
+    def _trending() -> None:
+        while True:
+            try:
+                refresh_trending_snapshot()
+                publish_trending(shared_dir)
+            except Exception as e:
+                logger.exception("trending publish failed: %s", e)
+            time.sleep(trending_interval_sec)
+
+    threads = [threading.Thread(target=_trending, name="trending-publisher", daemon=True)]
+    if lsh_interval_sec is not None:
+        writer = PostLogWriter(shared_dir)
+
+        def _posts() -> None:
+            while True:
+                try:
+                    added = sync_from_core(on_insert=writer.append)
+                    writer.flush()
+                    if added:
+                        logger.info("Published %s posts (%s indexed)", added, len(lsh_index))
+                except Exception as e:
+                    logger.warning("post publish failed: %s", e)
+                time.sleep(lsh_interval_sec)
+
+        threads.append(threading.Thread(target=_posts, name="post-publisher", daemon=True))
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def start_subscriber(shared_dir: str | Path, interval_sec: float) -> threading.Thread:
+    """Worker process: pick up published trending lists and posts every interval_sec."""
+    trending_path = Path(shared_dir) / TRENDING_FILE
+    reader = PostLogReader(shared_dir)
+
+    def _run() -> None:
+        mtime = 0.0
+        while True:
+            try:
+                current = trending_path.stat().st_mtime
+                if current != mtime:
+                    load_trending(shared_dir)
+                    mtime = current
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning("loading shared trending failed: %s", e)
+            try:
+                reader.poll()
+            except Exception as e:
+                logger.warning("reading shared posts failed: %s", e)
+            time.sleep(interval_sec)
+
+    thread = threading.Thread(target=_run, name="shared-subscriber", daemon=True)
+    thread.start()
+    return thread
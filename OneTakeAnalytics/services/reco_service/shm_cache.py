@@ -0,0 +1,89 @@
+"""Fixed-size cache of byte strings in shared memory, usable from several worker processes.
+
+The block is an array of equally sized slots; a key maps to one slot (direct-mapped, a new
+key simply overwrites whatever was there). Each slot holds a header
+
+  version u64 | key hash u64 | expires_at f64 (unix) | length u32 | pad
+
+followed by the value. Writers take one of a set of striped cross-process locks and bump
+the version to odd while writing, then to even (a seqlock). Readers take no lock: they
+read the version, the slot and the version again, and treat a change or an odd version
+as a miss. A stale read is therefore impossible and a racing read only costs a recompute.
+"""
+import hashlib
+import struct
+import time
+from multiprocessing import shared_memory
+from typing import Any
+
+_HEADER = struct.Struct("<QQdI4x")
+_VERSION = struct.Struct("<Q")
+
+
+def _key_hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+class SharedMemoryCache:
+    def __init__(
+        self,
+        slots: int,
+        slot_bytes: int,
+        locks: list[Any],
+        name: str | None = None,
+        create: bool = False,
+    ):
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.max_value_bytes = slot_bytes - _HEADER.size
+        if self.max_value_bytes <= 0:
+            raise ValueError("slot_bytes must exceed the slot header")
+        self._locks = locks
+        self._shm = shared_memory.SharedMemory(name=name, create=create, size=slots * slot_bytes)
+        buf = self._shm.buf
+        assert buf is not None
+        self._buf: memoryview = buf
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def _slot(self, key_hash: int) -> int:
+        return (key_hash % self.slots) * self.slot_bytes
+
+    def get(self, key: str, now: float | None = None) -> bytes | None:
+        key_hash = _key_hash(key)
+        offset = self._slot(key_hash)
+        version, stored_hash, expires_at, length = _HEADER.unpack_from(self._buf, offset)
+        if version % 2 or stored_hash != key_hash or length > self.max_value_bytes:
+            return None
+        if (time.time() if now is None else now) > expires_at:
+            return None
+        start = offset + _HEADER.size
+        value = bytes(self._buf[start : start + length])
+        if _VERSION.unpack_from(self._buf, offset)[0] != version:
+            return None  # overwritten while reading
+        return value
+
+    def set(self, key: str, value: bytes, ttl_sec: float, now: float | None = None) -> bool:
+        """Store value; False if it does not fit in a slot."""
+        if len(value) > self.max_value_bytes:
+            return False
+        key_hash = _key_hash(key)
+        offset = self._slot(key_hash)
+        expires_at = (time.time() if now is None else now) + ttl_sec
+        with self._locks[(key_hash % self.slots) % len(self._locks)]:
+            version = _VERSION.unpack_from(self._buf, offset)[0]
+            _VERSION.pack_into(self._buf, offset, version + 1)
+            start = offset + _HEADER.size
+            self._buf[start : start + len(value)] = value
+            _HEADER.pack_into(self._buf, offset, version + 1, key_hash, expires_at, len(value))
+            _VERSION.pack_into(self._buf, offset, version + 2)
+        return True
+
+    def close(self) -> None:
+        # Releases the mapping's memoryview, which self._buf refers to: later use raises.
+        self._shm.close()
+
+    def unlink(self) -> None:
+        self._shm.unlink()
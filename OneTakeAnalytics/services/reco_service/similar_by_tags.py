@@ -1,34 +1,59 @@
-"""Similar posts by tags: fetch from Core API by tag."""
+"""Similar posts by tags: in-process LSH index, or Core API by tag until the index is synced."""
 import logging
 import urllib.parse
 import requests
 
 from .config import CORE_API_URL
+from .deadline import Deadline
+from .lsh import MinHashLSH, lsh_index
+from .post_meta import post_meta
+from .tracing import span
 
 logger = logging.getLogger(__name__)
 
+HTTP_TIMEOUT_SEC = 5
+
 
 def get_similar_by_tags(
     tags: list[str],
     limit: int,
     exclude_ids: list[str],
+    deadline: Deadline | None = None,
+    index: MinHashLSH | None = None,
 ) -> list[tuple[str, float, str]]:
-    """Return list of (post_id, score, reason) from Core GET /api/posts?tag=..."""
+    """Return list of (post_id, score, reason).
+
+    Once the LSH index has synced, posts come from it ranked by Jaccard similarity of their
+    tag set to tags (the score). Before that, from Core GET /api/posts?tag=... with score 1.0;
+    with a deadline, per-tag timeouts shrink to the time left and remaining tags are skipped
+    once it has passed.
+    """
     if not tags:
         return []
+    index = lsh_index if index is None else index
+    if index.ready:
+        return [
+            (pid, similarity, "similar_by_tags")
+            for pid, similarity in index.query(tags, limit, exclude_ids)
+        ]
     exclude_set = set(exclude_ids)
     result = []
     seen = set()
     for tag in tags[:5]:  # max 5 tags to avoid too many requests
+        if deadline is not None and deadline.expired():
+            break
         try:
             url = f"{CORE_API_URL.rstrip('/')}/api/posts?tag={urllib.parse.quote(tag)}&pageSize={limit}"
-            resp = requests.get(url, timeout=5)
+            timeout = deadline.cap(HTTP_TIMEOUT_SEC) if deadline is not None else HTTP_TIMEOUT_SEC
+            with span("http", "core.posts_by_tag"):
+                resp = requests.get(url, timeout=timeout)
             resp.raise_for_status()
             data = resp.json()
             posts = data.get("posts") if isinstance(data, dict) else (data if isinstance(data, list) else [])
             if not isinstance(posts, list):
                 continue
             for post in posts:
+                post_meta.put_from_api(post)
                 pid = post.get("id") if isinstance(post, dict) else getattr(post, "id", None)
                 if pid is None:
                     continue
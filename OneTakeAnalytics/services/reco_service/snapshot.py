@@ -0,0 +1,172 @@
+"""Warm-start snapshots: hot cache entries and precomputed state written to disk periodically.
+
+File layout: header (magic "OTRS", format version, ranking fingerprint, written_at; 24 bytes)
+followed by zlib-compressed JSON with three sections:
+
+  cache     recently set RecoCache entries as (key, expires_at, [(post_id, score, reason)])
+  trending  trending snapshot list and the DecayedTrending incremental state
+  posts     LSH-indexed posts with tags and created_at, oldest first
+
+On load a different format version discards the file. A different fingerprint (settings
+that change what a cached list would contain) or a file older than max_age_sec drops the
+cache and trending snapshot; entries keep their own TTLs and the decayed state checks its
+own parameters. Posts are always restored, so the first Core sync only fetches newer ones.
+"""
+import json
+import logging
+import struct
+import threading
+import time
+import zlib
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from .cache import RecoCache
+from .config import (
+    CANDIDATE_MULTIPLIER,
+    CANDIDATE_POOL_MAX,
+    RECENCY_HALF_LIFE_HOURS,
+    SCORE_WEIGHTS,
+    SCORING_ENABLED,
+    SNAPSHOT_CACHE_ENTRIES,
+    SNAPSHOT_MAX_AGE_SEC,
+    TRENDING_SNAPSHOT_SIZE,
+)
+from .lsh import MinHashLSH, lsh_index
+from .metrics import metrics
+from .post_meta import PostMeta, post_meta
+from .trending import decayed_trending, trending_snapshot
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"OTRS"
+FORMAT_VERSION = 1
+_HEADER = struct.Struct("<4sHxxId4x")
+
+Item = tuple[str, float, str]
+
+
+def ranking_fingerprint() -> int:
+    spec = "|".join(
+        str(v)
+        for v in (
+            SCORING_ENABLED,
+            SCORE_WEIGHTS,
+            RECENCY_HALF_LIFE_HOURS,
+            CANDIDATE_MULTIPLIER,
+            CANDIDATE_POOL_MAX,
+        )
+    )
+    return zlib.crc32(spec.encode("utf-8"))
+
+
+def save_snapshot(
+    path: str | Path,
+    cache: RecoCache,
+    to_tuples: Callable[[Any], list[Item]],
+    index: MinHashLSH = lsh_index,
+    max_cache_entries: int = SNAPSHOT_CACHE_ENTRIES,
+) -> int:
+    """Write the snapshot atomically; returns its size in bytes."""
+    body = {
+        "cache": [[k, exp, to_tuples(v)] for k, v, exp in cache.export(max_cache_entries)],
+        "trending": {
+            "snapshot": trending_snapshot.get(TRENDING_SNAPSHOT_SIZE, []),
+            "decayed": decayed_trending.state(),
+        },
+        "posts": [
+            [pid, list(tags), meta.created_at if meta is not None else None]
+            for pid, tags in index.posts()
+            for meta in (post_meta.get(pid),)
+        ],
+    }
+    data = _HEADER.pack(MAGIC, FORMAT_VERSION, ranking_fingerprint(), time.time())
+    data += zlib.compress(json.dumps(body, separators=(",", ":")).encode("utf-8"), 6)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return len(data)
+
+
+def load_snapshot(
+    path: str | Path,
+    cache: RecoCache,
+    to_items: Callable[[list[Item]], Any],
+    index: MinHashLSH = lsh_index,
+    max_age_sec: float = SNAPSHOT_MAX_AGE_SEC,
+) -> dict[str, int]:
+    """Restore what is still valid from path; returns counts per section ({} if unusable)."""
+    try:
+        raw = Path(path).read_bytes()
+    except FileNotFoundError:
+        return {}
+    magic, version, fingerprint, written_at = _HEADER.unpack_from(raw, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        logger.warning("Ignoring snapshot %s (magic=%r, version=%s)", path, magic, version)
+        return {}
+    body = json.loads(zlib.decompress(raw[_HEADER.size :]))
+    fresh = fingerprint == ranking_fingerprint() and time.time() - written_at <= max_age_sec
+
+    counts = {"posts": 0, "cache": 0, "trending": 0}
+    for pid, tags, created_at in body.get("posts", []):
+        post_meta.put(pid, PostMeta(tags=tuple(tags), created_at=created_at))
+        index.insert(pid, tags)
+        counts["posts"] += 1
+    if counts["posts"]:
+        index.ready = True
+
+    trending = body.get("trending") or {}
+    if trending.get("decayed") and decayed_trending.restore(trending["decayed"]):
+        counts["trending"] += 1
+    if fresh:
+        entries = [(k, to_items([tuple(i) for i in items]), exp) for k, exp, items in body["cache"]]
+        counts["cache"] = cache.restore(entries)
+        if trending.get("snapshot") and not trending_snapshot.updated_at:
+            trending_snapshot.update([tuple(i) for i in trending["snapshot"]])
+            counts["trending"] += 1
+    return counts
+
+
+def start_snapshots(
+    path: str | Path,
+    interval_sec: float,
+    cache: RecoCache,
+    to_tuples: Callable[[Any], list[Item]],
+    to_items: Callable[[list[Item]], Any],
+    then: Callable[[], None] | None = None,
+) -> threading.Thread:
+    """Load the last snapshot in a daemon thread, call then(), and save every interval_sec.
+
+    Refreshers should be started through then(), so they continue from the restored state
+    instead of racing it. The server itself can start before this finishes (cold until then).
+    """
+
+    def _run() -> None:
+        started = time.monotonic()
+        try:
+            counts = load_snapshot(path, cache, to_items)
+            if counts:
+                logger.info(
+                    "Warm start from %s in %.0fms: %s",
+                    path,
+                    (time.monotonic() - started) * 1000,
+                    counts,
+                )
+        except Exception as e:
+            logger.warning("Could not load snapshot %s: %s", path, e)
+        if then is not None:
+            then()
+        while True:
+            time.sleep(interval_sec)
+            try:
+                size = save_snapshot(path, cache, to_tuples)
+                metrics.set_gauge("reco_snapshot_bytes", size)
+            except Exception as e:
+                logger.warning("Could not save snapshot %s: %s", path, e)
+
+    thread = threading.Thread(target=_run, name="reco-snapshots", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,195 @@
+"""Compact memory-mapped "key -> top-K (id, weight)" files built by offline jobs.
+
+Layout (little-endian):
+  header   magic "OTKS", version, k, n_keys, table_size, n_vocab, built_at (32 bytes)
+  keys     n_keys x (uint64 hi, uint64 lo)         UUID keys
+  table    table_size x int32                       open-addressing slots -> key row, -1 empty
+  ids      n_keys x k int32                         neighbour ids (-1 padding)
+  weights  n_keys x k float32
+  vocab    (n_vocab + 1) x uint32 offsets + UTF-8 blob, optional
+
+Neighbour ids index either the keys themselves (post -> posts) or the vocabulary
+(user -> tags). Readers map the file and look keys up in O(1) without copying arrays.
+"""
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import uuid
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"OTKS"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHIIId4x")
+_KEY_DTYPE = np.dtype([("hi", "<u8"), ("lo", "<u8")])
+
+
+def _split(key: str) -> tuple[int, int] | None:
+    try:
+        value = uuid.UUID(key).int
+    except (ValueError, TypeError, AttributeError):
+        return None
+    return value >> 64, value & 0xFFFFFFFFFFFFFFFF
+
+
+def _table_size(n_keys: int) -> int:
+    size = 8
+    while size < n_keys * 2:
+        size *= 2
+    return size
+
+
+def write_topk_file(
+    path: str | Path,
+    keys: list[str],
+    rows: list[list[tuple[int, float]]],
+    k: int,
+    vocab: list[str] | None = None,
+) -> None:
+    """Write keys with their neighbour rows (already best first) atomically to path."""
+    split_keys = [_split(key) for key in keys]
+    if any(s is None for s in split_keys):
+        raise ValueError("topk_store keys must be UUIDs")
+    n = len(keys)
+    key_arr = np.zeros(n, dtype=_KEY_DTYPE)
+    for i, s in enumerate(split_keys):
+        assert s is not None
+        key_arr[i] = s
+
+    table_size = _table_size(n)
+    mask = table_size - 1
+    table = np.full(table_size, -1, dtype="<i4")
+    for i, (hi, lo) in enumerate(key_arr.tolist()):
+        slot = (hi ^ lo) & mask
+        while table[slot] != -1:
+            slot = (slot + 1) & mask
+        table[slot] = i
+
+    ids = np.full((n, k), -1, dtype="<i4")
+    weights = np.zeros((n, k), dtype="<f4")
+    for i, row in enumerate(rows):
+        for j, (nid, weight) in enumerate(row[:k]):
+            ids[i, j] = nid
+            weights[i, j] = weight
+
+    vocab = vocab or []
+    blobs = [v.encode("utf-8") for v in vocab]
+    offsets = np.zeros(len(blobs) + 1, dtype="<u4")
+    if blobs:
+        offsets[1:] = np.cumsum([len(b) for b in blobs])
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, VERSION, k, n, table_size, len(vocab), time.time()))
+        f.write(key_arr.tobytes())
+        f.write(table.tobytes())
+        f.write(ids.tobytes())
+        f.write(weights.tobytes())
+        if vocab:
+            f.write(offsets.tobytes())
+            f.write(b"".join(blobs))
+    os.replace(tmp, path)
+
+
+class TopKStore:
+    """Read-only view over a file written by write_topk_file."""
+
+    def __init__(self, path: str | Path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, k, n, table_size, n_vocab, built_at = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self._mm.close()
+            raise ValueError(f"{path}: not a topk store (magic={magic!r}, version={version})")
+        self.k = k
+        self.built_at = built_at
+        self._mask = table_size - 1
+        offset = _HEADER.size
+        self._keys = np.frombuffer(self._mm, dtype=_KEY_DTYPE, count=n, offset=offset)
+        offset += self._keys.nbytes
+        self._table = np.frombuffer(self._mm, dtype="<i4", count=table_size, offset=offset)
+        offset += self._table.nbytes
+        self._ids = np.frombuffer(self._mm, dtype="<i4", count=n * k, offset=offset).reshape(n, k)
+        offset += self._ids.nbytes
+        self._weights = np.frombuffer(self._mm, dtype="<f4", count=n * k, offset=offset)
+        self._weights = self._weights.reshape(n, k)
+        offset += self._weights.nbytes
+        self._vocab_offsets = np.frombuffer(
+            self._mm, dtype="<u4", count=n_vocab + 1 if n_vocab else 0, offset=offset
+        )
+        self._vocab_base = offset + self._vocab_offsets.nbytes
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def row(self, key: str) -> int:
+        """Row index of key, or -1."""
+        split = _split(key)
+        if split is None or not len(self._keys):
+            return -1
+        hi, lo = split
+        slot = (hi ^ lo) & self._mask
+        while True:
+            idx = int(self._table[slot])
+            if idx == -1:
+                return -1
+            entry = self._keys[idx]
+            if int(entry["hi"]) == hi and int(entry["lo"]) == lo:
+                return idx
+            slot = (slot + 1) & self._mask
+
+    def lookup(self, key: str) -> list[tuple[int, float]]:
+        """(neighbour id, weight) pairs for key, best first; [] if unknown."""
+        idx = self.row(key)
+        if idx < 0:
+            return []
+        ids = self._ids[idx]
+        valid = ids >= 0
+        return list(zip(ids[valid].tolist(), self._weights[idx][valid].tolist(), strict=True))
+
+    def key_at(self, idx: int) -> str:
+        entry = self._keys[idx]
+        return str(uuid.UUID(int=(int(entry["hi"]) << 64) | int(entry["lo"])))
+
+    def vocab_at(self, idx: int) -> str:
+        start, end = int(self._vocab_offsets[idx]), int(self._vocab_offsets[idx + 1])
+        return self._mm[self._vocab_base + start : self._vocab_base + end].decode("utf-8")
+
+
+class ReloadingTopKStore:
+    """Opens path lazily and re-maps it when an offline job replaces the file."""
+
+    def __init__(self, path: str | Path, check_interval_sec: float = 30.0):
+        self._path = Path(path)
+        self._check_interval_sec = check_interval_sec
+        self._store: TopKStore | None = None
+        self._mtime = 0.0
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> TopKStore | None:
+        now = time.monotonic()
+        if self._checked_at and now - self._checked_at < self._check_interval_sec:
+            return self._store
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = self._path.stat().st_mtime
+            except OSError:
+                return self._store
+            if self._store is None or mtime != self._mtime:
+                try:
+                    self._store = TopKStore(self._path)
+                    self._mtime = mtime
+                    logger.info("Loaded %s (%s keys)", self._path, len(self._store))
+                except Exception as e:
+                    logger.warning("Could not load %s: %s", self._path, e)
+            return self._store
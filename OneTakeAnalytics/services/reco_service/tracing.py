@@ -0,0 +1,108 @@
+"""Lightweight request tracing: spans around pipeline stages and outbound calls.
+
+A trace is bound to the current context (contextvars) for one request and correlated by
+the request's trace_id. span() times a block, feeds the reco_span_latency_ms histogram
+(with or without a trace) and, inside a trace, records (kind, name, start, duration,
+attributes). Work handed to thread pools must run in a copied context (run_in_context) to
+stay attached to the trace. Traces slower than RECO_SLOW_LOG_MS are logged with every
+span, for a sampled share RECO_SLOW_LOG_SAMPLE of them.
+"""
+import contextvars
+import functools
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from .config import SLOW_LOG_MS, SLOW_LOG_SAMPLE
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+slow_logger = logging.getLogger("reco.slow")
+
+
+class Trace:
+    def __init__(self, trace_id: str, rpc: str):
+        self.trace_id = trace_id
+        self.rpc = rpc
+        self.started = time.monotonic()
+        self.spans: list[dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: dict[str, Any]) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def breakdown(self) -> dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s["start_ms"])
+        return {
+            "trace_id": self.trace_id,
+            "rpc": self.rpc,
+            "total_ms": round((time.monotonic() - self.started) * 1000, 1),
+            "spans": spans,
+        }
+
+
+_current: contextvars.ContextVar[Trace | None] = contextvars.ContextVar("reco_trace", default=None)
+
+
+def current_trace() -> Trace | None:
+    return _current.get()
+
+
+@contextmanager
+def start_trace(
+    trace_id: str,
+    rpc: str,
+    slow_ms: float = SLOW_LOG_MS,
+    sample: float = SLOW_LOG_SAMPLE,
+) -> Iterator[Trace]:
+    """Trace one request; an empty trace_id gets a generated one."""
+    trace = Trace(trace_id or uuid.uuid4().hex[:16], rpc)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        elapsed_ms = (time.monotonic() - trace.started) * 1000
+        metrics.observe("reco_request_latency_ms", elapsed_ms, rpc=rpc)
+        if slow_ms > 0 and elapsed_ms >= slow_ms and random.random() < sample:
+            slow_logger.warning("slow request %s", json.dumps(trace.breakdown()))
+
+
+@contextmanager
+def span(kind: str, name: str, **attrs: Any) -> Iterator[dict[str, Any]]:
+    """Time a block; yields a dict the block may add attributes to (e.g. result counts)."""
+    started = time.monotonic()
+    error: str | None = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        elapsed_ms = (time.monotonic() - started) * 1000
+        metrics.observe("reco_span_latency_ms", elapsed_ms, kind=kind, span=name)
+        trace = _current.get()
+        if trace is not None:
+            record = {
+                "kind": kind,
+                "name": name,
+                "start_ms": round((started - trace.started) * 1000, 1),
+                "duration_ms": round(elapsed_ms, 1),
+                **attrs,
+            }
+            if error:
+                record["error"] = error
+            trace.add(record)
+
+
+def run_in_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """fn bound to a copy of the caller's context, for one submission to a thread pool."""
+    return functools.partial(contextvars.copy_context().run, fn)
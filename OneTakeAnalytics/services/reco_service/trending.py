@@ -1,8 +1,24 @@
-"""Trending: top posts by view count from ClickHouse (7d, 24h, 72h)."""
+"""Trending: top posts by view count from ClickHouse (7d, 24h, 72h), and a time-decayed score."""
 import logging
+import math
+import threading
+import time
+
 from clickhouse_driver import Client
 
-from .config import CLICKHOUSE_HOST, CLICKHOUSE_PORT, CLICKHOUSE_USER, CLICKHOUSE_PASSWORD
+from .config import (
+    CLICKHOUSE_HOST,
+    CLICKHOUSE_PASSWORD,
+    CLICKHOUSE_PORT,
+    CLICKHOUSE_USER,
+    DECAYED_TRENDING_ENABLED,
+    TRENDING_HALF_LIFE_HOURS,
+    TRENDING_LOOKBACK_HOURS,
+    TRENDING_SNAPSHOT_SIZE,
+    TRENDING_WEIGHTS,
+)
+from .live_counters import get_live_trending
+from .tracing import span
 
 logger = logging.getLogger(__name__)
 
@@ -28,8 +44,15 @@ def get_trending_post_ids(
     exclude_ids: list[str],
     interval_hours: int = 72,
 ) -> list[tuple[str, float, str]]:
-    """Return list of (post_id, score, reason). interval_hours: 24, 72, or 168 (7d)."""
+    """Return list of (post_id, score, reason). interval_hours: 24, 72, or 168 (7d).
+
+    Served from the ingest service's live counters when they cover the window, otherwise
+    from ClickHouse.
+    """
     reason = REASON_BY_HOURS.get(interval_hours, "trending_views_72h")
+    live = get_live_trending(limit, exclude_ids, interval_hours, reason)
+    if live is not None:
+        return live
     try:
         client = Client(
             host=CLICKHOUSE_HOST,
@@ -37,10 +60,11 @@ def get_trending_post_ids(
             user=CLICKHOUSE_USER,
             password=CLICKHOUSE_PASSWORD,
         )
-        rows = client.execute(
-            TRENDING_QUERY_TEMPLATE,
-            {"interval_hours": interval_hours, "max_rows": limit + len(exclude_ids)},
-        )
+        with span("clickhouse", "trending_window"):
+            rows = client.execute(
+                TRENDING_QUERY_TEMPLATE,
+                {"interval_hours": interval_hours, "max_rows": limit + len(exclude_ids)},
+            )
         exclude_set = set(exclude_ids)
         result = []
         for (post_id, view_count) in rows:
@@ -54,3 +78,246 @@ def get_trending_post_ids(
     except Exception as e:
         logger.exception("get_trending_post_ids failed: %s", e)
         return []
+
+
+DECAYED_SCORES_QUERY = """
+SELECT
+    toString(post_id) AS pid,
+    sum(
+        (views * %(w_views)s + likes * %(w_likes)s + completions * %(w_completions)s)
+        * exp2((toUnixTimestamp(hour) - %(t0)s) / %(half_life_sec)s)
+    ) AS score
+FROM default.post_hourly_counts
+WHERE hour >= toDateTime(%(since)s) AND hour < toDateTime(%(until)s)
+GROUP BY post_id
+"""
+
+DECAYED_REASON = "trending_decayed"
+
+
+def parse_trending_weights(spec: str) -> dict[str, float]:
+    weights = {"views": 0.0, "likes": 0.0, "completions": 0.0}
+    for part in spec.split(","):
+        name, _, value = part.partition("=")
+        if name.strip() in weights:
+            weights[name.strip()] = float(value)
+    return weights
+
+
+class DecayedTrending:
+    """Popularity score sum(weight * 2 ** (-(now - hour) / half_life)) over hourly buckets.
+
+    Scores are kept relative to a fixed reference hour t0: an event's contribution
+    2 ** ((hour - t0) / half_life) never changes, and decaying every post to "now" is a
+    common factor that does not change the ranking. So each refresh only adds the hours
+    completed since the last one (settled) and re-reads the current, still growing hour.
+    """
+
+    # Re-base t0 once scores have grown by 2 ** REBASE_HALF_LIVES, to keep floats in range.
+    REBASE_HALF_LIVES = 64
+    # Posts whose decayed score falls below this are dropped from memory.
+    PRUNE_BELOW = 0.01
+
+    def __init__(
+        self,
+        half_life_hours: float = TRENDING_HALF_LIFE_HOURS,
+        weights: dict[str, float] | None = None,
+        lookback_hours: int = TRENDING_LOOKBACK_HOURS,
+    ):
+        self._half_life_sec = half_life_hours * 3600
+        self._weights = weights or parse_trending_weights(TRENDING_WEIGHTS)
+        self._lookback_sec = lookback_hours * 3600
+        self._t0: int | None = None
+        self._settled: dict[str, float] = {}
+        self._settled_until = 0
+        self._ranked: list[tuple[str, float]] = []
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def _scores(self, client: Client, since: int, until: int) -> list[tuple[str, float]]:
+        assert self._t0 is not None
+        return client.execute(
+            DECAYED_SCORES_QUERY,
+            {
+                "since": since,
+                "until": until,
+                "t0": self._t0,
+                "half_life_sec": self._half_life_sec,
+                "w_views": self._weights["views"],
+                "w_likes": self._weights["likes"],
+                "w_completions": self._weights["completions"],
+            },
+        )
+
+    def refresh(self, client: Client, now: float | None = None) -> None:
+        now = time.time() if now is None else now
+        current_hour = int(now // 3600) * 3600
+        if self._t0 is None:
+            self._t0 = current_hour
+            self._settled_until = current_hour - self._lookback_sec
+        settled = dict(self._settled)
+        if self._settled_until < current_hour:
+            for pid, score in self._scores(client, self._settled_until, current_hour):
+                settled[str(pid)] = settled.get(str(pid), 0.0) + float(score)
+        current = self._scores(client, current_hour, current_hour + 3600)
+
+        scale = math.exp2(-(now - self._t0) / self._half_life_sec)
+        if (current_hour - self._t0) / self._half_life_sec > self.REBASE_HALF_LIVES:
+            rebase = math.exp2(-(current_hour - self._t0) / self._half_life_sec)
+            settled = {pid: s * rebase for pid, s in settled.items()}
+            current = [(pid, s * rebase) for pid, s in current]
+            scale /= rebase
+            self._t0 = current_hour
+        settled = {pid: s for pid, s in settled.items() if s * scale >= self.PRUNE_BELOW}
+
+        merged = dict(settled)
+        for pid, score in current:
+            merged[str(pid)] = merged.get(str(pid), 0.0) + float(score)
+        ranked = sorted(((pid, s * scale) for pid, s in merged.items()), key=lambda i: -i[1])
+        with self._lock:
+            self._settled = settled
+            self._settled_until = current_hour
+            self._ranked = ranked
+            self._ready = True
+
+    def state(self) -> dict | None:
+        """Incremental state for a warm-start snapshot, or None before the first refresh."""
+        with self._lock:
+            if self._t0 is None:
+                return None
+            return {
+                "t0": self._t0,
+                "settled_until": self._settled_until,
+                "settled": self._settled,
+                "half_life_sec": self._half_life_sec,
+                "weights": self._weights,
+            }
+
+    def restore(self, state: dict, now: float | None = None) -> bool:
+        """Resume from state(); refused if it was built with other parameters or is too old.
+
+        The current hour is missing until the next refresh, which adds it and every hour
+        settled since the snapshot.
+        """
+        now = time.time() if now is None else now
+        if (
+            state.get("half_life_sec") != self._half_life_sec
+            or state.get("weights") != self._weights
+            or state["settled_until"] < now - self._lookback_sec
+        ):
+            return False
+        settled = {str(pid): float(s) for pid, s in state["settled"].items()}
+        scale = math.exp2(-(now - state["t0"]) / self._half_life_sec)
+        ranked = sorted(((pid, s * scale) for pid, s in settled.items()), key=lambda i: -i[1])
+        with self._lock:
+            self._t0 = int(state["t0"])
+            self._settled = settled
+            self._settled_until = int(state["settled_until"])
+            self._ranked = ranked
+            self._ready = True
+        return True
+
+    def set_ranked(self, ranked: list[tuple[str, float]]) -> None:
+        """Adopt a ranking computed elsewhere (the refresher process in pre-fork mode)."""
+        with self._lock:
+            self._ranked = [(str(pid), float(score)) for pid, score in ranked]
+            self._ready = True
+
+    def top(self, limit: int, exclude_ids: list[str]) -> list[tuple[str, float, str]]:
+        if limit <= 0:
+            return []
+        exclude_set = set(exclude_ids)
+        with self._lock:
+            ranked = self._ranked
+        out = []
+        for pid, score in ranked:
+            if pid in exclude_set:
+                continue
+            out.append((pid, score, DECAYED_REASON))
+            if len(out) >= limit:
+                break
+        return out
+
+
+decayed_trending = DecayedTrending()
+
+
+class TrendingSnapshot:
+    """Last trending list fetched from ClickHouse, kept in memory.
+
+    Used to top up responses when pipeline stages run out of time, without another query.
+    """
+
+    def __init__(self) -> None:
+        self._items: list[tuple[str, float, str]] = []
+        self._updated_at = 0.0
+        self._lock = threading.Lock()
+
+    def update(self, items: list[tuple[str, float, str]]) -> None:
+        with self._lock:
+            self._items = list(items)
+            self._updated_at = time.time()
+
+    def get(self, limit: int, exclude_ids: list[str]) -> list[tuple[str, float, str]]:
+        if limit <= 0:
+            return []
+        exclude_set = set(exclude_ids)
+        with self._lock:
+            items = self._items
+        return [item for item in items if item[0] not in exclude_set][:limit]
+
+    @property
+    def updated_at(self) -> float:
+        return self._updated_at
+
+
+trending_snapshot = TrendingSnapshot()
+
+
+def refresh_decayed_trending() -> None:
+    decayed_trending.refresh(
+        Client(
+            host=CLICKHOUSE_HOST,
+            port=CLICKHOUSE_PORT,
+            user=CLICKHOUSE_USER,
+            password=CLICKHOUSE_PASSWORD,
+        )
+    )
+
+
+def refresh_trending_snapshot(max_rows: int = TRENDING_SNAPSHOT_SIZE) -> None:
+    """Refresh the decayed score (if enabled) and the snapshot; keeps the previous list on failure.
+
+    The snapshot comes from the decayed score, or from a 72h window query without it.
+    """
+    items: list[tuple[str, float, str]] = []
+    if DECAYED_TRENDING_ENABLED:
+        try:
+            refresh_decayed_trending()
+            items = decayed_trending.top(max_rows, [])
+        except Exception as e:
+            logger.warning("decayed trending refresh failed: %s", e)
+    if not items:
+        items = get_trending_post_ids(max_rows, [], interval_hours=72)
+    if items:
+        trending_snapshot.update(items)
+
+
+def start_trending_refresher(interval_sec: float) -> threading.Thread:
+    """Refresh the snapshot now and then every interval_sec in a daemon thread."""
+
+    def _run() -> None:
+        while True:
+            try:
+                refresh_trending_snapshot()
+            except Exception as e:
+                logger.exception("trending snapshot refresh failed: %s", e)
+            time.sleep(interval_sec)
+
+    thread = threading.Thread(target=_run, name="trending-refresher", daemon=True)
+    thread.start()
+    return thread
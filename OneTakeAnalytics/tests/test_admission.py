@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import threading
+
+from services.reco_service import server
+from services.reco_service.admission import ADMIT, DEGRADE, SHED, AdmissionController
+from services.reco_service.metrics import Metrics, metrics
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_sheds_when_no_slot_frees_up_in_time() -> None:
+    admission = AdmissionController(max_concurrent=1, queue_timeout_sec=0.01, enter_ms=10_000)
+    shed_before = metrics.get("reco_shed_total")
+
+    with admission.admit() as first:
+        with admission.admit() as second:
+            assert (first, second) == (ADMIT, SHED)
+
+    assert metrics.get("reco_shed_total") == shed_before + 1
+    with admission.admit() as third:
+        assert third == ADMIT
+
+
+def test_degrades_on_queue_time_and_recovers_with_hysteresis() -> None:
+    clock = _Clock()
+    admission = AdmissionController(
+        max_concurrent=1,
+        queue_timeout_sec=0.05,
+        enter_ms=20,
+        exit_ms=5,
+        min_degraded_sec=10,
+        alpha=1.0,
+        clock=clock,
+    )
+    busy = threading.Event()
+    release = threading.Event()
+
+    def hold_slot() -> None:
+        with admission.admit():
+            busy.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold_slot)
+    holder.start()
+    busy.wait()
+    clock.now = 1.0
+    admission._observe(0.05)  # a request that waited 50ms
+
+    assert admission.degraded
+    with admission.admit() as decision:
+        assert decision == DEGRADE
+    release.set()
+    holder.join()
+
+    # Slots are free again, but the mode holds until min_degraded_sec has passed.
+    with admission.admit() as decision:
+        assert decision == ADMIT
+    assert admission.degraded
+    clock.now = 12.0
+    with admission.admit() as decision:
+        assert decision == ADMIT
+    assert not admission.degraded
+
+
+def test_degraded_answer_comes_from_memory(monkeypatch) -> None:
+    def fail(*_: object, **__: object) -> None:
+        raise AssertionError("degraded mode must not run the pipeline")
+
+    monkeypatch.setattr(server, "_compute_recommendations", fail)
+    monkeypatch.setattr(server, "SEEN_FILTER_ENABLED", False)
+    snapshot = [("p1", 3.0, "trending_decayed")]
+    monkeypatch.setattr(server.trending_snapshot, "get", lambda limit, exclude_ids: snapshot)
+
+    response = server._degraded(server.reco_pb2.GetRecommendationsRequest(user_id="u", limit=5))
+
+    assert [item.post_id for item in response.items] == ["p1"]
+
+
+def test_prometheus_rendering_types_counters_and_gauges() -> None:
+    registry = Metrics()
+    registry.inc("reco_shed_total")
+    registry.set_gauge("reco_degraded_mode", 1.0)
+
+    text = registry.render_prometheus()
+
+    assert "# TYPE reco_degraded_mode gauge\nreco_degraded_mode 1.0\n" in text
+    assert "# TYPE reco_shed_total counter\nreco_shed_total 1.0\n" in text
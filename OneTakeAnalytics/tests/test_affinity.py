@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import uuid
+from pathlib import Path
+
+from jobs.aggregates.build_tag_affinity import build_profiles
+from services.reco_service import affinity, personalize, server
+from services.reco_service.topk_store import ReloadingTopKStore, write_topk_file
+
+USER = str(uuid.UUID(int=42))
+
+
+def test_build_profiles_sums_decayed_weights_per_tag() -> None:
+    rows = [(USER, "p1", 2.0), (USER, "p2", 1.0), (USER, "p3", 0.5)]
+    post_tags = {"p1": ["rpg", "indie"], "p2": ["rpg"], "p3": ["cooking"]}
+
+    keys, profiles, vocab = build_profiles(rows, post_tags, top_tags=2)
+
+    assert keys == [USER]
+    assert [(vocab[i], w) for i, w in profiles[0]] == [("rpg", 1.0), ("indie", 2.0 / 3.0)]
+
+
+def test_users_with_profile_skip_the_live_history_path(tmp_path: Path, monkeypatch) -> None:
+    keys, profiles, vocab = build_profiles(
+        [(USER, "p1", 3.0), (USER, "p2", 1.0)], {"p1": ["rpg"], "p2": ["cooking"]}
+    )
+    path = tmp_path / "tag_affinity.bin"
+    write_topk_file(path, keys, profiles, k=5, vocab=vocab)
+    monkeypatch.setattr(affinity, "affinity_store", ReloadingTopKStore(path))
+    monkeypatch.setattr(server, "SCORING_ENABLED", False)
+    seen_tags: list[list[str]] = []
+
+    def fake_similar(tags: list[str], limit: int, exclude_ids: list[str], deadline: object = None):
+        seen_tags.append(tags)
+        return [("post-x", 1.0, "similar_by_tags")]
+
+    def fail_live(*_: object, **__: object) -> list:
+        raise AssertionError("live path must not run for users with a profile")
+
+    monkeypatch.setattr(personalize, "get_similar_by_tags", fake_similar)
+    monkeypatch.setattr(server, "get_watch_based", fail_live)
+    monkeypatch.setattr(server, "get_liked_based", fail_live)
+    monkeypatch.setattr(server, "get_trending_fallback", lambda *a, **k: [])
+    monkeypatch.setattr(server.trending_snapshot, "get", lambda *a, **k: [])
+
+    items, complete = server._compute_recommendations(
+        server.reco_pb2.GetRecommendationsRequest(user_id=USER, limit=1)
+    )
+
+    assert complete
+    assert seen_tags == [["rpg", "cooking"]]
+    assert items == [("post-x", 1.0, "similar_by_tags")]
+    assert affinity.get_user_affinity(str(uuid.uuid4())) is None
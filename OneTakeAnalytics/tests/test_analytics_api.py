@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+from services.analytics_api.cache import ResultCache, SingleFlight, WatermarkTracker
+from services.analytics_api.queries import AnalyticsReader
+from services.analytics_api.server import BadRequest, make_handler, route
+
+TODAY = date(2026, 5, 31)
+
+
+def test_result_cache_misses_on_new_version_age_and_eviction() -> None:
+    cache = ResultCache(max_entries=2, max_age_sec=60)
+    cache.set("a", 1, ["rows"], now=0)
+    assert cache.get("a", 1, now=10) == ["rows"]
+    assert cache.get("a", 2, now=10) is None  # watermark moved: dropped
+    cache.set("a", 2, ["rows"], now=0)
+    assert cache.get("a", 2, now=61) is None
+
+    for key in ("a", "b", "c"):
+        cache.set(key, 1, key, now=0)
+    assert cache.get("a", 1, now=1) is None and len(cache) == 2
+
+
+def test_concurrent_misses_run_one_query_and_the_watermark_invalidates() -> None:
+    calls: list[dict] = []
+    release = threading.Event()
+
+    def execute(sql: str, params: dict) -> list[tuple]:
+        calls.append(params)
+        release.wait(5)
+        return [(date(2026, 5, 1), 42)]
+
+    watermarks = WatermarkTracker(lambda: {"daily_active_users": datetime(2026, 5, 1, 10)}, 60)
+    watermarks.refresh()
+    reader = AnalyticsReader(ResultCache(100, 300), watermarks, execute)
+    params = {"start": date(2026, 5, 1), "end": date(2026, 5, 1)}
+
+    with ThreadPoolExecutor(8) as pool:
+        pending = [pool.submit(reader.read, "dau", params) for _ in range(8)]
+        while not calls:
+            threading.Event().wait(0.01)
+        threading.Event().wait(0.2)  # let the others join the running query
+        release.set()
+        results = [f.result() for f in pending]
+
+    assert len(calls) == 1
+    assert sorted(r.cache for r in results) == ["coalesced"] * 7 + ["miss"]
+    assert results[0].rows == [{"date": date(2026, 5, 1), "dau": 42}]
+    assert reader.read("dau", params).cache == "hit"
+
+    watermarks._fetch = lambda: {"daily_active_users": datetime(2026, 5, 1, 11)}
+    watermarks.refresh()
+    assert reader.read("dau", params).cache == "miss" and len(calls) == 2
+
+
+def test_single_flight_shares_errors() -> None:
+    flight = SingleFlight()
+    with pytest.raises(RuntimeError):
+        flight.do("k", lambda: (_ for _ in ()).throw(RuntimeError("down")))
+    assert flight.do("k", lambda: 1) == (1, False)
+
+
+def test_routes_validate_ranges_limits_and_ids() -> None:
+    assert route("/v1/dau", {}, TODAY) == ("dau", {"start": date(2026, 5, 2), "end": TODAY})
+    top = route("/v1/posts/top", {"from": "2026-05-01", "limit": "5"}, TODAY)
+    assert top is not None
+    name, params = top
+    assert name == "top_posts" and params["limit"] == 5
+    assert route("/v1/nope", {}, TODAY) is None
+    for path, args in (
+        ("/v1/funnel", {"from": "2026-06-01"}),
+        ("/v1/funnel", {"from": "2020-01-01"}),
+        ("/v1/dau", {"to": "yesterday"}),
+        ("/v1/posts/top", {"limit": "0"}),
+        ("/v1/posts/not-a-uuid/daily", {}),
+    ):
+        with pytest.raises(BadRequest):
+            route(path, args, TODAY)
+
+
+def test_http_serves_json_with_cache_header() -> None:
+    watermarks = WatermarkTracker(lambda: {}, 60)
+    reader = AnalyticsReader(
+        ResultCache(100, 300), watermarks, lambda sql, params: [(date(2026, 5, 1), 7)]
+    )
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(reader))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with urllib.request.urlopen(f"{base}/v1/dau?from=2026-05-01&to=2026-05-01") as resp:
+            assert resp.headers["X-Cache"] == "miss"
+            body = json.load(resp)
+        assert body == {"data": [{"date": "2026-05-01", "dau": 7}], "watermark": None}
+        with pytest.raises(urllib.error.HTTPError) as e:
+            urllib.request.urlopen(f"{base}/v1/dau?from=2026-05-02&to=2026-05-01")
+        assert e.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+from datetime import date, datetime
+from typing import Any
+
+import pytest
+
+from jobs.aggregates.backfill_aggregate_views import backfill_table, verify_table
+
+TODAY = date(2026, 5, 3)
+CUTOFF = datetime(2026, 5, 3, 9, 30)
+
+
+class _FakeClient:
+    def __init__(
+        self,
+        done: Sequence[date] = (),
+        totals: dict[str, list[tuple]] | None = None,
+        cutoffs: dict[str, datetime] | None = None,
+    ):
+        self.done = list(done)
+        self.cutoffs = {"post_daily_metrics_mv": CUTOFF} if cutoffs is None else cutoffs
+        self.totals = totals or {}
+        self.calls: list[tuple[str, Any]] = []
+
+    def execute(self, query: str, params: Any = None) -> list:
+        self.calls.append((" ".join(query.split()), params))
+        if "FROM default.aggregate_watermarks" in query:
+            cutoff = self.cutoffs.get(params["name"])
+            return [] if cutoff is None else [(cutoff,)]
+        if "SELECT today()" in query:
+            return [(TODAY,)]
+        if "FROM default.aggregate_backfill_progress" in query:
+            return [(d,) for d in self.done]
+        for source, rows in self.totals.items():
+            if f"FROM {source}" in query:
+                return rows
+        return []
+
+
+def test_backfill_inserts_pending_days_below_the_view_cutoff() -> None:
+    client = _FakeClient(done=[date(2026, 5, 2)])
+
+    assert backfill_table(client, "post_daily_metrics", days=2) == 2
+
+    inserts = [c for c in client.calls if c[0].startswith("INSERT INTO default.post_daily")]
+    assert [p["day"] for _, p in inserts] == [date(2026, 5, 3), date(2026, 5, 1)]
+    assert all(p["cutoff"] == CUTOFF and "ingested_at < %(cutoff)s" in q for q, p in inserts)
+    progress = [c[1] for c in client.calls if "aggregate_backfill_progress (table_name" in c[0]]
+    assert progress == [
+        [("post_daily_metrics", date(2026, 5, 3), CUTOFF)],
+        [("post_daily_metrics", date(2026, 5, 1), CUTOFF)],
+    ]
+
+
+def test_backfill_needs_a_recorded_or_explicit_cutoff() -> None:
+    client = _FakeClient(cutoffs={})
+
+    with pytest.raises(RuntimeError, match="--cutoff"):
+        backfill_table(client, "daily_active_users", days=0)
+    assert backfill_table(client, "daily_active_users", days=0, cutoff=CUTOFF) == 1
+    insert = next(p for q, p in client.calls if q.startswith("INSERT INTO default.daily"))
+    assert insert["cutoff"] == CUTOFF
+
+
+def test_verify_reports_keys_whose_totals_differ() -> None:
+    d1, d2 = date(2026, 5, 1), date(2026, 5, 2)
+    client = _FakeClient(
+        totals={
+            "default.funnel_record_to_publish FINAL": [(d1, "record_start", 5, 4)],
+            "default.funnel_record_to_publish_live": [
+                (d1, "record_start", 5, 4),
+                (d2, "record_start", 1, 1),
+            ],
+        }
+    )
+
+    assert verify_table(client, "funnel_record_to_publish", days=7) == [
+        ((d2, "record_start"), (0, 0), (1, 1))
+    ]
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from typing import Any
+
+import pytest
+
+from jobs.aggregates import compact_events
+from jobs.aggregates.compact_events import compact_partition, expired_partitions
+from jobs.aggregates.refresh_aggregates import raw_horizon, refresh_post_daily_metrics
+
+UNTIL = datetime(2026, 1, 31, 23, 0)
+
+
+class _FakeClient:
+    def __init__(self, rolled_until: datetime | None = None, rolled_events: int = 40) -> None:
+        self.rolled_until = rolled_until
+        self.rolled_events = rolled_events
+        self.calls: list[tuple[str, Any]] = []
+
+    def execute(self, query: str, params: Any = None) -> list:
+        query = " ".join(query.split())
+        self.calls.append((query, params))
+        if query.startswith("SELECT today() - %(days)s"):
+            return [(date(2026, 4, 22),)]  # 2026-10-19 - 180 days
+        if "FROM system.parts" in query:
+            return [(202603, 10), (202604, 20), (202605, 30)]
+        if "FROM default.events_rollup_progress" in query:
+            if "ORDER BY partition DESC" in query:
+                return [(202612,)]
+            return [(self.rolled_until,)] if self.rolled_until else []
+        if query.startswith("SELECT max(ingested_at), count()"):
+            return [(UNTIL, 40)]
+        if query.startswith("SELECT sum(events)"):
+            return [(self.rolled_events,)]
+        return []
+
+    def statements(self) -> list[str]:
+        return [q for q, _ in self.calls if not q.startswith("SELECT")]
+
+
+def test_only_months_entirely_past_retention_expire() -> None:
+    # Cutoff 2026-04-22: March is past, April is not yet.
+    assert expired_partitions(_FakeClient(), 180) == [(202603, 10)]
+
+
+def test_first_compaction_rebuilds_rollups_verifies_and_drops_raw() -> None:
+    client = _FakeClient()
+
+    assert compact_partition(client, 202601, "drop") == 40
+
+    statements = client.statements()
+    assert statements[:2] == [
+        "ALTER TABLE default.events_hourly DROP PARTITION 202601",
+        "ALTER TABLE default.events_daily_users DROP PARTITION 202601",
+    ]
+    assert [s.split(" (")[0] for s in statements[2:4]] == [
+        "INSERT INTO default.events_hourly",
+        "INSERT INTO default.events_daily_users",
+    ]
+    assert client.calls[-2][1] == [(202601, UNTIL, 40, 1)]
+    assert statements[-1] == "ALTER TABLE default.events DROP PARTITION 202601"
+
+
+def test_late_events_are_added_and_a_bad_rollup_keeps_raw() -> None:
+    late = _FakeClient(rolled_until=datetime(2026, 2, 1))
+    compact_partition(late, 202601, "recompress")
+    assert not any("DROP PARTITION" in s for s in late.statements())
+    assert late.statements()[-1] == "OPTIMIZE TABLE default.events PARTITION 202601 FINAL"
+
+    bad = _FakeClient(rolled_events=39)
+    with pytest.raises(RuntimeError, match="rolled up 39 events, raw has 40"):
+        compact_partition(bad, 202601, "drop")
+    assert "ALTER TABLE default.events DROP PARTITION 202601" not in bad.statements()
+
+
+def test_refresh_reads_rollups_before_the_raw_horizon() -> None:
+    client = _FakeClient()
+    horizon = raw_horizon(client)
+    assert horizon == date(2027, 1, 1)
+
+    refresh_post_daily_metrics(client, [date(2026, 12, 30), date(2027, 1, 2)], horizon)
+
+    (query, params), = [c for c in client.calls if c[0].startswith("INSERT")]
+    raw = "FROM default.events WHERE toDate(ts) IN %(dates)s AND toDate(ts) >= %(horizon)s"
+    assert raw in query
+    assert "FROM default.events_hourly WHERE toDate(hour) IN %(dates)s" in query
+    assert "AND toDate(hour) < %(horizon)s" in query
+    assert params["horizon"] == horizon
+
+
+def test_retention_below_reader_windows_is_refused(monkeypatch) -> None:
+    monkeypatch.setattr(compact_events, "get_client", lambda: pytest.fail("must not connect"))
+    assert compact_events.main(["--retention-days", "30"]) == 1
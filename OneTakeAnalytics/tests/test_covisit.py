@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import uuid
+from pathlib import Path
+
+from jobs.aggregates.build_covisitation import build_neighbours
+from services.reco_service import covisit
+from services.reco_service.topk_store import ReloadingTopKStore, TopKStore, write_topk_file
+
+POSTS = [str(uuid.UUID(int=i * 7919 + 1)) for i in range(200)]
+
+
+def test_topk_store_round_trip_with_collisions(tmp_path: Path) -> None:
+    path = tmp_path / "model.bin"
+    rows = [[((i + 1) % len(POSTS), 2.0), ((i + 2) % len(POSTS), 1.0)] for i in range(len(POSTS))]
+    write_topk_file(path, POSTS, rows, k=3)
+
+    store = TopKStore(path)
+
+    assert len(store) == len(POSTS)
+    for i, post_id in enumerate(POSTS):
+        assert store.lookup(post_id) == [((i + 1) % len(POSTS), 2.0), ((i + 2) % len(POSTS), 1.0)]
+    assert store.key_at(5) == POSTS[5]
+    assert store.lookup(str(uuid.uuid4())) == []
+    assert store.lookup("not-a-uuid") == []
+
+
+def test_topk_store_vocabulary(tmp_path: Path) -> None:
+    path = tmp_path / "model.bin"
+    write_topk_file(path, POSTS[:1], [[(1, 0.75), (0, 0.25)]], k=4, vocab=["rpg", "ćwiczenia"])
+
+    store = TopKStore(path)
+
+    assert [(store.vocab_at(i), w) for i, w in store.lookup(POSTS[0])] == [
+        ("ćwiczenia", 0.75),
+        ("rpg", 0.25),
+    ]
+
+
+def test_build_neighbours_indexes_every_post() -> None:
+    keys, rows = build_neighbours([("a", "b", 3.0), ("a", "c", 1.0), ("b", "a", 3.0)])
+
+    assert keys == ["a", "b", "c"]
+    assert rows == [[(1, 3.0), (2, 1.0)], [(0, 3.0)], []]
+
+
+def test_get_covisited_skips_excluded_and_context_post(tmp_path: Path, monkeypatch) -> None:
+    path = tmp_path / "covisit.bin"
+    keys, rows = build_neighbours(
+        [(POSTS[0], POSTS[1], 5.0), (POSTS[0], POSTS[2], 4.0), (POSTS[0], POSTS[3], 1.0)]
+    )
+    write_topk_file(path, keys, rows, k=10)
+    monkeypatch.setattr(covisit, "covisit_store", ReloadingTopKStore(path))
+
+    result = covisit.get_covisited(POSTS[0], limit=5, exclude_ids=[POSTS[1]])
+
+    assert result == [
+        (POSTS[2], 4.0, "viewers_also_watched"),
+        (POSTS[3], 1.0, "viewers_also_watched"),
+    ]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from services.reco_service import server
+from services.reco_service.deadline import Deadline, StageRunner
+from services.reco_service.metrics import metrics
+from services.reco_service.trending import trending_snapshot
+
+
+class _Context:
+    def __init__(self, remaining: float | None) -> None:
+        self._remaining = remaining
+
+    def time_remaining(self) -> float | None:
+        return self._remaining
+
+
+class _Request:
+    def __init__(self, **fields: object) -> None:
+        self.user_id = fields.get("user_id", "")
+        self.limit = fields.get("limit", 3)
+        self.feed_type = "HOME"
+        self.context_post_id = ""
+        self.context_tags = fields.get("context_tags", [])
+        self.exclude_post_ids: list[str] = []
+        self.trace_id = ""
+
+
+def test_deadline_uses_context_remaining_minus_reserve() -> None:
+    deadline = Deadline.from_context(_Context(1.0), default_sec=5.0, reserve_sec=0.2)
+
+    assert 0.7 < deadline.remaining() <= 0.8
+    assert deadline.cap(5.0) <= 0.8
+
+
+def test_deadline_falls_back_to_default_without_client_deadline() -> None:
+    deadline = Deadline.from_context(_Context(None), default_sec=2.0)
+
+    assert 1.9 < deadline.remaining() <= 2.0
+
+
+def test_stage_budget_is_share_of_remaining_time() -> None:
+    runner = StageRunner(Deadline(1.0), shares=(("a", 1.0), ("b", 1.0), ("c", 2.0)))
+
+    assert runner.budget("a") == pytest.approx(0.25, abs=0.01)
+    assert runner.budget("b") == pytest.approx(1 / 3, abs=0.01)
+    assert runner.budget("c") == pytest.approx(1.0, abs=0.01)
+
+
+def test_stage_runner_cuts_off_slow_stage_and_records_metric() -> None:
+    metrics.reset()
+    runner = StageRunner(Deadline(0.2), shares=(("slow", 1.0),))
+
+    def slow(deadline: Deadline) -> list[tuple[str, float, str]]:
+        time.sleep(0.5)
+        return [("post-1", 1.0, "slow")]
+
+    assert runner.run("slow", slow) == []
+    assert runner.timed_out == ["slow"]
+    assert metrics.get("reco_stage_timeouts_total", stage="slow") == 1
+
+
+def test_compute_recommendations_tops_up_partial_results_from_snapshot(monkeypatch) -> None:
+    def slow_similar(*_: object, deadline: Deadline) -> list[tuple[str, float, str]]:
+        time.sleep(0.5)
+        return []
+
+    def trending(limit: int, exclude_ids: list[str], deadline: Deadline):
+        return [("post-2", 5.0, "trending_views_72h")]
+
+    monkeypatch.setattr(server, "get_similar_by_tags", slow_similar)
+    monkeypatch.setattr(server, "SCORING_ENABLED", False)
+    monkeypatch.setattr(server, "get_trending_fallback", trending)
+    trending_snapshot.update(
+        [("post-2", 5.0, "trending_views_72h"), ("post-3", 4.0, "trending_views_72h")]
+    )
+
+    items, complete = server._compute_recommendations(
+        _Request(context_tags=["rpg"], limit=2), Deadline(0.3)
+    )
+
+    assert not complete
+    assert items == [("post-2", 5.0, "trending_views_72h"), ("post-3", 4.0, "trending_views_72h")]
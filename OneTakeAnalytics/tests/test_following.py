@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime, timedelta
+
+from services.reco_service import following, server
+from services.reco_service.following import FollowingIndex
+
+NOW = 1_000_000.0
+
+
+def test_feed_merges_followed_creators_newest_first() -> None:
+    index = FollowingIndex(posts_per_creator=2, max_age_sec=1000)
+    index.set_follow("fan", "alice", True)
+    index.set_follow("fan", "bob", True)
+    index.set_follow("fan", "carol", True)
+    index.set_follow("fan", "carol", False)
+    index.add_post("alice", "a1", NOW - 500)
+    index.add_post("alice", "a2", NOW - 100)
+    index.add_post("alice", "a0", NOW - 900)  # older than the two kept per creator
+    index.add_post("bob", "b1", NOW - 300)
+    index.add_post("bob", "b0", NOW - 2000)  # outside max_age_sec
+    index.add_post("carol", "c1", NOW - 10)
+
+    feed = index.feed("fan", limit=10, exclude_ids=["b1"], now=NOW, half_life_hours=1.0)
+
+    assert [pid for pid, _, _ in feed] == ["a2", "a1"]
+    assert feed[0][1] > feed[1][1]
+    assert {reason for _, _, reason in feed} == {"following"}
+    assert index.followed("fan") == frozenset({"alice", "bob"})
+    assert index.feed("stranger", limit=10, exclude_ids=[], now=NOW) == []
+
+
+class _FakeClient:
+    def __init__(self, results: list[list[tuple]]) -> None:
+        self._results = iter(results)
+
+    def execute(self, query: str, params: dict | None = None) -> list[tuple]:
+        return next(self._results)
+
+
+class _FakeResponse:
+    def __init__(self, data: dict) -> None:
+        self._data = data
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def json(self) -> dict:
+        return self._data
+
+
+def _fake_core(monkeypatch, follows: list[tuple[str, str]], posts: list[tuple[str, str, str]]):
+    """Serve Core's internal exports two rows per page; returns the recorded calls."""
+    calls: list[tuple[str, dict, dict]] = []
+    rows = {
+        "follows": [{"followerId": f, "followedId": c} for f, c in follows],
+        "recent-posts": [{"id": p, "authorId": a, "createdAt": t} for a, p, t in posts],
+    }
+
+    def fake_get(url: str, params: dict, headers: dict, timeout: float) -> _FakeResponse:
+        calls.append((url, params, headers))
+        path = url.rsplit("/", 1)[1]
+        page = rows[path][params["offset"] : params["offset"] + 2]
+        key = "follows" if path == "follows" else "posts"
+        return _FakeResponse({key: page, "hasMore": params["offset"] + 2 < len(rows[path])})
+
+    monkeypatch.setattr(following.requests, "get", fake_get)
+    monkeypatch.setattr(following, "CORE_INTERNAL_TOKEN", "secret")
+    return calls
+
+
+def test_load_pages_core_exports_then_update_applies_events(monkeypatch) -> None:
+    calls = _fake_core(
+        monkeypatch,
+        follows=[("fan", "alice"), ("fan", "carol"), ("other", "alice")],
+        posts=[("alice", "a1", "1970-01-01T00:01:40Z"), ("carol", "c1", "1970-01-01T00:01:50")],
+    )
+    index = FollowingIndex(max_age_sec=10**10)
+    before = datetime.now(UTC).replace(tzinfo=None)
+
+    t0 = index.load()
+
+    assert before <= t0 <= datetime.now(UTC).replace(tzinfo=None)
+    assert index.loaded
+    assert [params["offset"] for _, params, _ in calls] == [0, 2, 0]
+    assert {headers["X-Internal-Token"] for _, _, headers in calls} == {"secret"}
+    assert index.followed("fan") == frozenset({"alice", "carol"})
+    assert index.feed("fan", 5, [], now=300.0)[0][0] == "c1"
+
+    t1 = t0 + timedelta(minutes=5)
+    watermark = index.update(
+        _FakeClient([[("fan", "bob", 1, t1), ("fan", "alice", 0, t1)], [("bob", "b1", 200.0, t1)]]),
+        t0,
+    )
+
+    assert watermark == t1
+    assert index.followed("fan") == frozenset({"bob", "carol"})
+    assert [pid for pid, _, _ in index.feed("fan", 5, [], now=300.0)] == ["b1", "c1"]
+
+
+def test_reload_from_core_repairs_lost_events_and_deleted_posts(monkeypatch) -> None:
+    index = FollowingIndex(max_age_sec=10**10)
+    index.set_follow("fan", "alice", True)  # unfollow event was lost
+    index.add_post("bob", "deleted", 150.0)
+    _fake_core(monkeypatch, follows=[("fan", "bob")], posts=[("bob", "b1", "1970-01-01T00:01:40Z")])
+
+    index.load()
+
+    assert index.followed("fan") == frozenset({"bob"})
+    assert [pid for pid, _, _ in index.feed("fan", 5, [], now=300.0)] == ["b1"]
+
+
+def test_following_feed_type_skips_home_generators(monkeypatch) -> None:
+    index = FollowingIndex(max_age_sec=10**10)
+    index.loaded = True
+    index.set_follow("fan", "alice", True)
+    index.add_post("alice", "a1", 100.0)
+    monkeypatch.setattr(following, "following_index", index)
+    monkeypatch.setattr(server, "following_index", index)
+    monkeypatch.setattr(server, "SCORING_ENABLED", False)
+
+    def fail(*_: object, **__: object) -> list:
+        raise AssertionError("HOME generators must not run for FOLLOWING")
+
+    monkeypatch.setattr(server, "get_trending_fallback", fail)
+
+    items, complete = server._compute_recommendations(
+        server.reco_pb2.GetRecommendationsRequest(user_id="fan", feed_type="FOLLOWING", limit=5)
+    )
+
+    assert complete
+    assert [pid for pid, _, _ in items] == ["a1"]
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from services.analytics_ingest.live_counters import LiveCounters, SpaceSaving
+from services.reco_service import live_counters as reco_live
+
+NOW = 1_000_000.0
+
+
+def test_space_saving_keeps_heavy_hitters_within_capacity() -> None:
+    sketch = SpaceSaving(capacity=3)
+    for i in range(200):
+        sketch.add("hot")
+        sketch.add(f"cold-{i}")
+        if i % 2:
+            sketch.add("warm")
+
+    assert len(sketch.counts) == 3
+    assert sketch.counts["hot"] >= 200
+    assert sketch.counts["warm"] >= 100
+    assert max(sketch.counts, key=sketch.counts.__getitem__) == "hot"
+
+
+def test_windows_sum_buckets_and_drop_expired_events() -> None:
+    counters = LiveCounters(bucket_sec=60, window_sec=3600, capacity=10, started=NOW - 7200)
+    record = counters.record
+    record("post_view", "post", "a", int((NOW - 30) * 1000), now=NOW)
+    record("post_view", "post", "a", int((NOW - 30) * 1000), now=NOW)
+    record("post_view", "post", "b", int((NOW - 1800) * 1000), now=NOW)
+    record("post_view", "post", "b", int((NOW - 7200) * 1000), now=NOW)  # outside retention
+    record("post_like", "post", "b", int(NOW * 1000), now=NOW)
+    record("post_view", "user", "c", int(NOW * 1000), now=NOW)  # not a post
+
+    assert counters.top("views", 120, 10, now=NOW) == ([("a", 2)], 120)
+    assert counters.top("views", 0, 10, exclude_ids=["a"], now=NOW) == ([("b", 1)], 3600)
+    assert counters.top("views", 10**6, 1, now=NOW)[1] == 3600
+    assert counters.counts(["b", "z"], 3600, now=NOW) == ({"b": (1, 1, 0), "z": (0, 0, 0)}, 3600)
+
+
+def test_covered_window_is_limited_by_uptime_after_a_restart() -> None:
+    counters = LiveCounters(bucket_sec=60, window_sec=3600, capacity=10, started=NOW - 600)
+    counters.record("post_view", "post", "a", int((NOW - 30) * 1000), now=NOW)
+
+    assert counters.top("views", 3600, 10, now=NOW) == ([("a", 1)], 600)
+    assert counters.top("views", 120, 10, now=NOW)[1] == 120
+    assert counters.counts(["a"], 0, now=NOW) == ({"a": (1, 0, 0)}, 600)
+    assert counters.top("views", 0, 10, now=NOW + 3600)[1] == 3600
+
+
+class _FakeStub:
+    def __init__(self, window_sec: int) -> None:
+        self.window_sec = window_sec
+
+    def GetTopPosts(self, request, timeout: float):
+        return reco_live.analytics_pb2.GetTopPostsResponse(
+            posts=[reco_live.analytics_pb2.PostCount(post_id="p1", count=5)],
+            window_sec=min(request.window_sec, self.window_sec),
+        )
+
+
+def test_reco_uses_live_counters_only_when_they_cover_the_window(monkeypatch) -> None:
+    monkeypatch.setattr(reco_live, "LIVE_COUNTERS_ADDR", "ingest:50051")
+    monkeypatch.setattr(reco_live, "_stub", _FakeStub(window_sec=86400))
+
+    assert reco_live.get_live_trending(5, [], 24, "trending_views_24h") == [
+        ("p1", 5.0, "trending_views_24h")
+    ]
+    assert reco_live.get_live_trending(5, [], 72, "trending_views_72h") is None
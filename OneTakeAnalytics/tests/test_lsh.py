@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from typing import Any
+
+from services.reco_service import lsh
+from services.reco_service.lsh import MinHashLSH, sync_from_core
+from services.reco_service.similar_by_tags import get_similar_by_tags
+
+
+def _index(**kwargs: Any) -> MinHashLSH:
+    index = MinHashLSH(**kwargs)
+    index.insert("p-rpg", ["rpg", "boss", "indie"])
+    index.insert("p-rpg2", ["rpg", "boss", "pixel", "indie"])
+    index.insert("p-cook", ["cooking", "pasta"])
+    return index
+
+
+def test_query_ranks_by_jaccard_and_skips_unrelated() -> None:
+    index = _index()
+
+    result = index.query(["rpg", "boss", "indie"], limit=5)
+
+    assert result == [("p-rpg", 1.0), ("p-rpg2", 0.75)]
+    assert index.query_post("p-rpg", limit=5) == [("p-rpg2", 0.75)]
+    assert index.query(["rpg", "boss", "indie"], limit=5, exclude_ids=["p-rpg"]) == [
+        ("p-rpg2", 0.75)
+    ]
+
+
+def test_reinsert_moves_buckets_and_eviction_drops_oldest() -> None:
+    index = _index(max_posts=3)
+
+    index.insert("p-rpg2", ["cooking", "pasta", "vegan"])
+    index.insert("p-new", ["cooking", "pasta"])
+
+    assert "p-rpg" not in index
+    assert len(index) == 3
+    assert index.query(["rpg", "boss", "indie"], limit=5) == []
+    assert [pid for pid, _ in index.query(["cooking", "pasta"], limit=5)] == [
+        "p-new",
+        "p-cook",
+        "p-rpg2",
+    ]
+
+
+def test_similar_by_tags_uses_ready_index_without_http(monkeypatch) -> None:
+    index = _index()
+    index.ready = True
+
+    def no_http(*_: object, **__: object) -> None:
+        raise AssertionError("Core must not be called once the index is ready")
+
+    monkeypatch.setattr("services.reco_service.similar_by_tags.requests.get", no_http)
+
+    result = get_similar_by_tags(["rpg", "boss"], limit=5, exclude_ids=[], index=index)
+
+    assert result == [("p-rpg", 2 / 3, "similar_by_tags"), ("p-rpg2", 0.5, "similar_by_tags")]
+
+
+class _FakeResponse:
+    def __init__(self, payload: dict[str, Any]) -> None:
+        self._payload = payload
+
+    def raise_for_status(self) -> None:
+        return None
+
+    def json(self) -> dict[str, Any]:
+        return self._payload
+
+
+def test_sync_from_core_pages_until_known_post(monkeypatch) -> None:
+    pages: dict[str | None, dict[str, Any]] = {
+        None: {
+            "posts": [{"id": "p3", "tags": ["a"]}, {"id": "p2", "tags": ["b"]}],
+            "nextCursor": "c1",
+            "hasMore": True,
+        },
+        "c1": {"posts": [{"id": "p1", "tags": ["c"]}], "nextCursor": None, "hasMore": False},
+    }
+    calls: list[str | None] = []
+
+    def fake_get(url: str, params: dict[str, Any], timeout: int) -> _FakeResponse:
+        calls.append(params.get("cursor"))
+        return _FakeResponse(pages[params.get("cursor")])
+
+    monkeypatch.setattr(lsh.requests, "get", fake_get)
+    index = MinHashLSH()
+
+    assert sync_from_core(index) == 3
+    assert index.ready
+    assert index.tags_of("p1") == ("c",)
+
+    pages[None] = {
+        "posts": [{"id": "p4", "tags": ["a", "b"]}, {"id": "p3", "tags": ["a"]}],
+        "nextCursor": "c0",
+        "hasMore": True,
+    }
+    calls.clear()
+
+    assert sync_from_core(index) == 1
+    assert calls == [None]
+    assert index.query(["a", "b"], limit=1) == [("p4", 1.0)]
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+from services.reco_service import personalize, prefetch, server
+from services.reco_service.cache import RecoCache
+from services.reco_service.prefetch import fetch_user_histories
+from services.reco_service.seen_filter import SeenFilter
+from services.reco_service.trending import TrendingSnapshot
+
+
+class _FakeClient:
+    queries: list[dict[str, object]] = []
+
+    def __init__(self, **_: object) -> None:
+        pass
+
+    def execute(self, query: str, params: dict[str, object]) -> list[tuple[str, str, str, int]]:
+        _FakeClient.queries.append(params)
+        return [
+            ("user-1", "post-a", "post_view", 1),
+            ("user-1", "post-b", "watch_complete", 1),
+            ("user-1", "post-c", "post_like", 1),
+            ("user-2", "post-d", "post_view", 0),
+        ]
+
+
+def test_fetch_user_histories_uses_one_in_query(monkeypatch) -> None:
+    _FakeClient.queries = []
+    monkeypatch.setattr(prefetch, "Client", _FakeClient)
+
+    histories = fetch_user_histories(["user-2", "user-1", "user-1", "user-3"])
+
+    assert _FakeClient.queries == [{"user_ids": ("user-1", "user-2", "user-3")}]
+    assert histories["user-1"].watched == ["post-b", "post-a"]
+    assert histories["user-1"].liked == ["post-c"]
+    assert histories["user-2"].watched == []
+    assert histories["user-3"].watched == []
+
+
+def test_batch_shares_upstream_calls_and_keeps_request_order(monkeypatch) -> None:
+    _FakeClient.queries = []
+    trending_calls: list[int] = []
+    tag_calls: list[str] = []
+
+    def fake_trending(limit: int, exclude_ids: list[str], interval_hours: int = 72):
+        trending_calls.append(interval_hours)
+        return [("post-t1", 9.0, "trending_views_72h"), ("post-t2", 8.0, "trending_views_72h")]
+
+    def fake_tags(post_id: str, deadline: object = None) -> list[str]:
+        tag_calls.append(post_id)
+        return ["rpg"]
+
+    def fake_similar(tags: list[str], limit: int, exclude_ids: list[str], deadline: object = None):
+        return [("post-s1", 1.0, "similar_by_tags")] if "post-s1" not in exclude_ids else []
+
+    monkeypatch.setattr(prefetch, "Client", _FakeClient)
+    monkeypatch.setattr(prefetch, "get_trending_post_ids", fake_trending)
+    monkeypatch.setattr(server, "SCORING_ENABLED", False)
+    monkeypatch.setattr(personalize, "_get_post_tags", fake_tags)
+    monkeypatch.setattr(personalize, "get_similar_by_tags", fake_similar)
+    monkeypatch.setattr(server, "_reco_cache", RecoCache(ttl_minutes=1))
+
+    batch = server.reco_pb2.GetRecommendationsBatchRequest(
+        requests=[
+            server.reco_pb2.GetRecommendationsRequest(user_id="user-2", limit=2),
+            server.reco_pb2.GetRecommendationsRequest(user_id="user-1", limit=2),
+            server.reco_pb2.GetRecommendationsRequest(user_id="user-2", limit=2),
+        ]
+    )
+    response = server.RecoServicer().GetRecommendationsBatch(batch, context=None)
+
+    assert len(_FakeClient.queries) == 1
+    assert sorted(trending_calls) == [24, 72]
+    assert len(tag_calls) == len(set(tag_calls))
+    assert [[i.post_id for i in r.items] for r in response.responses] == [
+        ["post-t1", "post-t2"],
+        ["post-s1", "post-t1"],
+        ["post-t1", "post-t2"],
+    ]
+
+
+def test_single_request_fetches_history_once_for_watch_and_liked(monkeypatch) -> None:
+    _FakeClient.queries = []
+
+    def fake_similar(tags: list[str], limit: int, exclude_ids: list[str], deadline: object = None):
+        return [(f"post-s{len(exclude_ids)}", 1.0, "similar_by_tags")]
+
+    monkeypatch.setattr(prefetch, "Client", _FakeClient)
+    monkeypatch.setattr(server, "SCORING_ENABLED", False)
+    monkeypatch.setattr(personalize, "_get_post_tags", lambda post_id, deadline=None: ["rpg"])
+    monkeypatch.setattr(personalize, "get_similar_by_tags", fake_similar)
+    monkeypatch.setattr(personalize, "get_trending_post_ids", lambda *args, **kwargs: [])
+    monkeypatch.setattr(server, "_reco_cache", RecoCache(ttl_minutes=1))
+    monkeypatch.setattr(server, "seen_filter", SeenFilter())
+    monkeypatch.setattr(server, "trending_snapshot", TrendingSnapshot())
+
+    request = server.reco_pb2.GetRecommendationsRequest(user_id="user-1", limit=5)
+    response = server.RecoServicer().GetRecommendations(request, context=None)
+
+    assert len(_FakeClient.queries) == 1
+    assert [i.post_id for i in response.items] == ["post-s0", "post-s1"]
+
+
+def test_batch_keeps_each_limit_for_the_same_user(monkeypatch) -> None:
+    def fake_trending(limit: int, exclude_ids: list[str], interval_hours: int = 72):
+        return [(f"post-{i}", float(100 - i), "trending_views_72h") for i in range(60)]
+
+    monkeypatch.setattr(prefetch, "Client", _FakeClient)
+    monkeypatch.setattr(prefetch, "get_trending_post_ids", fake_trending)
+    monkeypatch.setattr(personalize, "get_trending_post_ids", fake_trending)
+    monkeypatch.setattr(server, "SCORING_ENABLED", False)
+    monkeypatch.setattr(server, "_reco_cache", RecoCache(ttl_minutes=1))
+    monkeypatch.setattr(server, "seen_filter", SeenFilter())
+    monkeypatch.setattr(server, "trending_snapshot", TrendingSnapshot())
+
+    batch = server.reco_pb2.GetRecommendationsBatchRequest(
+        requests=[
+            server.reco_pb2.GetRecommendationsRequest(user_id="user-3", limit=5),
+            server.reco_pb2.GetRecommendationsRequest(user_id="user-3", limit=50),
+        ]
+    )
+    response = server.RecoServicer().GetRecommendationsBatch(batch, context=None)
+
+    assert [len(r.items) for r in response.responses] == [5, 50]
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+
+from benchmarks import reco_service as bench
+from services.reco_service import server
+
+
+def _run(scenario: bench.Scenario, requests: int = 12) -> dict:
+    catalog = bench.build_catalog(n_posts=300, n_tags=20, tags_per_post=3, seed=1)
+    clickhouse = bench.FakeClickHouse(catalog, latency_ms=0, history_rows=10)
+    with bench.FakeCore(catalog, latency_ms=0, posts_per_tag=20, post_bytes=16) as core:
+        return bench.run_scenario(scenario, clickhouse, core, requests, limit=5, seed=1)
+
+
+def test_misses_call_upstreams_and_hits_do_not() -> None:
+    cache = server._reco_cache
+    result = _run(bench.Scenario("test_mixed", 0.5))
+
+    assert server._reco_cache is cache
+    assert result["hits"] + result["misses"] == 12
+    users = bench.workload(bench.Scenario("test_mixed", 0.5), 12, seed=1)
+    assert result["hits"] == len(users) - len(set(users)) > 0
+    assert result["calls_per_hit"] == {}
+    assert result["calls_per_miss"]["clickhouse.user_history"] >= 1
+    assert result["calls_per_miss"]["core.post"] > 0
+    assert result["p99_ms"] >= result["p50_ms"] > 0
+    assert result["peak_kib"] > 0
+
+
+def test_indexed_scenario_serves_tags_from_the_lsh_index() -> None:
+    result = _run(bench.Scenario("test_indexed", 0.0, indexed=True))
+
+    assert "core.posts_by_tag" not in result["calls_per_request"]
+    assert "clickhouse.trending" not in result["calls_per_request"]
+
+
+def test_regressions_flag_more_calls_and_slower_p99() -> None:
+    before = {"calls_per_request": {"core.post": 2.0}, "p99_ms": 100.0, "peak_kib": 500.0}
+    same = {"calls_per_request": {"core.post": 2.0}, "p99_ms": 110.0, "peak_kib": 550.0}
+    worse = {
+        "calls_per_request": {"core.post": 2.5, "clickhouse.other": 0.1},
+        "p99_ms": 130.0,
+        "peak_kib": 500.0,
+    }
+
+    assert bench.regressions({"cold": same}, {"cold": before}, tolerance=0.2) == []
+    assert bench.regressions({"cold": worse}, {"cold": before}, tolerance=0.2) == [
+        "cold: core.post per request 2.00 -> 2.50",
+        "cold: clickhouse.other per request 0.00 -> 0.10",
+        "cold: p99_ms 100.0 -> 130.0",
+    ]
+    assert bench.regressions({"warm": worse}, {"cold": before}, tolerance=0.2) == []
+
+
+def test_regressions_flag_memory_growth_beyond_tolerance_only() -> None:
+    before = {"calls_per_request": {}, "p99_ms": 100.0, "peak_kib": 1000.0}
+    within = {"calls_per_request": {}, "p99_ms": 100.0, "peak_kib": 1200.0}
+    beyond = {"calls_per_request": {}, "p99_ms": 90.0, "peak_kib": 1201.0}
+    fewer = {"calls_per_request": {"core.post": 1.0}, "p99_ms": 100.0, "peak_kib": 1000.0}
+
+    assert bench.regressions({"warm": within}, {"warm": before}, tolerance=0.2) == []
+    assert bench.regressions({"warm": beyond}, {"warm": before}, tolerance=0.2) == [
+        "warm: peak_kib 1000.0 -> 1201.0"
+    ]
+    assert bench.regressions({"warm": before}, {"warm": fewer}, tolerance=0.2) == []
+
+
+def test_workload_is_seeded_and_repeats_users_at_the_hit_ratio() -> None:
+    mixed = bench.Scenario("mixed", 0.5)
+
+    assert bench.workload(mixed, 50, seed=3) == bench.workload(mixed, 50, seed=3)
+    assert bench.workload(mixed, 50, seed=3) != bench.workload(mixed, 50, seed=4)
+    cold = bench.workload(bench.Scenario("cold", 0.0), 20, seed=3)
+    assert len(set(cold)) == 20
+    assert bench.workload(bench.Scenario("warm", 1.0), 20, seed=3) == ["user-000000"] * 20
+    users = bench.workload(mixed, 1000, seed=3)
+    assert 400 < len(users) - len(set(users)) < 600
+
+
+def test_save_then_compare_replays_the_saved_settings(tmp_path) -> None:
+    saved = tmp_path / "before.json"
+    argv = [
+        "--scenario", "warm", "--requests", "6", "--posts", "200", "--tags", "10",
+        "--clickhouse-latency-ms", "0", "--core-latency-ms", "0",
+    ]
+
+    assert bench.main(argv + ["--save", str(saved)]) == 0
+    data = json.loads(saved.read_text())
+    assert data["settings"]["requests"] == 6
+    assert list(data["results"]) == ["warm"]
+    assert bench.main(["--compare", str(saved), "--tolerance", "100"]) == 0
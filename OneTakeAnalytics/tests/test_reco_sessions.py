@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from services.reco_service import server
+from services.reco_service.sessions import RecoSessionStore
+
+ITEMS = [(f"post-{i}", float(10 - i), "trending_views_72h") for i in range(5)]
+
+
+class _Context:
+    def time_remaining(self) -> None:
+        return None
+
+    def is_active(self) -> bool:
+        return True
+
+
+def test_session_pages_through_ranked_list() -> None:
+    store = RecoSessionStore(ttl_seconds=60, max_sessions=10, max_items=100)
+    cursor = store.create("user-1", ITEMS)
+
+    first = store.page(cursor, "user-1", 2)
+    assert first is not None
+    items, cursor = first
+    assert [pid for pid, _, _ in items] == ["post-0", "post-1"]
+
+    second = store.page(cursor, "user-1", 3)
+    assert second is not None
+    items, cursor = second
+    assert [pid for pid, _, _ in items] == ["post-2", "post-3", "post-4"]
+    assert cursor == ""
+
+
+def test_session_rejects_foreign_user_and_evicts_oldest() -> None:
+    store = RecoSessionStore(ttl_seconds=60, max_sessions=1, max_items=100)
+    first = store.create("user-1", ITEMS)
+
+    assert store.page(first, "user-2", 2) is None
+
+    store.create("user-1", ITEMS)
+    assert store.page(first, "user-1", 2) is None
+    assert len(store) == 1
+
+
+def test_session_expires_after_ttl(monkeypatch) -> None:
+    timeline = iter([100.0, 200.0])
+    monkeypatch.setattr("services.reco_service.sessions.time.time", lambda: next(timeline))
+    store = RecoSessionStore(ttl_seconds=60, max_sessions=10, max_items=100)
+
+    cursor = store.create("user-1", ITEMS)
+
+    assert store.page(cursor, "user-1", 2) is None
+
+
+def test_stream_recommendations_yields_pages_without_recomputing(monkeypatch) -> None:
+    calls: list[int | None] = []
+
+    def fake_compute(request, deadline, prefetch=None, limit=None):
+        calls.append(limit)
+        return ITEMS, True
+
+    monkeypatch.setattr(server, "_compute_recommendations", fake_compute)
+    monkeypatch.setattr(server, "SCORING_ENABLED", False)
+    monkeypatch.setattr(
+        server, "_sessions", RecoSessionStore(ttl_seconds=60, max_sessions=10, max_items=100)
+    )
+    request = server.reco_pb2.GetRecommendationsRequest(user_id="user-1", limit=2)
+
+    pages = list(server.RecoServicer().StreamRecommendations(request, _Context()))
+
+    assert [[i.post_id for i in p.items] for p in pages] == [
+        ["post-0", "post-1"],
+        ["post-2", "post-3"],
+        ["post-4"],
+    ]
+    assert pages[-1].next_cursor == ""
+    assert calls == [2 * server.SESSION_DEPTH_PAGES]
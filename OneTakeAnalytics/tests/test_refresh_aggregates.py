@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+from datetime import date, datetime
+from types import SimpleNamespace
+from typing import Any
+
+from jobs.aggregates import refresh_aggregates
+from jobs.aggregates.refresh_aggregates import MeteredClient, refresh_table
+
+UNTIL = datetime(2026, 5, 2, 12, 0)
+
+
+class _FakeClient:
+    def __init__(self, watermark: datetime | None, changed: list[date]) -> None:
+        self.watermark = watermark
+        self.changed = changed
+        self.calls: list[tuple[str, Any]] = []
+
+    def execute(self, query: str, params: Any = None) -> list:
+        self.calls.append((" ".join(query.split()), params))
+        if "now64(3)" in query:
+            return [(UNTIL,)]
+        if "FROM default.aggregate_watermarks" in query:
+            return [(self.watermark,)] if self.watermark else []
+        if "SELECT DISTINCT toDate(ts)" in query:
+            return [(d,) for d in self.changed]
+        return []
+
+    def inserts(self, table: str) -> list[tuple[str, Any]]:
+        return [c for c in self.calls if c[0].startswith(f"INSERT INTO default.{table}")]
+
+
+def test_incremental_run_recomputes_only_changed_days() -> None:
+    client = _FakeClient(datetime(2026, 5, 2, 11, 0), [date(2026, 4, 3), date(2026, 5, 2)])
+
+    assert refresh_table(client, "post_daily_metrics") == 2
+
+    (query, params), = client.inserts("post_daily_metrics")
+    assert "toDate(ts) IN %(dates)s" in query
+    assert params == {"dates": (date(2026, 4, 3), date(2026, 5, 2))}
+    assert client.inserts("aggregate_watermarks")[0][1] == [("post_daily_metrics", UNTIL)]
+
+
+def test_no_new_events_only_moves_the_watermark() -> None:
+    client = _FakeClient(datetime(2026, 5, 2, 11, 0), [])
+
+    assert refresh_table(client, "funnel_record_to_publish") == 0
+
+    assert client.inserts("funnel_record_to_publish") == []
+    assert len(client.inserts("aggregate_watermarks")) == 1
+
+
+def test_full_mode_and_missing_watermark_rescan_the_window(monkeypatch) -> None:
+    monkeypatch.setattr(refresh_aggregates, "DAYS_BACK", 30)
+    for client, full in ((_FakeClient(None, []), False), (_FakeClient(UNTIL, []), True)):
+        assert refresh_table(client, "daily_active_users", full=full) is None
+        (query, params), = client.inserts("daily_active_users")
+        assert "toDate(ts) >= today() - %(days)s" in query and params == {"days": 30}
+
+
+def test_funnel_is_one_ordered_windowfunnel_pass() -> None:
+    client = _FakeClient(datetime(2026, 5, 2, 11, 0), [date(2026, 5, 2)])
+
+    refresh_table(client, "funnel_record_to_publish")
+
+    (query, params), = client.inserts("funnel_record_to_publish")
+    assert query.count("FROM default.events") == 1
+    assert "windowFunnel(%(window_sec)s)" in query
+    assert "arraySlice(%(step_names)s, 1, level)" in query
+    assert params["steps"] == tuple(params["step_names"])
+    assert [params[f"step_{i}"] for i in range(1, 5)] == params["step_names"]
+
+
+def test_metered_client_sums_progress_and_main_runs_tables_in_parallel(monkeypatch) -> None:
+    class _Progress(_FakeClient):
+        def execute(self, query: str, params: Any = None) -> list:
+            self.last_query = SimpleNamespace(progress=SimpleNamespace(rows=10, bytes=2048))
+            return super().execute(query, params)
+
+    metered = MeteredClient(_Progress(None, []))
+    metered.execute("SELECT 1")
+    metered.execute("SELECT 2")
+    assert (metered.rows_read, metered.bytes_read) == (20, 4096)
+
+    clients: list[_FakeClient] = []
+
+    def _client() -> _FakeClient:
+        clients.append(_Progress(UNTIL, [date(2026, 5, 2)]))
+        return clients[-1]
+
+    monkeypatch.setattr(refresh_aggregates, "get_client", _client)
+    assert refresh_aggregates.main([]) == 0
+    assert len(clients) == len(refresh_aggregates.AGGREGATES)
+    assert all(len(c.inserts("aggregate_watermarks")) == 1 for c in clients)
+
+
+def test_approx_mode_stores_daily_states_and_fills_tables_from_them(monkeypatch) -> None:
+    monkeypatch.setattr(refresh_aggregates, "DISTINCT_MODE", "approx")
+    for table in ("daily_active_users", "funnel_record_to_publish"):
+        client = _FakeClient(datetime(2026, 5, 2, 11, 0), [date(2026, 5, 2)])
+        refresh_table(client, table)
+
+        (state_query, _), = client.inserts(f"{table}_state")
+        (query, params), = client.inserts(f"{table} ")
+        assert "uniqCombined64State(" in state_query and "uniqExact" not in state_query
+        assert f"FROM default.{table}_state WHERE date IN %(dates)s" in query
+        assert "uniqCombined64Merge(" in query and "FROM default.events" not in query
+        assert params["dates"] == (date(2026, 5, 2),)
+
+
+def test_user_activity_writes_day_bitmaps_and_first_seen() -> None:
+    client = _FakeClient(datetime(2026, 5, 2, 11, 0), [date(2026, 5, 2)])
+
+    assert refresh_table(client, "user_activity") == 1
+
+    (activity, params), = client.inserts("user_activity_monthly")
+    assert "groupBitOr(bitShiftLeft(toUInt32(1), toDayOfMonth(ts) - 1))" in activity
+    assert params == {"dates": (date(2026, 5, 2),)}
+    assert len(client.inserts("user_first_seen")) == 1
+    assert client.inserts("aggregate_watermarks")[0][1][0][0] == "user_activity"
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from datetime import date
+
+import numpy as np
+
+from jobs.aggregates.retention import EPOCH, retention_matrix
+
+
+def _day(d: date) -> int:
+    return (d - EPOCH).days
+
+
+def _bitmap(*days: int) -> int:
+    return sum(1 << (d - 1) for d in days)
+
+
+def test_retention_matrix_from_month_bitmaps() -> None:
+    jan, feb = _day(date(2026, 1, 1)), _day(date(2026, 2, 1))
+    # (user, cohort, month, bitmap): user 1 first seen Jan 30, back Jan 31 and Feb 6 (D1, D7);
+    # user 2 first seen Jan 30, never back; user 3 first seen Jan 31, back Feb 1 (D1).
+    rows = [
+        (1, date(2026, 1, 30), jan, _bitmap(30, 31)),
+        (1, date(2026, 1, 30), feb, _bitmap(6)),
+        (2, date(2026, 1, 30), jan, _bitmap(30)),
+        (3, date(2026, 1, 31), jan, _bitmap(31)),
+        (3, date(2026, 1, 31), feb, _bitmap(1)),
+    ]
+    uids, cohorts, months, bitmaps = (np.array(c) for c in zip(*rows, strict=True))
+    cohorts = np.array([_day(d) for d in cohorts])
+
+    m = retention_matrix(
+        uids, cohorts, months, bitmaps, date(2026, 1, 30), date(2026, 1, 31), 7, date(2026, 2, 6)
+    )
+
+    assert m.cohorts == [date(2026, 1, 30), date(2026, 1, 31)]
+    assert m.sizes.tolist() == [2, 1]
+    assert m.retained[:, 0].tolist() == [2, 1]
+    np.testing.assert_array_equal(m.at((1, 7))[0], [0.5, 0.5])
+    # Jan 31 + 7 is after as_of: not observable yet.
+    assert m.at((1,))[1, 0] == 1.0 and np.isnan(m.at((7,))[1, 0])
+
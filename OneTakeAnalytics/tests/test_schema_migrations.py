@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from jobs.schema.migrate import MIGRATIONS_DIR, Migration, discover, migrate
+from services.analytics_ingest.clickhouse_writer import CREATE_TABLE_SQL
+
+EVENTS_DDL = MIGRATIONS_DIR.parent / "init" / "01_events.sql"
+
+
+def _normalize(ddl: str) -> str:
+    lines = [line for line in ddl.splitlines() if not line.lstrip().startswith("--")]
+    return re.sub(r"\s+", " ", " ".join(lines)).replace("default.", "").strip(" ;")
+
+
+class _FakeClient:
+    def __init__(self, recorded: list[tuple[int, str]] | None = None) -> None:
+        self.recorded = recorded or []
+        self.statements: list[str] = []
+
+    def execute(self, query: str, params: Any = None) -> list:
+        if "FROM default.schema_migrations" in query:
+            return list(self.recorded)
+        if query.startswith("INSERT INTO default.schema_migrations"):
+            self.recorded += [(v, checksum) for v, _, checksum in params]
+        elif not query.lstrip().startswith("CREATE TABLE IF NOT EXISTS default.schema_migrations"):
+            self.statements.append(query)
+        return []
+
+
+def test_ingest_ddl_matches_init_script_and_migrations_are_sequential() -> None:
+    assert _normalize(CREATE_TABLE_SQL) == _normalize(EVENTS_DDL.read_text())
+    migrations = discover()
+    assert [m.version for m in migrations] == list(range(1, len(migrations) + 1))
+    assert all(m.statements() for m in migrations)
+
+
+def test_objects_created_after_the_baseline_also_have_a_migration() -> None:
+    # init 01-02 are the baseline; everything later must reach existing databases too.
+    migrated = {_normalize(s) for m in discover() for s in m.statements()}
+    for path in sorted((MIGRATIONS_DIR.parent / "init").glob("*.sql"))[2:]:
+        for statement in Migration(0, path.stem, path).statements():
+            assert _normalize(statement) in migrated, f"{path.name}: {statement[:60]}"
+
+
+def test_init_scripts_do_not_alter_tables() -> None:
+    # Changes to existing tables go through a migration; init only creates the final schema.
+    for path in sorted((MIGRATIONS_DIR.parent / "init").glob("*.sql")):
+        assert not re.search(r"^\s*ALTER\b", path.read_text(), flags=re.M | re.I), path.name
+
+
+def _write(directory: Path, name: str, sql: str) -> None:
+    (directory / name).write_text(sql)
+
+
+def test_migrate_applies_pending_once_and_rejects_edited_files(tmp_path: Path) -> None:
+    _write(tmp_path, "0001_first.sql", "-- comment\nALTER TABLE events ADD COLUMN a UInt8;\n")
+    _write(tmp_path, "0002_second.sql", "ALTER TABLE events\n    ADD COLUMN b UInt8;\nSELECT 1;\n")
+    client = _FakeClient()
+
+    assert [m.version for m in migrate(client, discover(tmp_path), to_version=1)] == [1]
+    assert [m.version for m in migrate(client, discover(tmp_path))] == [2]
+    assert migrate(client, discover(tmp_path)) == []
+    assert client.statements == [
+        "ALTER TABLE events ADD COLUMN a UInt8",
+        "ALTER TABLE events\n    ADD COLUMN b UInt8",
+        "SELECT 1",
+    ]
+
+    _write(tmp_path, "0001_first.sql", "ALTER TABLE events ADD COLUMN a UInt16;\n")
+    with pytest.raises(RuntimeError, match="0001_first.sql changed"):
+        migrate(client, discover(tmp_path))
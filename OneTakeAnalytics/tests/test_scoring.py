@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+import numpy as np
+
+from services.reco_service.post_meta import PostMeta, post_meta
+from services.reco_service.scoring import FEATURES, parse_weights, rank_candidates
+
+NOW = 1_700_000_000.0
+
+
+def _weights(**values: float) -> np.ndarray:
+    return parse_weights(",".join(f"{k}={v}" for k, v in values.items()))
+
+
+def test_parse_weights_orders_by_feature_and_ignores_unknown() -> None:
+    weights = parse_weights("recency=0.5, bogus=3, source=2")
+
+    expected = {"source": 2.0, "recency": 0.5}
+    assert weights.tolist() == [expected.get(f, 0.0) for f in FEATURES]
+
+
+def test_rank_candidates_orders_by_engagement_and_recency() -> None:
+    post_meta.put("post-old", PostMeta(tags=("rpg",), created_at=NOW - 30 * 24 * 3600))
+    post_meta.put("post-new", PostMeta(tags=("rpg",), created_at=NOW - 3600))
+    candidates = [
+        ("post-old", 1.0, "similar_by_tags"),
+        ("post-new", 1.0, "similar_by_tags"),
+        ("post-popular", 50.0, "trending_views_72h"),
+    ]
+    features: dict[str, tuple[float, ...]] = {
+        "post-old": (0.0, 0.0, 10.0, 0.0, 0.0, NOW - 30 * 24 * 3600),
+        "post-popular": (40.0, 50.0, 50.0, 25.0, 40.0, NOW - 24 * 3600),
+    }
+
+    ranked = rank_candidates(
+        candidates,
+        context_tags=["rpg"],
+        weights=_weights(recency=1.0, completion_rate=2.0),
+        features=features,
+        now=NOW,
+    )
+
+    assert [pid for pid, _, _ in ranked] == ["post-popular", "post-new", "post-old"]
+    assert ranked[0][2] == "trending_views_72h"
+    assert ranked[0][1] > ranked[1][1] > ranked[2][1]
+
+
+def test_rank_candidates_uses_tag_overlap_and_drops_duplicates() -> None:
+    post_meta.put("post-a", PostMeta(tags=("rpg", "boss"), created_at=None))
+    post_meta.put("post-b", PostMeta(tags=("cooking",), created_at=None))
+    candidates = [
+        ("post-b", 1.0, "similar_by_tags"),
+        ("post-a", 1.0, "similar_by_tags"),
+        ("post-b", 3.0, "trending_views_24h"),
+    ]
+
+    ranked = rank_candidates(
+        candidates, ["rpg", "boss"], weights=_weights(tag_overlap=1.0), features={}, now=NOW
+    )
+
+    assert ranked == [("post-a", 1.0, "similar_by_tags"), ("post-b", 0.0, "similar_by_tags")]
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+from services.reco_service import server
+from services.reco_service.cache import RecoCache
+from services.reco_service.seen_filter import SeenFilter
+
+POSTS = [f"post-{i}" for i in range(50)]
+
+
+def test_filter_remembers_posts_per_user_without_false_negatives() -> None:
+    f = SeenFilter(bits=4096, hashes=6, capacity=400, rotate_sec=3600, max_users=10)
+
+    f.add("user-1", POSTS[:20], now=0.0)
+
+    assert f.seen("user-1", POSTS[:20], now=1.0) == [True] * 20
+    assert sum(f.seen("user-1", POSTS[20:], now=1.0)) <= 1
+    assert f.seen("user-2", POSTS[:3], now=1.0) == [False] * 3
+
+
+def test_generations_expire_after_two_rotations_and_users_are_bounded() -> None:
+    f = SeenFilter(bits=1024, hashes=4, capacity=100, rotate_sec=10, max_users=2)
+
+    f.add("user-1", ["old"], now=0.0)
+    f.add("user-1", ["new"], now=12.0)
+
+    assert f.seen("user-1", ["old", "new"], now=15.0) == [True, True]
+    assert f.seen("user-1", ["old", "new"], now=25.0) == [False, True]
+
+    f.add("user-2", ["a"], now=25.0)
+    f.add("user-3", ["a"], now=25.0)
+
+    assert len(f) == 2
+    assert f.seen("user-1", ["new"], now=25.0) == [False]
+
+
+def test_repeat_requests_serve_unseen_items_from_one_cached_list(monkeypatch) -> None:
+    calls: list[int] = []
+
+    def fake_compute(request, deadline=None, prefetch=None, limit=None):
+        calls.append(limit)
+        return [(pid, 1.0, "trending_views_72h") for pid in POSTS[:limit]], True
+
+    monkeypatch.setattr(server, "_compute_recommendations", fake_compute)
+    monkeypatch.setattr(server, "_reco_cache", RecoCache(ttl_minutes=5))
+    monkeypatch.setattr(server, "seen_filter", SeenFilter(max_users=10))
+    monkeypatch.setattr(server, "SEEN_FILTER_ENABLED", True)
+    request = server.reco_pb2.GetRecommendationsRequest(user_id="user-1", limit=2)
+    deadline = server.Deadline(1.0)
+
+    first = [item.post_id for item in server._recommend(request, deadline)]
+    second = [item.post_id for item in server._recommend(request, deadline)]
+
+    assert first == ["post-0", "post-1"]
+    assert second == ["post-2", "post-3"]
+    assert len(calls) == 1
+    assert calls[0] > 2
+
+
+def test_re_adding_posts_does_not_use_up_capacity() -> None:
+    f = SeenFilter(bits=4096, hashes=6, capacity=10, rotate_sec=3600, max_users=10)
+
+    for _ in range(4):  # the view poller re-reads its overlap window on every poll
+        f.add("user-1", POSTS[:8], now=0.0)
+    f.add("user-1", POSTS[8:10], now=0.0)
+
+    assert f.seen("user-1", POSTS[:10], now=1.0) == [True] * 10
+    f.add("user-1", POSTS[10:11], now=2.0)  # the 11th distinct post starts a new generation
+    assert f.seen("user-1", POSTS[:11], now=3.0) == [True] * 11
+    assert f._users["user-1"].count == 1
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import threading
+from pathlib import Path
+
+from services.reco_service.cache import SharedRecoCache
+from services.reco_service.lsh import MinHashLSH
+from services.reco_service.post_meta import PostMeta, PostMetaStore
+from services.reco_service.shared_state import POSTS_FILE, PostLogReader, PostLogWriter
+from services.reco_service.shm_cache import SharedMemoryCache
+
+
+def _cache(slots: int = 16, slot_bytes: int = 256, locks: list | None = None) -> SharedMemoryCache:
+    return SharedMemoryCache(slots, slot_bytes, locks or [threading.Lock()], create=True)
+
+
+def test_round_trip_and_ttl_expiry() -> None:
+    cache = _cache()
+    try:
+        assert cache.set("k", b"value", ttl_sec=60, now=1000.0)
+        assert cache.get("k", now=1010.0) == b"value"
+        assert cache.get("k", now=1061.0) is None
+        assert cache.get("other", now=1010.0) is None
+    finally:
+        cache.close()
+        cache.unlink()
+
+
+def test_oversized_values_are_not_cached() -> None:
+    cache = _cache(slot_bytes=64)
+    try:
+        assert not cache.set("k", b"x" * 64, ttl_sec=60)
+        assert cache.get("k") is None
+    finally:
+        cache.close()
+        cache.unlink()
+
+
+def _child_set(name: str, locks: list) -> None:
+    cache = SharedMemoryCache(16, 256, locks, name=name)
+    cache.set("from-child", b"hello", ttl_sec=60)
+    cache.close()
+
+
+def test_values_written_by_another_process_are_visible() -> None:
+    ctx = multiprocessing.get_context("spawn")
+    locks = [ctx.Lock()]
+    cache = _cache(locks=locks)
+    try:
+        child = ctx.Process(target=_child_set, args=(cache.name, locks))
+        child.start()
+        child.join(timeout=30)
+        assert child.exitcode == 0
+        assert cache.get("from-child") == b"hello"
+    finally:
+        cache.close()
+        cache.unlink()
+
+
+def test_shared_reco_cache_uses_codec() -> None:
+    shm = _cache()
+    try:
+        cache = SharedRecoCache(
+            shm,
+            ttl_minutes=1,
+            encode=lambda items: json.dumps(items).encode(),
+            decode=lambda raw: [tuple(i) for i in json.loads(raw)],
+        )
+        items = [("post-1", 1.0, "trending")]
+        cache.set("user-1", "HOME", items, exclude_ids=("post-9",))
+        assert cache.get("user-1", "HOME", exclude_ids=("post-9",)) == items
+        assert cache.get("user-1", "HOME") is None
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def test_post_log_is_tailed_and_reread_after_rewrite(tmp_path: Path) -> None:
+    writer = PostLogWriter(tmp_path, max_posts=2)
+    reader = PostLogReader(tmp_path)
+    index, metas = MinHashLSH(), PostMetaStore(10)
+
+    writer.append("p1", PostMeta(tags=("rpg",), created_at=1.0))
+    writer.flush()
+    assert reader.poll(index, metas) == 1
+    assert reader.poll(index, metas) == 0
+    assert index.ready and metas.get("p1") == PostMeta(tags=("rpg",), created_at=1.0)
+
+    # Past 2 * max_posts lines the log is rewritten with the newest max_posts.
+    for i in range(2, 6):
+        writer.append(f"p{i}", PostMeta(tags=("rpg", f"t{i}"), created_at=float(i)))
+    writer.flush()
+    assert (tmp_path / POSTS_FILE).read_text().count("\n") == 2
+    assert reader.poll(index, metas) == 2
+    assert "p5" in index and metas.get("p4") is not None
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+
+from services.reco_service import snapshot
+from services.reco_service.cache import RecoCache
+from services.reco_service.lsh import MinHashLSH
+from services.reco_service.trending import DecayedTrending, TrendingSnapshot
+
+ITEMS = [("p1", 2.0, "similar_by_tags"), ("p2", 1.0, "trending")]
+WEIGHTS = {"views": 1.0, "likes": 3.0, "completions": 2.0}
+
+
+@pytest.fixture
+def state(monkeypatch) -> tuple[DecayedTrending, TrendingSnapshot]:
+    decayed = DecayedTrending(half_life_hours=24, weights=WEIGHTS)
+    trending = TrendingSnapshot()
+    monkeypatch.setattr(snapshot, "decayed_trending", decayed)
+    monkeypatch.setattr(snapshot, "trending_snapshot", trending)
+    return decayed, trending
+
+
+def _save(path: Path, decayed: DecayedTrending, trending: TrendingSnapshot) -> None:
+    cache = RecoCache(ttl_minutes=10)
+    cache.set("u1", "HOME", list(ITEMS))
+    index = MinHashLSH()
+    index.insert("11111111-1111-1111-1111-111111111111", ["rpg", "boss"])
+    trending.update([("p9", 5.0, "trending_decayed")])
+    decayed.restore(
+        {
+            "t0": 3600 * 100,
+            "settled_until": 3600 * 110,
+            "settled": {"p9": 5.0},
+            "half_life_sec": 24 * 3600,
+            "weights": WEIGHTS,
+        },
+        now=3600 * 110,
+    )
+    snapshot.save_snapshot(path, cache, list, index)
+
+
+def test_snapshot_round_trip(tmp_path: Path, state, monkeypatch) -> None:
+    decayed, trending = state
+    path = tmp_path / "snap.bin"
+    monkeypatch.setattr(snapshot.time, "time", lambda: 3600 * 110 + 60.0)
+    _save(path, decayed, trending)
+
+    fresh_decayed = DecayedTrending(half_life_hours=24, weights=WEIGHTS)
+    fresh_trending = TrendingSnapshot()
+    monkeypatch.setattr(snapshot, "decayed_trending", fresh_decayed)
+    monkeypatch.setattr(snapshot, "trending_snapshot", fresh_trending)
+    cache, index = RecoCache(ttl_minutes=10), MinHashLSH()
+
+    counts = snapshot.load_snapshot(path, cache, list, index)
+
+    assert counts == {"posts": 1, "cache": 1, "trending": 2}
+    assert cache.get("u1", "HOME") == ITEMS
+    assert index.ready and "11111111-1111-1111-1111-111111111111" in index
+    assert fresh_decayed.ready and fresh_decayed.top(1, [])[0][0] == "p9"
+    assert fresh_trending.get(1, []) == [("p9", 5.0, "trending_decayed")]
+
+
+def test_reconfigured_snapshot_keeps_only_posts(tmp_path: Path, state, monkeypatch) -> None:
+    path = tmp_path / "snap.bin"
+    _save(path, *state)
+    monkeypatch.setattr(snapshot, "ranking_fingerprint", lambda: 0)
+    cache, index = RecoCache(ttl_minutes=10), MinHashLSH()
+
+    counts = snapshot.load_snapshot(path, cache, list, index)
+
+    assert counts["cache"] == 0 and counts["posts"] == 1
+    assert cache.get("u1", "HOME") is None
+
+
+def test_unknown_format_is_ignored(tmp_path: Path) -> None:
+    path = tmp_path / "snap.bin"
+    path.write_bytes(b"XXXX" + bytes(40))
+    assert snapshot.load_snapshot(path, RecoCache(ttl_minutes=10), list, MinHashLSH()) == {}
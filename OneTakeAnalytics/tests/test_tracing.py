@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import json
+import logging
+
+from services.reco_service.deadline import Deadline, StageRunner
+from services.reco_service.metrics import Metrics, metrics
+from services.reco_service.tracing import span, start_trace
+
+
+def test_stage_and_nested_call_spans_join_the_request_trace() -> None:
+    def stage(limit: int, deadline: Deadline) -> list[tuple[str, float, str]]:
+        # Runs on the stage pool; the span still lands in the caller's trace.
+        with span("clickhouse", "fake_query"):
+            pass
+        return [("p1", 1.0, "trending")] * limit
+
+    with start_trace("trace-1", "GetRecommendations", slow_ms=0) as trace:
+        StageRunner(Deadline(1.0)).run("trending", stage, 2)
+
+    spans = {(s["kind"], s["name"]): s for s in trace.breakdown()["spans"]}
+    assert spans[("stage", "trending")]["candidates"] == 2
+    assert ("clickhouse", "fake_query") in spans
+    assert trace.trace_id == "trace-1"
+    assert metrics.histogram("reco_span_latency_ms", kind="stage", span="trending")[0] >= 1
+
+
+def test_slow_requests_are_logged_with_their_breakdown(caplog) -> None:
+    with caplog.at_level(logging.WARNING, logger="reco.slow"):
+        with start_trace("", "GetRecommendations", slow_ms=0.001, sample=1.0):
+            with span("http", "core.get_post", post_id="p1"):
+                sum(range(10000))
+
+    record = json.loads(caplog.records[-1].getMessage().split(" ", 2)[2])
+    assert record["trace_id"] and record["spans"][0]["post_id"] == "p1"
+
+
+def test_histogram_renders_cumulative_prometheus_buckets() -> None:
+    registry = Metrics()
+    registry.observe("lat_ms", 3, stage="a")
+    registry.observe("lat_ms", 30, stage="a")
+
+    text = registry.render_prometheus()
+
+    assert "# TYPE lat_ms histogram" in text
+    assert 'lat_ms_bucket{stage="a",le="5"} 1' in text
+    assert 'lat_ms_bucket{stage="a",le="50"} 2' in text
+    assert 'lat_ms_count{stage="a"} 2' in text
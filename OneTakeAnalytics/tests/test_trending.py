@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from services.reco_service.trending import get_trending_post_ids
+from services.reco_service.trending import DecayedTrending, get_trending_post_ids
 
 
 class _FakeClient:
@@ -22,3 +22,59 @@ def test_trending_returns_ordered_items_with_reason_and_exclusions(monkeypatch)
         ("post-1", 9.0, "trending_views_24h"),
         ("post-3", 3.0, "trending_views_24h"),
     ]
+
+
+class _RollupClient:
+    """Evaluates DECAYED_SCORES_QUERY over in-memory post_hourly_counts rows."""
+
+    def __init__(self, rows: list[tuple[int, str, int, int, int]]) -> None:
+        self.rows = rows
+        self.ranges: list[tuple[float, float]] = []
+
+    def execute(self, query: str, params: dict[str, float]) -> list[tuple[str, float]]:
+        assert "post_hourly_counts" in query
+        self.ranges.append((params["since"], params["until"]))
+        scores: dict[str, float] = {}
+        for hour, pid, views, likes, completions in self.rows:
+            if params["since"] <= hour < params["until"]:
+                weight = (
+                    views * params["w_views"]
+                    + likes * params["w_likes"]
+                    + completions * params["w_completions"]
+                )
+                decay = 2 ** ((hour - params["t0"]) / params["half_life_sec"])
+                scores[pid] = scores.get(pid, 0.0) + weight * decay
+        return list(scores.items())
+
+
+def test_decayed_trending_blends_signals_and_refreshes_incrementally() -> None:
+    h = 3600
+    now = 1000 * h
+    client = _RollupClient(
+        [
+            (now - 24 * h, "old-hit", 40, 0, 0),  # one half-life ago
+            (now - 2 * h, "liked", 3, 2, 1),
+            (now, "fresh", 5, 0, 0),
+        ]
+    )
+    trending = DecayedTrending(
+        half_life_hours=24,
+        weights={"views": 1.0, "likes": 3.0, "completions": 2.0},
+        lookback_hours=48,
+    )
+
+    trending.refresh(client, now=now + 60)
+
+    top = trending.top(3, exclude_ids=[])
+    assert [pid for pid, _, _ in top] == ["old-hit", "liked", "fresh"]
+    assert abs(top[0][1] - 20.0) < 0.1
+    assert {reason for _, _, reason in top} == {"trending_decayed"}
+    assert client.ranges == [(now - 48 * h, now), (now, now + h)]
+
+    client.rows.append((now, "fresh", 30, 0, 0))
+    client.ranges.clear()
+    trending.refresh(client, now=now + 2 * h)
+
+    assert client.ranges == [(now, now + 2 * h), (now + 2 * h, now + 3 * h)]
+    assert [pid for pid, _, _ in trending.top(1, exclude_ids=[])] == ["fresh"]
+    assert [pid for pid, _, _ in trending.top(1, exclude_ids=["fresh"])] == ["old-hit"]
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import Any
+
+from jobs.aggregates import validate_distinct
+from jobs.aggregates.validate_distinct import Comparison
+
+DAY = date(2026, 5, 1)
+
+
+class _FakeClient:
+    """Exact and approximate answers for one day and the last week."""
+
+    def __init__(self, exact_dau: int, approx_dau: int) -> None:
+        self.exact_dau = exact_dau
+        self.approx_dau = approx_dau
+
+    def execute(self, query: str, params: Any = None) -> list:
+        query = " ".join(query.split())
+        if query.startswith("SELECT DISTINCT date"):
+            return [(DAY,)]
+        if "toMonday(today())" in query:
+            return [(date(2026, 4, 27),)]
+        if "FROM default.weekly_active_users" in query:
+            return [(1003,)]
+        if "uniqExact(user_id) FROM default.events" in query:
+            return [(self.exact_dau,)] if params.get("day") else [(1000,)]
+        if "FROM default.daily_active_users_state" in query:
+            return [(self.approx_dau,)]
+        if "uniqExact(session_id)" in query:
+            return [("record_start", 200, 150), ("record_stop", 100, 80)]
+        if "FROM default.funnel_record_to_publish_state" in query:
+            return [("record_start", 201, 150), ("record_stop", 100, 81)]
+        raise AssertionError(query)
+
+
+def test_comparison_error_is_relative_to_exact() -> None:
+    assert Comparison("dau", "d", 1000, 990).error == 0.01
+    assert Comparison("dau", "d", 0, 0).error == 0.0
+    assert Comparison("dau", "d", 0, 3).error == 1.0
+
+
+def test_report_passes_within_tolerance_and_fails_beyond(monkeypatch) -> None:
+    monkeypatch.setattr(validate_distinct, "get_client", lambda: _FakeClient(500, 502))
+    assert validate_distinct.main(["--sample", "3", "--seed", "1"]) == 0
+
+    comparisons = validate_distinct.compare_day(_FakeClient(500, 502), DAY)
+    # DAU plus sessions/users for each of the four steps; unreached steps compare as 0 == 0.
+    assert len(comparisons) == 9
+    assert comparisons[0] == Comparison("dau", str(DAY), 500, 502)
+
+    monkeypatch.setattr(validate_distinct, "get_client", lambda: _FakeClient(500, 550))
+    assert validate_distinct.main([]) == 1
@@ -1,5 +1,8 @@
 -- Raw events table for OneTake analytics (v1)
 -- See ROADMAP section 4.1
+-- Keep in sync with CREATE_TABLE_SQL in services/analytics_ingest/clickhouse_writer.py
+-- (tests/test_schema_migrations.py checks); change existing tables through a migration in
+-- contracts/clickhouse/migrations.
 
 CREATE TABLE IF NOT EXISTS events
 (
@@ -9,10 +12,14 @@ CREATE TABLE IF NOT EXISTS events
     session_id  String,
     event_name  LowCardinality(String),
     route       String,
-    entity_type Nullable(String),
+    entity_type LowCardinality(Nullable(String)),
     entity_id   Nullable(UUID),
     props_json  String,
-    trace_id    String
+    trace_id    String,
+    ingested_at DateTime64(3) DEFAULT now64(3),
+    INDEX idx_ingested_at ingested_at TYPE minmax GRANULARITY 4,
+    INDEX idx_user_id user_id TYPE bloom_filter(0.01) GRANULARITY 2,
+    INDEX idx_entity_id entity_id TYPE bloom_filter(0.01) GRANULARITY 2
 )
 ENGINE = MergeTree()
 PARTITION BY toYYYYMM(ts)
@@ -0,0 +1,42 @@
+-- Hourly per-post engagement rollup, filled from events by a materialized view.
+-- Feeds the reco service's time-decayed trending score (one small scan per refresh
+-- instead of GROUP BY over raw events for every trending window). The same objects as
+-- contracts/clickhouse/migrations/0008_post_hourly_counts.sql, for new databases.
+
+CREATE TABLE IF NOT EXISTS post_hourly_counts
+(
+    hour        DateTime,
+    post_id     UUID,
+    views       UInt64,
+    likes       UInt64,
+    completions UInt64
+)
+ENGINE = SummingMergeTree
+PARTITION BY toYYYYMM(hour)
+ORDER BY (hour, post_id)
+TTL hour + INTERVAL 30 DAY;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS post_hourly_counts_mv TO post_hourly_counts AS
+SELECT
+    toStartOfHour(ts) AS hour,
+    assumeNotNull(entity_id) AS post_id,
+    countIf(event_name = 'post_view') AS views,
+    countIf(event_name = 'post_like') AS likes,
+    countIf(event_name = 'watch_complete') AS completions
+FROM events
+WHERE entity_type = 'post'
+  AND entity_id IS NOT NULL
+  AND event_name IN ('post_view', 'post_like', 'watch_complete')
+GROUP BY hour, post_id;
+
+-- The view only sees new inserts. To backfill once after creating it (run exactly once,
+-- rows are summed):
+-- INSERT INTO post_hourly_counts
+-- SELECT toStartOfHour(ts), assumeNotNull(entity_id),
+--        countIf(event_name = 'post_view'), countIf(event_name = 'post_like'),
+--        countIf(event_name = 'watch_complete')
+-- FROM events
+-- WHERE entity_type = 'post' AND entity_id IS NOT NULL
+--   AND event_name IN ('post_view', 'post_like', 'watch_complete')
+--   AND ts < '<time the view was created>' AND ts >= now() - INTERVAL 30 DAY
+-- GROUP BY 1, 2;
@@ -0,0 +1,13 @@
+-- Incremental aggregate refresh (jobs/aggregates/refresh_aggregates.py): the ingested_at up
+-- to which each aggregate table has been refreshed. The same table as
+-- contracts/clickhouse/migrations/0004_events_ingested_at.sql, which also adds
+-- events.ingested_at to existing databases (01_events.sql creates it on new ones).
+
+CREATE TABLE IF NOT EXISTS aggregate_watermarks
+(
+    table_name LowCardinality(String),
+    watermark  DateTime64(3),
+    updated_at DateTime DEFAULT now()
+)
+ENGINE = ReplacingMergeTree(updated_at)
+ORDER BY table_name;
@@ -0,0 +1,26 @@
+-- Per-user activity bitmaps for retention and cohorts (jobs/aggregates/refresh_aggregates.py,
+-- queried by jobs/aggregates/retention.py).
+--
+-- One row per user and month: bit d-1 of days is set if the user had an event on day d.
+-- Both tables combine re-inserted rows with idempotent functions (bit OR, min), so the
+-- incremental refresh may recompute a day any number of times. The same tables as
+-- contracts/clickhouse/migrations/0007_user_activity.sql, for new databases.
+
+CREATE TABLE IF NOT EXISTS user_activity_monthly
+(
+    month   Date,
+    user_id UUID,
+    days    SimpleAggregateFunction(groupBitOr, UInt32)
+)
+ENGINE = AggregatingMergeTree
+PARTITION BY toYear(month)
+ORDER BY (month, user_id);
+
+-- Cohort of each user: first day with an event (within the refreshed window).
+CREATE TABLE IF NOT EXISTS user_first_seen
+(
+    user_id    UUID,
+    first_seen SimpleAggregateFunction(min, Date)
+)
+ENGINE = AggregatingMergeTree
+ORDER BY user_id;
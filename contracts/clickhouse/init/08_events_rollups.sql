@@ -0,0 +1,38 @@
+-- Rollups that outlive raw events (jobs/aggregates/compact_events.py); the same tables as
+-- contracts/clickhouse/migrations/0003_events_rollups.sql, for new databases, without
+-- follow_edges (dropped by 0009_drop_follow_edges.sql).
+
+-- Events per hour and entity. Rows without an entity use '' and the zero UUID.
+CREATE TABLE IF NOT EXISTS events_hourly
+(
+    hour        DateTime,
+    event_name  LowCardinality(String),
+    entity_type LowCardinality(String),
+    entity_id   UUID,
+    events      UInt64
+)
+ENGINE = SummingMergeTree(events)
+PARTITION BY toYYYYMM(hour)
+ORDER BY (event_name, hour, entity_type, entity_id);
+
+-- Distinct users per day (exact set, the same size as daily_active_users_agg's states).
+CREATE TABLE IF NOT EXISTS events_daily_users
+(
+    date  Date,
+    users AggregateFunction(uniqExact, UUID)
+)
+ENGINE = AggregatingMergeTree
+PARTITION BY toYYYYMM(date)
+ORDER BY date;
+
+-- Compacted events partitions: ingested_at rolled up to, raw rows seen, whether dropped.
+CREATE TABLE IF NOT EXISTS events_rollup_progress
+(
+    partition    UInt32,
+    rolled_until DateTime64(3),
+    rows         UInt64,
+    dropped      UInt8,
+    updated_at   DateTime DEFAULT now()
+)
+ENGINE = ReplacingMergeTree(updated_at)
+ORDER BY partition;
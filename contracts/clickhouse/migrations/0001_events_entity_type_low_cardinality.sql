@@ -0,0 +1,5 @@
+-- The ingest service used to declare entity_type as Nullable(LowCardinality(String)), which
+-- ClickHouse rejects, while 01_events.sql used Nullable(String). Both now declare
+-- LowCardinality(Nullable(String)); bring existing tables in line (a metadata change
+-- plus a rewrite of the column only).
+ALTER TABLE events MODIFY COLUMN entity_type LowCardinality(Nullable(String));
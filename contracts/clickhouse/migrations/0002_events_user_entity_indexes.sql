@@ -0,0 +1,12 @@
+-- Per-user and per-post lookups (reco prefetch user histories, following, post counters)
+-- filter events by user_id / entity_id, but the table is ordered by (event_name, ts, ...),
+-- so the primary key only narrows them to an event name and time range. Bloom filter
+-- skip indexes let ClickHouse skip granules that cannot contain the ids asked for.
+--
+-- Skip indexes rather than projections: a projection ordered by user_id would need
+-- allow_nullable_key for the Nullable(UUID) column and store every event a second time.
+ALTER TABLE events ADD INDEX IF NOT EXISTS idx_user_id user_id TYPE bloom_filter(0.01) GRANULARITY 2;
+ALTER TABLE events ADD INDEX IF NOT EXISTS idx_entity_id entity_id TYPE bloom_filter(0.01) GRANULARITY 2;
+-- Build the indexes for parts written before they existed (runs as a background mutation).
+ALTER TABLE events MATERIALIZE INDEX idx_user_id;
+ALTER TABLE events MATERIALIZE INDEX idx_entity_id;
@@ -0,0 +1,50 @@
+-- Rollups that outlive raw events (jobs/aggregates/compact_events.py). Months of events older
+-- than EVENTS_RAW_RETENTION_DAYS are summarised here, then dropped (or recompressed).
+-- Readers use them for days before the raw horizon: refresh_aggregates (post_daily_metrics,
+-- daily_active_users) and the reco follow graph.
+
+-- Events per hour and entity. Rows without an entity use '' and the zero UUID.
+CREATE TABLE IF NOT EXISTS events_hourly
+(
+    hour        DateTime,
+    event_name  LowCardinality(String),
+    entity_type LowCardinality(String),
+    entity_id   UUID,
+    events      UInt64
+)
+ENGINE = SummingMergeTree(events)
+PARTITION BY toYYYYMM(hour)
+ORDER BY (event_name, hour, entity_type, entity_id);
+
+-- Distinct users per day (exact set, the same size as daily_active_users_agg's states).
+CREATE TABLE IF NOT EXISTS events_daily_users
+(
+    date  Date,
+    users AggregateFunction(uniqExact, UUID)
+)
+ENGINE = AggregatingMergeTree
+PARTITION BY toYYYYMM(date)
+ORDER BY date;
+
+-- Last follow/unfollow per (follower, creator); the follow graph is read from all history.
+CREATE TABLE IF NOT EXISTS follow_edges
+(
+    follower UUID,
+    creator  UUID,
+    followed UInt8,
+    ts       DateTime64(3)
+)
+ENGINE = ReplacingMergeTree(ts)
+ORDER BY (follower, creator);
+
+-- Compacted events partitions: ingested_at rolled up to, raw rows seen, whether dropped.
+CREATE TABLE IF NOT EXISTS events_rollup_progress
+(
+    partition    UInt32,
+    rolled_until DateTime64(3),
+    rows         UInt64,
+    dropped      UInt8,
+    updated_at   DateTime DEFAULT now()
+)
+ENGINE = ReplacingMergeTree(updated_at)
+ORDER BY partition;
@@ -0,0 +1,140 @@
+-- Continuously maintained aggregates: materialized views over events write partial
+-- aggregation states into AggregatingMergeTree tables; the *_live views finalize them with
+-- the same columns as the tables refresh_aggregates fills.
+--
+-- A view only sees rows inserted after it was created. Right after creating it, its cutoff
+-- is recorded once in aggregate_watermarks as '<table>_mv' (a repeated run keeps the first
+-- row; delete it if the view is dropped and recreated). History is loaded once with
+--   python -m jobs.aggregates.backfill_aggregate_views backfill
+-- which copies events ingested before the cutoff (events.ingested_at), one day per insert.
+-- Inserts in the milliseconds between a view's creation and its cutoff row are counted by
+-- both; verify reports any day this affects. Then
+--   python -m jobs.aggregates.backfill_aggregate_views verify
+-- compares the totals with the tables of the legacy job.
+--
+-- On a database whose views already existed before their cutoff rows were recorded, this
+-- records the migration time instead: delete those '<table>_mv' rows and backfill with
+-- --cutoff set to the views' real creation time.
+
+-- Daily active users
+CREATE TABLE IF NOT EXISTS daily_active_users_agg
+(
+    date  Date,
+    users AggregateFunction(uniqExact, UUID)
+)
+ENGINE = AggregatingMergeTree
+ORDER BY date;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS daily_active_users_mv TO daily_active_users_agg AS
+SELECT
+    toDate(ts) AS date,
+    uniqExactState(assumeNotNull(user_id)) AS users
+FROM events
+WHERE user_id IS NOT NULL
+GROUP BY date;
+
+INSERT INTO aggregate_watermarks (table_name, watermark)
+SELECT 'daily_active_users_mv', now64(3)
+WHERE (SELECT count() FROM aggregate_watermarks WHERE table_name = 'daily_active_users_mv') = 0;
+
+CREATE VIEW IF NOT EXISTS daily_active_users_live AS
+SELECT date, uniqExactMerge(users) AS dau
+FROM daily_active_users_agg
+GROUP BY date;
+
+-- Post daily metrics
+CREATE TABLE IF NOT EXISTS post_daily_metrics_agg
+(
+    date       Date,
+    post_id    UUID,
+    views      SimpleAggregateFunction(sum, UInt64),
+    likes      SimpleAggregateFunction(sum, UInt64),
+    completion SimpleAggregateFunction(sum, UInt64)
+)
+ENGINE = AggregatingMergeTree
+PARTITION BY toYYYYMM(date)
+ORDER BY (date, post_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS post_daily_metrics_mv TO post_daily_metrics_agg AS
+SELECT
+    toDate(ts) AS date,
+    assumeNotNull(entity_id) AS post_id,
+    countIf(event_name = 'post_view') AS views,
+    countIf(event_name = 'post_like') AS likes,
+    countIf(event_name = 'watch_complete') AS completion
+FROM events
+WHERE entity_type = 'post'
+  AND entity_id IS NOT NULL
+GROUP BY date, post_id;
+
+INSERT INTO aggregate_watermarks (table_name, watermark)
+SELECT 'post_daily_metrics_mv', now64(3)
+WHERE (SELECT count() FROM aggregate_watermarks WHERE table_name = 'post_daily_metrics_mv') = 0;
+
+CREATE VIEW IF NOT EXISTS post_daily_metrics_live AS
+SELECT date, post_id, sum(views) AS views, sum(likes) AS likes, sum(completion) AS completion
+FROM post_daily_metrics_agg
+GROUP BY date, post_id;
+
+-- Record-to-publish funnel: ordered steps per session and day (windowFunnel), as in
+-- refresh_funnel. States are kept per session so later events of a session still merge
+-- into its funnel; the live view counts sessions/users per reached step.
+CREATE TABLE IF NOT EXISTS funnel_record_to_publish_agg
+(
+    date       Date,
+    session_id String,
+    level      AggregateFunction(windowFunnel(86400), DateTime, UInt8, UInt8, UInt8, UInt8),
+    user_id    AggregateFunction(any, Nullable(UUID))
+)
+ENGINE = AggregatingMergeTree
+PARTITION BY toYYYYMM(date)
+ORDER BY (date, session_id);
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS funnel_record_to_publish_mv TO funnel_record_to_publish_agg AS
+SELECT
+    toDate(ts) AS date,
+    session_id,
+    windowFunnelState(86400)(
+        toDateTime(ts),
+        event_name = 'record_start',
+        event_name = 'record_stop',
+        event_name = 'upload_success',
+        event_name = 'publish_success'
+    ) AS level,
+    anyState(user_id) AS user_id
+FROM events
+WHERE event_name IN ('record_start', 'record_stop', 'upload_success', 'publish_success')
+  AND session_id != ''
+GROUP BY date, session_id;
+
+INSERT INTO aggregate_watermarks (table_name, watermark)
+SELECT 'funnel_record_to_publish_mv', now64(3)
+WHERE (SELECT count() FROM aggregate_watermarks WHERE table_name = 'funnel_record_to_publish_mv') = 0;
+
+CREATE VIEW IF NOT EXISTS funnel_record_to_publish_live AS
+SELECT
+    date,
+    step_name,
+    uniqExact(session_id) AS unique_sessions,
+    uniqExact(user_id) AS unique_users
+FROM
+(
+    SELECT date, session_id, windowFunnelMerge(86400)(level) AS level, anyMerge(user_id) AS user_id
+    FROM funnel_record_to_publish_agg
+    GROUP BY date, session_id
+)
+ARRAY JOIN arraySlice(['record_start', 'record_stop', 'upload_success', 'publish_success'], 1, level)
+    AS step_name
+GROUP BY date, step_name;
+
+-- Days already backfilled per table, skipped by a re-run (a day whose run was interrupted
+-- may be written twice; see jobs/aggregates/backfill_aggregate_views.py).
+CREATE TABLE IF NOT EXISTS aggregate_backfill_progress
+(
+    table_name LowCardinality(String),
+    date       Date,
+    cutoff     DateTime64(3),
+    done_at    DateTime DEFAULT now()
+)
+ENGINE = ReplacingMergeTree(done_at)
+ORDER BY (table_name, date);
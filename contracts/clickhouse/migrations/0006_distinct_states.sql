@@ -0,0 +1,54 @@
+-- Approximate distinct counts (AGGREGATE_DISTINCT_MODE=approx in refresh_aggregates).
+-- Daily HyperLogLog-style states (uniqCombined64) instead of exact user sets: fixed size per
+-- day whatever the number of users, and mergeable, so weekly/monthly uniques are read from
+-- the daily states without touching events. Merging a state with itself changes nothing,
+-- so re-inserting a recomputed day is harmless; AggregatingMergeTree folds the rows.
+
+CREATE TABLE IF NOT EXISTS daily_active_users_state
+(
+    date  Date,
+    users AggregateFunction(uniqCombined64, UUID)
+)
+ENGINE = AggregatingMergeTree
+PARTITION BY toYYYYMM(date)
+ORDER BY date;
+
+CREATE TABLE IF NOT EXISTS funnel_record_to_publish_state
+(
+    date      Date,
+    step_name LowCardinality(String),
+    sessions  AggregateFunction(uniqCombined64, String),
+    users     AggregateFunction(uniqCombined64, Nullable(UUID))
+)
+ENGINE = AggregatingMergeTree
+PARTITION BY toYYYYMM(date)
+ORDER BY (date, step_name);
+
+-- Weeks start on Monday.
+CREATE VIEW IF NOT EXISTS weekly_active_users AS
+SELECT toMonday(date) AS week, uniqCombined64Merge(users) AS wau
+FROM daily_active_users_state
+GROUP BY week;
+
+CREATE VIEW IF NOT EXISTS monthly_active_users AS
+SELECT toStartOfMonth(date) AS month, uniqCombined64Merge(users) AS mau
+FROM daily_active_users_state
+GROUP BY month;
+
+CREATE VIEW IF NOT EXISTS funnel_record_to_publish_weekly AS
+SELECT
+    toMonday(date) AS week,
+    step_name,
+    uniqCombined64Merge(sessions) AS unique_sessions,
+    uniqCombined64Merge(users) AS unique_users
+FROM funnel_record_to_publish_state
+GROUP BY week, step_name;
+
+CREATE VIEW IF NOT EXISTS funnel_record_to_publish_monthly AS
+SELECT
+    toStartOfMonth(date) AS month,
+    step_name,
+    uniqCombined64Merge(sessions) AS unique_sessions,
+    uniqCombined64Merge(users) AS unique_users
+FROM funnel_record_to_publish_state
+GROUP BY month, step_name;
@@ -0,0 +1,4 @@
+-- follow_edges (from 0003) had no reader: the reco FOLLOWING feed loads the follow graph
+-- from Core's internal exports, and compact_events no longer rolls follows up.
+
+DROP TABLE IF EXISTS follow_edges;